@@ -1,21 +1,48 @@
 import tkinter as tk
 from tkinter import ttk  # For OptionMenu, Notebook, Scale and better styling if needed
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.patches as patches  # For drawing polygons/shapes
-import matplotlib.patheffects as path_effects  # Import for path effects
-from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection  # For 3D polygons
 import tkinter.scrolledtext as scrolledtext
 from collections import deque  # For destination node traces
-from PIL import Image, ImageTk, ImageDraw
 import math
-import json
 import sys
-import socket
-import threading
-import struct # For creating binary data
+import time
+import argparse
+
+from octa13_protocol import (symbols, colors, spins, ELEMENT_COUNT, NUM_DISCRETE_U_STEPS, U_STEP_ANGLE,
+                             SYMBOL_INDEX, Octa13Packet, generate_octa13_packet)
+from octa13_transport import TCPBroadcaster
+from octa13_recorder import FrameRecorder
+from octa13_ledger import FrameLedger
+from octa13_codec import CompactStreamEncoder
+from octa13_shm import SharedFrameRing
+from octa13_multicast import MulticastPublisher, parse_group
+from octa13_ndjson import NDJSONFrameSerializer, NDJSONBatcher
+from octa13_latency import timestamped_frame, stamp_sent
+from octa13_metrics import FrameLoopMetrics, MetricsServer, MetricsReporter, NULL_METRICS
+from octa13_clock import FrameProducer
+from octa13_logview import PacketLogView
+from octa13_sharding import run_feed as run_sharded_feed
+
+# matplotlib and PIL take most of a second to import. They are loaded by the first tab that draws
+# with them (_load_plotting / _load_imaging), so the window and the feed do not wait for them.
+Figure = FigureCanvasTkAgg = patches = path_effects = Poly3DCollection = None
+Image = ImageTk = ImageDraw = None
+
+
+def _load_plotting():
+    global Figure, FigureCanvasTkAgg, patches, path_effects, Poly3DCollection
+    if Figure is None:
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        import matplotlib.patches as patches  # For drawing polygons/shapes
+        import matplotlib.patheffects as path_effects
+        from mpl_toolkits.mplot3d.art3d import Poly3DCollection  # For 3D polygons
+        from matplotlib.figure import Figure
+
+
+def _load_imaging():
+    global Image, ImageTk, ImageDraw
+    if Image is None:
+        from PIL import ImageTk, ImageDraw, Image
 
 
 # Constants
@@ -23,15 +50,13 @@ R_TORUS = 5
 r_TORUS = 2
 NUM_POINTS_TORUS = 100
 TRACE_LENGTH = 12  # For stream path visualization
-
-# Octa13 symbolic elements
-symbols = ["⬢", "⬡", "◉", "⬣", "⬠", "⬤", "△", "◯"]
-colors = ["#FF0000", "#0000FF", "#00FF00", "#FFFF00", "#FF00FF", "#00FFFF", "#FF69B4", "#FFFFFF"]  # Hex colors
-spins = ["→", "↺", "↻", "∞", "⇅", "⇆", "⤡", "⟳"]
-
-ELEMENT_COUNT = len(symbols)
-if not (len(colors) == ELEMENT_COUNT and len(spins) == ELEMENT_COUNT):
-    raise ValueError("Symbols, colors, and spins lists must have the same number of elements.")
+MAX_GUI_STREAMS = 9  # The Active Streams slider's range; --streams above it runs headless on octa13_sharding.py
+DEFAULT_FRAME_PERIOD_MS = 300
+UI_QUEUE_FRAMES = 64  # Produced frames waiting for the Tk thread; the oldest go if the views fall this far behind
+UI_POLL_MS = 15  # How often the Tk thread looks for new frames
+PACKET_LOG_ROWS = 5000  # Packets kept in the Packet Data log
+WIRE_LOG_ROWS = 1000  # Frames kept in the TCP/Binary Output log
+WIRE_ROW_CHARS = 4096  # Longer frames are cut off in the output log
 
 # Transmission Simulation Constants
 DESTINATION_NODE_COLOR_DEFAULT = "cyan"
@@ -40,9 +65,6 @@ DESTINATION_NODE_SIZE = 180
 DESTINATION_NODE_TRACE_LENGTH = 6
 NODE_FLASH_DURATION_FRAMES = 5
 
-# Base9 System for Toroid
-NUM_DISCRETE_U_STEPS = 9
-
 # Polygon definitions for the "Symbolic Representation Explorer" tab
 polygon_definitions = {
     "⬢": {'type': 'polygon', 'sides': 6, 'label': 'Hexagon', 'unicode_char': "⬢"},
@@ -64,30 +86,35 @@ def torus_coords(u, v, R_param, r_param):
     return x, y, z
 
 
-def generate_octa13_packet_data(stream_id, frame_index, num_streams_total):
-    """
-    Generates a standard Octa13 packet (symbol, color, spin) and its torus coordinates,
-    incorporating the base9 system for the u-coordinate.
-    """
-    symbol_idx = (frame_index + stream_id) % ELEMENT_COUNT
-    symbol_char = symbols[symbol_idx]
-    color_val = colors[symbol_idx]
-    spin_char = spins[symbol_idx]
-
-    # Distribute streams more evenly for different counts
-    if num_streams_total > 0:
-        initial_u_offset_steps = stream_id * (NUM_DISCRETE_U_STEPS / num_streams_total)
-        current_u_discrete_step = (frame_index + initial_u_offset_steps) % NUM_DISCRETE_U_STEPS
-        u = current_u_discrete_step * (2 * np.pi / NUM_DISCRETE_U_STEPS)
-        v = (((frame_index // ELEMENT_COUNT) * np.pi / 8) + stream_id * (np.pi / num_streams_total * 0.5)) % (2 * np.pi)
-    else:
-        u, v = 0, 0
+def _set_grid_weights(container, rows, columns):
+    """Weight 1 for the first rows and columns of a grid, 0 for any left over from a larger layout."""
+    grid_columns, grid_rows = container.grid_size()
+    for row in range(max(rows, grid_rows)):
+        container.grid_rowconfigure(row, weight=1 if row < rows else 0)
+    for column in range(max(columns, grid_columns)):
+        container.grid_columnconfigure(column, weight=1 if column < columns else 0)
+
+
+def format_packet_row(packet):
+    return (f"{packet.frame_index:>8}  stream {packet.stream_id + 1:>2}  {packet.symbol} {packet.color} {packet.spin}"
+            f"  u {packet.u_coord:.4f}  v {packet.v_coord:.4f}{'  OVR' if packet.is_overridden else ''}")
+
 
-    return symbol_char, color_val, spin_char, u, v
+def format_wire_row(record):
+    """One (frame index, wire payload, is_binary) record: JSON as sent, binary as hex."""
+    frame_index, wire_payload, is_binary = record
+    if is_binary:
+        row = f"{frame_index:>8}  BIN  {len(wire_payload):>6} B  {wire_payload.hex(' ')}"
+    else:
+        row = f"{frame_index:>8}  JSON {len(wire_payload) + 1:>6} B  {wire_payload}"
+    return row if len(row) <= WIRE_ROW_CHARS else row[:WIRE_ROW_CHARS] + " ..."
 
 
 class OCTA13Visualizer:
-    def __init__(self, root_window, stream_mode='tcp', host='localhost', port=9999):
+    def __init__(self, root_window, stream_mode='tcp', host='localhost', port=9999, record_dir=None, shm_name=None,
+                 multicast=None, multicast_iface='127.0.0.1', json_batch_frames=1, json_flush_interval=None,
+                 ledger=False, ledger_key=None, latency_header=False,
+                 metrics_port=None, metrics_interval=None, broadcaster=None):
         self.root = root_window
         self.root.title("OCTA-13 Protocol Interactive Visualizer")
         self.root.configure(bg="black")
@@ -100,7 +127,7 @@ class OCTA13Visualizer:
         # --- Dynamic Stream Count & GUI State Variables ---
         self.num_streams_var = tk.IntVar(value=4)
         self.num_active_streams = self.num_streams_var.get()
-        self.animation_delay_ms = tk.IntVar(value=300)
+        self.animation_delay_ms = tk.IntVar(value=DEFAULT_FRAME_PERIOD_MS)
         self.selected_stream_var = tk.IntVar(value=1)
 
         # --- Video Analysis Tab State ---
@@ -133,41 +160,132 @@ class OCTA13Visualizer:
         # --- Data Streaming Setup ---
         self.stream_mode = stream_mode
         self.binary_stream_mode = tk.BooleanVar(value=False) # Add a variable for binary mode
+        self.compact_stream_mode = tk.BooleanVar(value=False) # Entropy-coded binary (octa13_codec.py)
+        self.compact_encoder = CompactStreamEncoder()
+        self._clients_seen_by_encoder = 0
+        # Binary TCP frames get an octa13_latency header (generation/serialization/send times) if enabled
+        self.latency_header = latency_header
+        self._frame_generated_ns = self._frame_serialized_ns = 0
         if self.stream_mode == 'tcp':
-            self.server_socket = None
-            self.client_sockets = []
-            self.lock = threading.Lock()
-            self.start_tcp_server(host, port)
+            self.broadcaster = broadcaster  # Already listening if the caller started it before building the GUI
+            if self.broadcaster is None:
+                self.broadcaster = TCPBroadcaster()
+                self.start_tcp_server(host, port)
+            elif self.broadcaster.server_socket is None:
+                self.stream_mode = None  # The caller's start() failed; run without streaming as start_tcp_server does
+
+        # --- JSON feed: one serialization per frame, batched into fewer writes if configured ---
+        self.json_serializer = NDJSONFrameSerializer()
+        self.json_batcher = None
+        if self.stream_mode == 'stdout':
+            self.json_batcher = NDJSONBatcher(self._write_stdout, json_batch_frames, json_flush_interval)
+        elif self.stream_mode == 'tcp':
+            self.json_batcher = NDJSONBatcher(lambda data: self.broadcaster.broadcast(data.encode('utf-8')),
+                                              json_batch_frames, json_flush_interval)
+
+        # --- Optional frame-loop instrumentation (octa13_metrics.py): HTTP endpoint and/or stderr summary ---
+        self.metrics = NULL_METRICS
+        self.metrics_server = self.metrics_reporter = None
+        if metrics_port is not None or metrics_interval:
+            self.metrics = FrameLoopMetrics(
+                ('generate', 'trace', 'torus', 'stream_panels', 'gaussian', 'packet_data', 'serialize', 'tab', 'emit'),
+                client_count=lambda: self.broadcaster.client_count if self.stream_mode == 'tcp' else 0)
+            if metrics_port is not None:
+                self.metrics_server = MetricsServer(self.metrics, port=metrics_port)
+            if metrics_interval:
+                self.metrics_reporter = MetricsReporter(self.metrics, metrics_interval)
+
+        # --- Optional session recording (see octa13_recorder.py for replay) ---
+        # With ledger=True the recording is also hash-chained (verify with octa13_ledger.py)
+        self.recorder = None
+        if record_dir:
+            self.recorder = FrameRecorder(record_dir, ledger=FrameLedger(key=ledger_key) if ledger else None)
+        # --- Optional shared-memory ring for same-host consumers (see octa13_shm.py for the reader) ---
+        self.shm_ring = None
+        if shm_name:
+            try:
+                self.shm_ring = SharedFrameRing(shm_name)
+            except FileExistsError:
+                # Another simulator owns the block, or a crashed one left it behind: never unlink it from here
+                print(f"[Shared Memory] Block '{shm_name}' already exists; running without the ring. "
+                      f"Pick another --shm name, or remove /dev/shm/{shm_name} if no simulator is using it.")
+            except OSError as e:
+                print(f"[Shared Memory] Error creating block '{shm_name}': {e}")
+        # --- Optional UDP multicast feed: one send per frame regardless of subscriber count ---
+        self.multicast = MulticastPublisher(*parse_group(multicast), iface=multicast_iface) if multicast else None
+
+        # --- The feed runs on its own fixed-rate thread (octa13_clock.py), so redraws cannot stretch the
+        # frame period. Frames reach the Tk thread through a bounded queue that the views drain at their own pace ---
+        self.feed_frame_index = 0  # Last frame produced; self.frame_index is the last one the views took in
+        self.producer = FrameProducer(self.produce_frame, self.animation_delay_ms.get() / 1000.0)
+        self.ui_frames = deque(maxlen=UI_QUEUE_FRAMES)
+        self.ui_dropped_frames = 0
+        self._ui_after_id = None
+        # The producer reads plain copies of the feed settings; Tk variables belong to the Tk thread
+        self._binary_mode = self._compact_mode = False
+        for variable in (self.binary_stream_mode, self.compact_stream_mode, self.animation_delay_ms):
+            variable.trace_add('write', self._sync_feed_settings)
 
         self.build_gui()
         self.reset_simulation_state()
-        self._update_explorer_polygon_visualization()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def _initialize_dynamic_structures(self):
         self.num_active_streams = self.num_streams_var.get()
         self.stream_overrides = [None] * self.num_active_streams
-        self.trace_history = [[] for _ in range(self.num_active_streams)]
-        self.destination_transmission_nodes = []
-        for i in range(self.num_active_streams):
-            u_pos = (i * 2 * np.pi / self.num_active_streams) + np.pi / 2 if self.num_active_streams > 0 else 0
-            v_pos = np.pi / 2 + (i % 2) * np.pi / 4
-            self.destination_transmission_nodes.append({
-                'id': f"DestNode-{i}", 'stream_index_source': i, 'u': u_pos, 'v': v_pos,
-                'flash_timer': 0, 'received_symbol_trace': deque(maxlen=DESTINATION_NODE_TRACE_LENGTH)
-            })
-            
+        self.trace_history = [deque(maxlen=TRACE_LENGTH) for _ in range(self.num_active_streams)]
+        self.destination_transmission_nodes = [self._new_destination_node(i) for i in range(self.num_active_streams)]
+        self._place_destination_nodes()
         # Initialize conceptual VQ models for each stream
-        self.analysis_vq_models = []
-        for i in range(self.num_active_streams):
-             np.random.seed(i) # Make it deterministic per stream
-             self.analysis_vq_models.append({
-                'latent_dim_h': 4, 'latent_dim_w': 4,
-                'codebook': np.random.rand(16, 3) * 255
-             })
-             
+        self.analysis_vq_models = [self._new_vq_model(i) for i in range(self.num_active_streams)]
         self.selected_stream_var.set(1)
 
+    def _new_destination_node(self, i):
+        return {'id': f"DestNode-{i}", 'stream_index_source': i, 'u': 0.0, 'v': np.pi / 2 + (i % 2) * np.pi / 4,
+                'flash_timer': 0, 'received_symbol_trace': deque(maxlen=DESTINATION_NODE_TRACE_LENGTH)}
+
+    def _place_destination_nodes(self):
+        """Spreads the destination nodes evenly around the torus for the current stream count."""
+        for i, node in enumerate(self.destination_transmission_nodes):
+            node['u'] = (i * 2 * np.pi / self.num_active_streams) + np.pi / 2
+
+    def _new_vq_model(self, i):
+        np.random.seed(i)  # Make it deterministic per stream
+        return {'latent_dim_h': 4, 'latent_dim_w': 4, 'codebook': np.random.rand(16, 3) * 255}
+
+    def apply_stream_count(self, *args):
+        """
+        Adds or retires streams at the top of the id range while the feed keeps running. New streams
+        join at the next produced frame; the others keep their traces, overrides and widgets.
+        """
+        new_count = self.num_streams_var.get()
+        old_count = self.num_active_streams
+        if new_count == old_count:
+            return
+        if new_count > old_count:
+            self.trace_history.extend(deque(maxlen=TRACE_LENGTH) for _ in range(old_count, new_count))
+            self.destination_transmission_nodes.extend(self._new_destination_node(i)
+                                                       for i in range(old_count, new_count))
+            self.analysis_vq_models.extend(self._new_vq_model(i) for i in range(old_count, new_count))
+        else:
+            del self.trace_history[new_count:]
+            del self.destination_transmission_nodes[new_count:]
+            del self.analysis_vq_models[new_count:]
+        # Always a new list, never resized in place: the producer takes the stream count from it
+        self.stream_overrides = (self.stream_overrides + [None] * new_count)[:new_count]
+        self.num_active_streams = new_count
+        self._place_destination_nodes()
+
+        self._resize_override_controls()
+        if 'Visualizer' in self.built_tabs:
+            self._resize_stream_panels()
+        if 'Stream Polygon Analysis' in self.built_tabs:
+            self._resize_analysis_windows()
+        if not self.running:  # Otherwise the next frame redraws
+            self.update_torus_plot()
+            self.update_stream_panels()
+            self.update_transmission_tab_plots()
+
     def build_gui(self):
         """Constructs the entire GUI structure."""
 
@@ -197,13 +315,12 @@ class OCTA13Visualizer:
         stream_count_frame.pack(side=tk.LEFT, padx=20)
         tk.Label(stream_count_frame, text="Active Streams:", fg="white", bg="black", font=("Arial", 10)).pack(
             side=tk.LEFT)
-        self.num_streams_scale = tk.Scale(stream_count_frame, from_=1, to=9, orient=tk.HORIZONTAL,
-                                          variable=self.num_streams_var,
+        # Streams are added or retired live as the slider moves (apply_stream_count); Reset restarts from frame 0
+        self.num_streams_scale = tk.Scale(stream_count_frame, from_=1, to=MAX_GUI_STREAMS, orient=tk.HORIZONTAL,
+                                          variable=self.num_streams_var, command=self.apply_stream_count,
                                           bg="#282c34", fg="white", troughcolor="black", highlightthickness=0,
                                           length=120)
         self.num_streams_scale.pack(side=tk.LEFT)
-        tk.Button(stream_count_frame, text="Apply & Reset", command=self.reset_simulation_state, bg="#61afef",
-                  fg="black", padx=5, pady=2, relief=tk.FLAT, font=("Arial", 9, "bold")).pack(side=tk.LEFT, padx=5)
 
         # --- Frequency Control ---
         freq_ctrl_frame = tk.Frame(top_ctrl_bar, bg="black")
@@ -224,37 +341,69 @@ class OCTA13Visualizer:
         style.map('TNotebook.Tab', foreground=[('selected', '#61dafb')], background=[('selected', '#282c34')])
         style.configure('TNotebook', background='black', borderwidth=0)
 
-        # --- Build all tabs ---
-        self._build_visualizer_tab()
-        self._build_packet_data_tab()
-        self._build_codex_tab()
-        self._build_transmission_tab()
-        self._build_tcp_output_tab() # New Tab
-        self._build_mission_tab()
-        self._build_explorer_tab()
-        self._build_quaternion_tab()
-        self._build_polygon_analysis_tab()
-        self._build_video_analysis_tab()
-        self._build_falcon_security_tab()
-        self._build_architecture_tab()
+        # --- Tabs: empty frames now (so tab indices stay fixed), contents built on first selection ---
+        self.built_tabs = set()
+        self._pending_tabs = {}
+        for title, builder, padding in (('Visualizer', self._build_visualizer_tab, 0),
+                                        ('Packet Data', self._build_packet_data_tab, 10),
+                                        ('Symbolic Codex', self._build_codex_tab, 0),
+                                        ('Toroid Transmission', self._build_transmission_tab, 0),
+                                        ('TCP/Binary Output', self._build_tcp_output_tab, 10),
+                                        ('Target Mission', self._build_mission_tab, 20),
+                                        ('Symbolic Explorer', self._build_explorer_tab, 10),
+                                        ('Quaternion Data', self._build_quaternion_tab, 10),
+                                        ('Stream Polygon Analysis', self._build_polygon_analysis_tab, 0),
+                                        ('Pixel-Semantic Analysis', self._build_video_analysis_tab, 0),
+                                        ('Falcon Security', self._build_falcon_security_tab, 20),
+                                        ('System Architecture', self._build_architecture_tab, 20)):
+            tab_frame = tk.Frame(self.notebook, bg="black", padx=padding, pady=padding)
+            self.notebook.add(tab_frame, text=title)
+            self._pending_tabs[str(tab_frame)] = (title, builder, tab_frame)
+        self.notebook.bind('<<NotebookTabChanged>>', self._build_selected_tab)
+        self.root.after_idle(self._build_selected_tab)  # The initially selected tab, once the window is up
 
         self.notebook.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5, pady=5)
 
+    def _build_selected_tab(self, event=None):
+        pending = self._pending_tabs.pop(self.notebook.select(), None)
+        if pending is None:
+            return
+        title, builder, tab_frame = pending
+        builder(tab_frame)
+        self.built_tabs.add(title)
+        self._refresh_tab(title)
+
+    def _refresh_tab(self, title):
+        """Brings a built tab in line with the simulation state (after a reset, or when first built)."""
+        if title == 'Visualizer':
+            self._rebuild_stream_panels()
+            self.update_torus_plot()
+            self.update_stream_panels()
+            if not self.running:
+                self.update_gaussian_plot([Octa13Packet(i, 0, 0, 0, 0, 0.0, 0.0)
+                                           for i in range(self.num_active_streams)])
+        elif title == 'Packet Data':
+            self.packet_log.clear()
+        elif title == 'TCP/Binary Output':
+            self.wire_log.clear()
+        elif title == 'Toroid Transmission':
+            self.update_transmission_tab_plots()
+        elif title == 'Symbolic Explorer':
+            self._update_explorer_polygon_visualization()
+        elif title == 'Stream Polygon Analysis':
+            self._rebuild_analysis_windows()
+
     def _build_override_controls(self):
         # Clear existing controls
         for widget in self.override_controls_frame.winfo_children():
             widget.destroy()
 
-        tk.Label(self.override_controls_frame, text="Influence Stream:", fg="white", bg="black",
-                 font=("Arial", 10)).pack(side=tk.LEFT, padx=(20, 5))
+        self.influence_label = tk.Label(self.override_controls_frame, text="Influence Stream:", fg="white",
+                                        bg="black", font=("Arial", 10))
+        self.influence_label.pack(side=tk.LEFT, padx=(20, 5))
 
         self.selected_stream_var.set(1)  # Reset selection
-        for i in range(self.num_active_streams):
-            rb = tk.Radiobutton(self.override_controls_frame, text=f"{i + 1}", variable=self.selected_stream_var,
-                                value=i + 1,
-                                fg="#61dafb", bg="black", selectcolor="black", activebackground="black",
-                                activeforeground="#61dafb", font=("Arial", 10))
-            rb.pack(side=tk.LEFT)
+        self.stream_radiobuttons = []  # Created by _resize_override_controls, after the rest of the bar
 
         tk.Label(self.override_controls_frame, text="Override Symbol:", fg="white", bg="black",
                  font=("Arial", 10)).pack(side=tk.LEFT, padx=(20, 5))
@@ -275,41 +424,69 @@ class OCTA13Visualizer:
             side=tk.LEFT, padx=5)
         tk.Button(self.override_controls_frame, text="Clear All", command=self.clear_all_overrides, bg="#e06c75",
                   fg="black", padx=10, pady=2, relief=tk.FLAT, font=("Arial", 10, "bold")).pack(side=tk.LEFT, padx=5)
+        self._resize_override_controls()
+
+    def _resize_override_controls(self):
+        """One radio button per active stream; only those of added or retired streams are created or destroyed."""
+        buttons = self.stream_radiobuttons
+        while len(buttons) > self.num_active_streams:
+            buttons.pop().destroy()
+        for i in range(len(buttons), self.num_active_streams):
+            rb = tk.Radiobutton(self.override_controls_frame, text=f"{i + 1}", variable=self.selected_stream_var,
+                                value=i + 1,
+                                fg="#61dafb", bg="black", selectcolor="black", activebackground="black",
+                                activeforeground="#61dafb", font=("Arial", 10))
+            rb.pack(side=tk.LEFT, after=buttons[-1] if buttons else self.influence_label)
+            buttons.append(rb)
+        if self.selected_stream_var.get() > self.num_active_streams:
+            self.selected_stream_var.set(self.num_active_streams)
 
-    def _rebuild_stream_gui_elements(self):
+    def _rebuild_stream_panels(self):
         # --- Rebuild Stream Panels in Visualizer Tab ---
         for widget in self.panel_frame.winfo_children():
             widget.destroy()
+        self.stream_panel_frames = []
         self.stream_labels_in_panel = []
-        for i in range(self.num_active_streams):
+        self._resize_stream_panels()
+
+    def _resize_stream_panels(self):
+        """Creates panels for added streams, destroys those of retired ones and re-grids the rest."""
+        while len(self.stream_panel_frames) > self.num_active_streams:
+            self.stream_panel_frames.pop().destroy()
+            self.stream_labels_in_panel.pop()
+        for i in range(len(self.stream_panel_frames), self.num_active_streams):
             frame = tk.LabelFrame(self.panel_frame, text=f"Stream {i + 1}", fg="white", bg="black",
                                   font=("Courier New", 11, "bold"), relief=tk.SOLID, borderwidth=1)
-            # Adjust grid layout for more streams
-            rows = (self.num_active_streams + 1) // 2
-            frame.grid(row=i % rows, column=i // rows, padx=5, pady=5, sticky="nsew")
-            self.panel_frame.grid_columnconfigure(i // rows, weight=1)
-            self.panel_frame.grid_rowconfigure(i % rows, weight=1)
             label_list = []
             for _ in range(TRACE_LENGTH):
                 label = tk.Label(frame, text="-", fg="white", bg="black", font=("Courier New", 9), anchor="w",
                                  justify=tk.LEFT)
                 label.pack(fill=tk.X, padx=5)
                 label_list.append(label)
+            self.stream_panel_frames.append(frame)
             self.stream_labels_in_panel.append(label_list)
+        # Adjust grid layout for more streams
+        rows = (self.num_active_streams + 1) // 2
+        for i, frame in enumerate(self.stream_panel_frames):
+            frame.grid(row=i % rows, column=i // rows, padx=5, pady=5, sticky="nsew")
+        _set_grid_weights(self.panel_frame, rows, (self.num_active_streams + rows - 1) // rows)
 
-        # --- Rebuild Analysis Windows ---
-        analysis_area = self.analysis_area_frame
-        for widget in analysis_area.winfo_children():
+    def _rebuild_analysis_windows(self):
+        for widget in self.analysis_area_frame.winfo_children():
             widget.destroy()
+        self.analysis_frames = []
         self.analysis_canvases = []
-        cols = 3 if self.num_active_streams <= 6 else 4
-        for i in range(self.num_active_streams):
+        self._resize_analysis_windows()
+
+    def _resize_analysis_windows(self):
+        """Creates analysis windows for added streams, destroys those of retired ones and re-grids the rest."""
+        analysis_area = self.analysis_area_frame
+        while len(self.analysis_frames) > self.num_active_streams:
+            self.analysis_frames.pop().destroy()
+            self.analysis_canvases.pop()
+        for i in range(len(self.analysis_frames), self.num_active_streams):
             analysis_frame = tk.LabelFrame(analysis_area, text=f"Stream {i + 1} Vertex", fg="white", bg="black",
                                            font=("Arial", 10, "bold"), relief=tk.SOLID, borderwidth=1, padx=5, pady=5)
-            analysis_frame.grid(row=i // cols, column=i % cols, padx=5, pady=5, sticky="nsew")
-            analysis_area.grid_columnconfigure(i % cols, weight=1)
-            analysis_area.grid_rowconfigure(i // cols, weight=1)
-
             sub_canvases = {}
             panel_titles = ["Vertex Symbol", "Latent Space (VQ)", "Reconstructed"]
             for j, title in enumerate(panel_titles):
@@ -321,19 +498,21 @@ class OCTA13Visualizer:
                 canvas = tk.Canvas(sub_frame, width=100, height=100, bg="#1c1e22", highlightthickness=0)
                 canvas.pack()
                 sub_canvases[title] = canvas
+            self.analysis_frames.append(analysis_frame)
             self.analysis_canvases.append(sub_canvases)
+            self._clear_analysis_canvases(i)
+        cols = 3 if self.num_active_streams <= 6 else 4
+        for i, analysis_frame in enumerate(self.analysis_frames):
+            analysis_frame.grid(row=i // cols, column=i % cols, padx=5, pady=5, sticky="nsew")
+        _set_grid_weights(analysis_area, (self.num_active_streams + cols - 1) // cols, min(self.num_active_streams, cols))
 
-        # --- Rebuild Override Controls ---
-        self._build_override_controls()
-
-    def _build_visualizer_tab(self):
-        visualizer_tab_frame = tk.Frame(self.notebook, bg="black")
-        self.notebook.add(visualizer_tab_frame, text='Visualizer')
+    def _build_visualizer_tab(self, visualizer_tab_frame):
+        _load_plotting()
         main_viz_frame = tk.Frame(visualizer_tab_frame, bg="black")
         main_viz_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         self.torus_canvas_frame = tk.Frame(main_viz_frame, bg="black")
         self.torus_canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        self.fig_torus = plt.Figure(figsize=(8, 6), dpi=100, facecolor='black')
+        self.fig_torus = Figure(figsize=(8, 6), dpi=100, facecolor='black')
         self.ax_torus = self.fig_torus.add_subplot(111, projection='3d')
         self.canvas_torus_widget = FigureCanvasTkAgg(self.fig_torus, master=self.torus_canvas_frame)
         self.canvas_torus_widget.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -342,25 +521,19 @@ class OCTA13Visualizer:
 
         gaussian_plot_frame = tk.Frame(visualizer_tab_frame, bg="black", pady=5)
         gaussian_plot_frame.pack(side=tk.BOTTOM, fill=tk.X)
-        self.fig_gaussian = plt.Figure(figsize=(6, 3.5), dpi=100, facecolor='black')
+        self.fig_gaussian = Figure(figsize=(6, 3.5), dpi=100, facecolor='black')
         self.ax_gaussian = self.fig_gaussian.add_subplot(111, projection='3d')
         self.canvas_gaussian_widget = FigureCanvasTkAgg(self.fig_gaussian, master=gaussian_plot_frame)
         self.canvas_gaussian_widget.get_tk_widget().pack(fill=tk.X, expand=False, pady=(0, 5))
         self.fig_torus.tight_layout(pad=0.5)
         self.fig_gaussian.tight_layout(pad=0.5)
 
-    def _build_packet_data_tab(self):
-        packet_data_tab_frame = tk.Frame(self.notebook, bg="black", padx=10, pady=10)
-        self.notebook.add(packet_data_tab_frame, text='Packet Data')
-        self.packet_data_text = scrolledtext.ScrolledText(packet_data_tab_frame, wrap=tk.WORD, bg="#1c1e22",
-                                                        fg="white", font=("Courier New", 10), relief=tk.FLAT,
-                                                        borderwidth=0)
-        self.packet_data_text.pack(fill=tk.BOTH, expand=True)
-        self.packet_data_text.config(state=tk.DISABLED)
-
-    def _build_codex_tab(self):
-        codex_tab_frame_outer = tk.Frame(self.notebook, bg="black")
-        self.notebook.add(codex_tab_frame_outer, text='Symbolic Codex')
+    def _build_packet_data_tab(self, packet_data_tab_frame):
+        self.packet_log = PacketLogView(packet_data_tab_frame, format_packet_row, capacity=PACKET_LOG_ROWS,
+                                        title="Packet Log", empty_text="No packet data generated yet.")
+        self.packet_log.pack(fill=tk.BOTH, expand=True)
+
+    def _build_codex_tab(self, codex_tab_frame_outer):
         codex_canvas = tk.Canvas(codex_tab_frame_outer, bg="black", highlightthickness=0)
         codex_scrollbar = ttk.Scrollbar(codex_tab_frame_outer, orient="vertical", command=codex_canvas.yview)
         codex_scrollable_frame = tk.Frame(codex_canvas, bg="black")
@@ -426,16 +599,15 @@ class OCTA13Visualizer:
         self.insert_compression_explanation()
         self.compression_explanation_text.config(state=tk.DISABLED)
 
-    def _build_transmission_tab(self):
-        transmission_tab_frame = tk.Frame(self.notebook, bg="black")
-        self.notebook.add(transmission_tab_frame, text='Toroid Transmission')
+    def _build_transmission_tab(self, transmission_tab_frame):
+        _load_plotting()
         transmission_plots_container = tk.Frame(transmission_tab_frame, bg="black")
         transmission_plots_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.source_toroid_frame = tk.Frame(transmission_plots_container, bg="black", relief=tk.SUNKEN, borderwidth=1)
         self.source_toroid_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
         tk.Label(self.source_toroid_frame, text="Source Toroid (Streams Sending)", bg="black", fg="white",
                  font=("Arial", 12, "bold")).pack(pady=2)
-        self.fig_trans_source = plt.Figure(figsize=(6, 5), dpi=100, facecolor='black')
+        self.fig_trans_source = Figure(figsize=(6, 5), dpi=100, facecolor='black')
         self.ax_trans_source = self.fig_trans_source.add_subplot(111, projection='3d')
         self.canvas_trans_source = FigureCanvasTkAgg(self.fig_trans_source, master=self.source_toroid_frame)
         self.canvas_trans_source.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -444,16 +616,14 @@ class OCTA13Visualizer:
         self.dest_toroid_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5)
         tk.Label(self.dest_toroid_frame, text="Destination Toroid (Nodes Receiving)", bg="black", fg="white",
                  font=("Arial", 12, "bold")).pack(pady=2)
-        self.fig_trans_dest = plt.Figure(figsize=(6, 5), dpi=100, facecolor='black')
+        self.fig_trans_dest = Figure(figsize=(6, 5), dpi=100, facecolor='black')
         self.ax_trans_dest = self.fig_trans_dest.add_subplot(111, projection='3d')
         self.canvas_trans_dest = FigureCanvasTkAgg(self.fig_trans_dest, master=self.dest_toroid_frame)
         self.canvas_trans_dest.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         self.fig_trans_dest.tight_layout(pad=0.2)
 
-    def _build_tcp_output_tab(self):
+    def _build_tcp_output_tab(self, tab_frame):
         """Builds the GUI for the TCP/Binary Output tab."""
-        tab_frame = tk.Frame(self.notebook, bg="black", padx=10, pady=10)
-        self.notebook.add(tab_frame, text='TCP/Binary Output')
 
         # Top frame for controls and live JSON view
         top_frame = tk.Frame(tab_frame, bg="black")
@@ -471,11 +641,15 @@ class OCTA13Visualizer:
                                       fg="#FFD700", bg="black", selectcolor="black", activebackground="black",
                                       activeforeground="#FFD700", font=("Arial", 10, "bold"))
         binary_check.pack(side=tk.RIGHT, padx=10)
+        compact_check = tk.Checkbutton(controls_frame, text="Compact (Entropy-Coded)", variable=self.compact_stream_mode,
+                                       fg="#FFD700", bg="black", selectcolor="black", activebackground="black",
+                                       activeforeground="#FFD700", font=("Arial", 10, "bold"))
+        compact_check.pack(side=tk.RIGHT, padx=10)
 
 
-        self.tcp_output_text = scrolledtext.ScrolledText(top_frame, wrap=tk.NONE, bg="#1c1e22", fg="white",
-                                                          font=("Courier New", 10), relief=tk.FLAT, borderwidth=0)
-        self.tcp_output_text.grid(row=1, column=0, sticky="nsew")
+        self.wire_log = PacketLogView(top_frame, format_wire_row, capacity=WIRE_LOG_ROWS,
+                                      empty_text="No packet data generated yet.")
+        self.wire_log.grid(row=1, column=0, sticky="nsew")
 
         # Bottom frame for explanation
         bottom_frame = tk.Frame(tab_frame, bg="black")
@@ -489,9 +663,7 @@ class OCTA13Visualizer:
         self._insert_binary_explanation(explanation_text)
         explanation_text.config(state=tk.DISABLED)
 
-    def _build_mission_tab(self):
-        mission_tab_frame = tk.Frame(self.notebook, bg="black", padx=20, pady=20)
-        self.notebook.add(mission_tab_frame, text='Target Mission')
+    def _build_mission_tab(self, mission_tab_frame):
         mission_title_label = tk.Label(mission_tab_frame, text="Target Mission:", fg="#61dafb", bg="black",
                                        font=("Arial", 16, "bold"))
         mission_title_label.pack(anchor="w", pady=(0, 10))
@@ -505,9 +677,8 @@ class OCTA13Visualizer:
                                            borderwidth=1)
         mission_statement_label.pack(anchor="nw", fill=tk.X, expand=False)
 
-    def _build_explorer_tab(self):
-        explorer_tab_frame = tk.Frame(self.notebook, bg="black", padx=10, pady=10)
-        self.notebook.add(explorer_tab_frame, text='Symbolic Explorer')
+    def _build_explorer_tab(self, explorer_tab_frame):
+        _load_plotting()
 
         explorer_controls_frame = tk.Frame(explorer_tab_frame, bg="black", pady=5)
         explorer_controls_frame.pack(side=tk.TOP, fill=tk.X)
@@ -554,7 +725,7 @@ class OCTA13Visualizer:
 
         explorer_plot_frame = tk.Frame(explorer_content_frame, bg="black", relief=tk.SUNKEN, borderwidth=1)
         explorer_plot_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
-        self.fig_explorer = plt.Figure(figsize=(5, 4), dpi=100, facecolor='black')
+        self.fig_explorer = Figure(figsize=(5, 4), dpi=100, facecolor='black')
         self.ax_explorer = self.fig_explorer.add_subplot(111)
         self.canvas_explorer = FigureCanvasTkAgg(self.fig_explorer, master=explorer_plot_frame)
         self.canvas_explorer.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -568,28 +739,23 @@ class OCTA13Visualizer:
         self.explorer_encoding_text.pack(fill=tk.BOTH, expand=True)
         self._insert_explorer_encoding_discussion()
 
-    def _build_quaternion_tab(self):
-        quaternion_tab_frame = tk.Frame(self.notebook, bg="black", padx=10, pady=10)
-        self.notebook.add(quaternion_tab_frame, text='Quaternion Data')
+    def _build_quaternion_tab(self, quaternion_tab_frame):
 
         quaternion_text = scrolledtext.ScrolledText(quaternion_tab_frame, wrap=tk.WORD, bg="#1c1e22", fg="white",
                                                   font=("Arial", 10), relief=tk.FLAT, borderwidth=0)
         quaternion_text.pack(fill=tk.BOTH, expand=True)
         self._insert_quaternion_explanation(quaternion_text)
 
-    def _build_polygon_analysis_tab(self):
+    def _build_polygon_analysis_tab(self, tab_frame):
         """Builds the GUI for the Stream Polygon Analysis tab."""
-        tab_frame = tk.Frame(self.notebook, bg="black")
-        self.notebook.add(tab_frame, text='Stream Polygon Analysis')
+        _load_imaging()
 
         # This main frame will be cleared and rebuilt when num_streams changes
         self.analysis_area_frame = tk.Frame(tab_frame, bg="black")
         self.analysis_area_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-    def _build_falcon_security_tab(self):
+    def _build_falcon_security_tab(self, tab_frame):
         """Builds the GUI for the Falcon Security tab."""
-        tab_frame = tk.Frame(self.notebook, bg="black", padx=20, pady=20)
-        self.notebook.add(tab_frame, text='Falcon Security')
 
         # Mission Statement
         tk.Label(tab_frame, text="Falcon Mission Statement", fg="#61dafb", bg="black",
@@ -609,19 +775,16 @@ class OCTA13Visualizer:
         explanation_text_widget.pack(fill=tk.BOTH, expand=True)
         self._insert_falcon_explanation(explanation_text_widget)
 
-    def _build_architecture_tab(self):
+    def _build_architecture_tab(self, tab_frame):
         """Builds the GUI for the System Architecture tab."""
-        tab_frame = tk.Frame(self.notebook, bg="black", padx=20, pady=20)
-        self.notebook.add(tab_frame, text='System Architecture')
 
         text_widget = scrolledtext.ScrolledText(tab_frame, wrap=tk.WORD, bg="#1c1e22", fg="white",
                                                 font=("Arial", 11), relief=tk.FLAT, borderwidth=0)
         text_widget.pack(fill=tk.BOTH, expand=True)
         self._insert_architecture_explanation(text_widget)
 
-    def _build_video_analysis_tab(self):
-        tab_frame = tk.Frame(self.notebook, bg="black")
-        self.notebook.add(tab_frame, text='Pixel-Semantic Analysis')
+    def _build_video_analysis_tab(self, tab_frame):
+        _load_imaging()
 
         # Main container with two columns
         main_frame = tk.Frame(tab_frame, bg="black")
@@ -848,6 +1011,9 @@ Human-readable, flexible, but verbose. Good for debugging. Each message is a sin
 2. Binary Format (Toggleable)
 Extremely compact and fast for machine-to-machine communication. This is crucial for performance-critical systems. The stream is a sequence of binary packets.
 
+3. Compact Format (Binary + "Compact (Entropy-Coded)")
+The same fields, bit-packed with u/v quantized to lattice steps and range-coded against a per-stream prediction (see octa13_codec.py for the block layout and a decoder). A predictable frame costs a couple of bytes instead of 20 bytes per packet. The coder is adaptive, so clients start decoding at the next keyframe, which is sent whenever a new client connects.
+
 --- Proposed Binary Packet Structure for Quaternion Decoders ---
 
 To efficiently transmit data that a downstream agent can use to reconstruct quaternions, we can define a fixed-size binary packet. The key is that the symbols (shape, color, spin) are just *pointers* or *indices*. The decoder will have a corresponding "codex" to look up what these indices mean (e.g., Symbol index 2 maps to a specific base quaternion).
@@ -864,13 +1030,16 @@ A potential 20-byte packet structure for EACH data point in a stream:
 | U-Coordinate     | 4     | Float        | Toroidal coordinate u (`f`).                       |
 | V-Coordinate     | 4     | Float        | Toroidal coordinate v (`f`).                       |
 | Status Flags     | 1     | Byte         | Bit 0: Is Overridden. Bits 1-7: Reserved.        |
-| Reserved         | 3     | ---          | Padding for alignment and future quaternion data. |
+| Stream ID (High) | 1     | Unsigned Int | stream_id >> 8; 0 below 256 streams (`B`).         |
+| Reserved         | 2     | ---          | Padding for alignment and future quaternion data. |
 | **Total Size** | **20**|              |                                                    |
 
-struct Format String: `<IBBBBffB3x`
+struct Format String: `<IBBBBffBB2x`
+
+With --latency-header, each binary frame is preceded by a 40-byte header (`<4sIIIqqq`: magic 'O13T', frame index, record count, reserved, then generation, serialization and send times in CLOCK_MONOTONIC nanoseconds), so a consumer on the same machine can split its latency into stages (see octa13_latency.py).
 
 Consideration for Quaternions:
-The 3 reserved bytes could be used in a future version. For example, a single byte could encode a "quaternion modifier" index, which the decoder uses to perturb a base quaternion associated with the main symbol. Or, the entire packet structure could be expanded to include four 4-byte floats for a full (w, x, y, z) quaternion, replacing the symbolic indices for a higher-fidelity stream.
+The 2 reserved bytes could be used in a future version. For example, a single byte could encode a "quaternion modifier" index, which the decoder uses to perturb a base quaternion associated with the main symbol. Or, the entire packet structure could be expanded to include four 4-byte floats for a full (w, x, y, z) quaternion, replacing the symbolic indices for a higher-fidelity stream.
 """
         text_widget.insert(tk.END, explanation.strip())
         text_widget.config(state=tk.DISABLED)
@@ -1081,7 +1250,7 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
     def apply_override(self):
         stream_idx = self.selected_stream_var.get() - 1
         if 0 <= stream_idx < self.num_active_streams:
-            self.stream_overrides[stream_idx] = self.override_symbol_var.get()
+            self.stream_overrides[stream_idx] = SYMBOL_INDEX.get(self.override_symbol_var.get())
 
     def clear_override_for_selected_stream(self):
         stream_idx = self.selected_stream_var.get() - 1
@@ -1091,34 +1260,43 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
     def clear_all_overrides(self):
         self.stream_overrides = [None] * self.num_active_streams
 
+    def _sync_feed_settings(self, *args):
+        try:
+            self._binary_mode = self.binary_stream_mode.get()
+            self._compact_mode = self.compact_stream_mode.get()
+            self.producer.clock.set_interval(self.animation_delay_ms.get() / 1000.0)
+        except tk.TclError:
+            pass  # The slider is mid-edit; keep the previous settings
+
     def start_animation(self):
         if not self.running:
             self.running = True
-            self.advance_frame_loop()
+            self.producer.start()
+            if self._ui_after_id is None:
+                self._ui_after_id = self.root.after(UI_POLL_MS, self._drain_ui_frames)
 
-    def pause_animation(self):
+    def _stop_producer(self):
         self.running = False
+        self.producer.stop()
+        clock = self.producer.clock
+        if clock.ticks:
+            print(f"[Producer] {clock.ticks} frames, {clock.missed} deadlines missed, "
+                  f"{self.ui_dropped_frames} frames not shown (views behind)", file=sys.stderr)
+
+    def pause_animation(self):
+        self._stop_producer()
+        if self.json_batcher is not None:
+            self.json_batcher.flush()
 
     def reset_simulation_state(self):
-        self.running = False
-        self.frame_index = 0
+        self._stop_producer()
+        self.ui_frames.clear()
+        self.frame_index = self.feed_frame_index = 0
         self._initialize_dynamic_structures()
-        self._rebuild_stream_gui_elements()
+        self._build_override_controls()
         self.animation_delay_ms.set(300)
-
-        # Reset analysis tab
-        for i in range(self.num_active_streams):
-            if i < len(self.analysis_canvases):
-                self._clear_analysis_canvases(i)
-
-        self.update_torus_plot()
-        self.update_stream_panels()
-        self.update_packet_data_tab([])
-        initial_packets_data = [{'symbol': symbols[0], 'is_overridden': False, 'stream_id': i, 'frame_index': 0} for i
-                                 in range(self.num_active_streams)]
-        self.update_gaussian_plot(initial_packets_data)
-        self.update_transmission_tab_plots()
-        self._update_explorer_polygon_visualization()
+        for title in self.built_tabs:  # Tabs not built yet pick up the state when they are
+            self._refresh_tab(title)
 
     def _update_node_flash_timers(self):
         for node in self.destination_transmission_nodes:
@@ -1130,63 +1308,115 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
             if not history:
                 continue
 
-            head_symbol, head_color, head_spin, head_u, head_v, is_overridden = history[-1]
-            symbol_info_to_transmit = (head_symbol, head_color, head_spin)
+            head = history[-1]
+            symbol_info_to_transmit = (head.symbol, head.color, head.spin)
 
             if stream_idx < len(self.destination_transmission_nodes):
                 dest_node = self.destination_transmission_nodes[stream_idx]
                 dest_node['received_symbol_trace'].appendleft(symbol_info_to_transmit)
                 dest_node['flash_timer'] = NODE_FLASH_DURATION_FRAMES
 
-    def advance_frame_loop(self):
-        if not self.running:
-            return
-
-        self.frame_index += 1
+    def produce_frame(self, missed=0):
+        """
+        Producer thread: one feed frame (packets, serialization, outputs), then hands it to the views
+        through ui_frames. Nothing here may touch Tk.
+        """
+        metrics = self.metrics
+        metrics.begin_frame(missed)
+        self.feed_frame_index += 1
+        frame_index = self.feed_frame_index
+        self._frame_generated_ns = time.monotonic_ns()
         current_frame_packets = []
-        self._update_node_flash_timers()
-
-        for i in range(self.num_active_streams):
-            override_symbol_str = self.stream_overrides[i]
-            is_overridden_flag = override_symbol_str is not None
-            u_coord, v_coord = 0, 0
-
-            if is_overridden_flag:
-                chosen_symbol_char = override_symbol_str
-                try:
-                    symbol_idx = symbols.index(chosen_symbol_char)
-                except ValueError:
-                    symbol_idx = (self.frame_index + i) % ELEMENT_COUNT
-                    chosen_symbol_char = symbols[symbol_idx]
-                chosen_color_val = colors[symbol_idx % len(colors)]
-                chosen_spin_char = spins[symbol_idx % len(spins)]
-                initial_u_offset_steps_override = i * (
-                            NUM_DISCRETE_U_STEPS // self.num_active_streams if self.num_active_streams > 0 else 0)
-                current_u_discrete_step_override = (self.frame_index + initial_u_offset_steps_override) % NUM_DISCRETE_U_STEPS
-                u_coord = current_u_discrete_step_override * (2 * np.pi / NUM_DISCRETE_U_STEPS)
-                v_coord = (((self.frame_index // ELEMENT_COUNT) * np.pi / 8) + i * (
-                            np.pi / self.num_active_streams * 0.5)) % (2 * np.pi)
+        # One read: the Tk thread swaps in a new overrides list when streams are added or retired
+        stream_overrides = self.stream_overrides
+        num_streams = len(stream_overrides)
+
+        for i in range(num_streams):
+            override_symbol_idx = stream_overrides[i]
+
+            if override_symbol_idx is not None:
+                initial_u_offset_steps_override = i * (NUM_DISCRETE_U_STEPS // num_streams if num_streams > 0 else 0)
+                current_u_discrete_step_override = (frame_index + initial_u_offset_steps_override) % NUM_DISCRETE_U_STEPS
+                u_coord = current_u_discrete_step_override * U_STEP_ANGLE
+                v_coord = (((frame_index // ELEMENT_COUNT) * math.pi / 8) + i * (
+                            math.pi / num_streams * 0.5)) % (2 * math.pi)
+                packet = Octa13Packet(i, frame_index, override_symbol_idx, override_symbol_idx,
+                                      override_symbol_idx, u_coord, v_coord, True)
             else:
-                chosen_symbol_char, chosen_color_val, chosen_spin_char, u_coord, v_coord = generate_octa13_packet_data(
-                    i, self.frame_index, self.num_active_streams)
+                packet = generate_octa13_packet(i, frame_index, num_streams)
 
-            if len(self.trace_history[i]) >= TRACE_LENGTH: self.trace_history[i].pop(0)
-            self.trace_history[i].append(
-                (chosen_symbol_char, chosen_color_val, chosen_spin_char, u_coord, v_coord, is_overridden_flag))
+            current_frame_packets.append(packet)
+        metrics.lap('generate')
 
-            packet_info = {'stream_id': i, 'symbol': chosen_symbol_char, 'color': chosen_color_val,
-                           'spin': chosen_spin_char,
-                           'u_coord': u_coord, 'v_coord': v_coord, 'is_overridden': is_overridden_flag,
-                           'frame_index': self.frame_index}
-            current_frame_packets.append(packet_info)
+        # --- Serialize once; the wire and the TCP/Binary Output tab share the result ---
+        wire_payload, is_binary = None, self._binary_mode
+        if not current_frame_packets:
+            pass  # Nothing to send; the output tab says so
+        elif is_binary and self._compact_mode:
+            # Stream entropy-coded blocks; a newly connected client needs a keyframe to start decoding
+            if self.stream_mode == 'tcp' and self.broadcaster.accepted_count != self._clients_seen_by_encoder:
+                self._clients_seen_by_encoder = self.broadcaster.accepted_count
+                self.compact_encoder.force_keyframe()
+            indexed_packets = [packet.as_tuple() for packet in current_frame_packets]
+            wire_payload = self.compact_encoder.encode_frame(frame_index, indexed_packets)
+        elif is_binary:
+            wire_payload = self._pack_binary_frame(current_frame_packets)
+        else:
+            wire_payload = self.json_serializer.serialize_frame(frame_index, current_frame_packets)
+        self._frame_serialized_ns = time.monotonic_ns()
+        metrics.lap('serialize')
 
-        self._process_direct_stream_transmissions()
+        # --- Stream the data out ---
+        bytes_sent = 0
+        if current_frame_packets:
+            bytes_sent = self._emit_frame(wire_payload, is_binary=is_binary)
+
+            if self.shm_ring is not None:
+                self.shm_ring.publish(frame_index, wire_payload if is_binary and not self._compact_mode
+                                      else self._pack_binary_frame(current_frame_packets))
+        metrics.lap('emit')
+
+        self.ui_frames.append((frame_index, current_frame_packets, wire_payload, is_binary))
+        metrics.end_frame(bytes_sent)
+
+    def _drain_ui_frames(self):
+        """Tk thread: takes in every frame produced since the last call and redraws once for the newest."""
+        self._ui_after_id = None
+        frames = []
+        while self.ui_frames:
+            frames.append(self.ui_frames.popleft())
+        if frames:
+            self._show_frames(frames)
+        if self.running:
+            self._ui_after_id = self.root.after(UI_POLL_MS, self._drain_ui_frames)
+
+    def _show_frames(self, frames):
+        metrics = self.metrics
+        metrics.mark()
+        for frame_index, packets, wire_payload, is_binary in frames:
+            if frame_index > self.frame_index + 1:
+                self.ui_dropped_frames += frame_index - self.frame_index - 1  # Pushed out of the full queue
+            self.frame_index = frame_index
+            self._update_node_flash_timers()
+            for packet in packets:
+                if packet.stream_id < len(self.trace_history):  # Produced before its stream was retired
+                    self.trace_history[packet.stream_id].append(packet)
+            self._process_direct_stream_transmissions()
+        metrics.lap('trace')
+        # The logs keep every frame; they draw only their visible rows, and only while their tab is shown
+        for frame_index, packets, wire_payload, is_binary in frames:
+            self.update_packet_data_tab(packets)
+            self.update_tcp_output_tab(packets, wire_payload, is_binary)
+        metrics.lap('packet_data')
+        latest_packets = frames[-1][1]  # The views show the newest frame
 
         # --- Update all visual tabs ---
         self.update_torus_plot()
+        metrics.lap('torus')
         self.update_stream_panels()
-        self.update_gaussian_plot(current_frame_packets)
-        self.update_packet_data_tab(current_frame_packets)
+        metrics.lap('stream_panels')
+        self.update_gaussian_plot(latest_packets)
+        metrics.lap('gaussian')
 
         # Update tabs only if they are potentially visible
         try:
@@ -1194,52 +1424,16 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
                 current_tab_index = self.notebook.index(self.notebook.select())
                 if current_tab_index == 3:  # Toroid Transmission
                     self.update_transmission_tab_plots()
-                elif current_tab_index == 4: # TCP/Binary Output
-                    self.update_tcp_output_tab(current_frame_packets)
                 elif current_tab_index == 8:  # Polygon Analysis
                     self.update_polygon_analysis_tab()
 
         except (tk.TclError, IndexError):
             pass  # Handle cases where notebook/tab might not exist during shutdown
-
-        # --- Stream the data out ---
-        if current_frame_packets:
-            if self.binary_stream_mode.get():
-                # Create and stream binary data
-                binary_packets = b''
-                for packet in current_frame_packets:
-                    symbol_idx = symbols.index(packet['symbol'])
-                    color_idx = colors.index(packet['color'])
-                    spin_idx = spins.index(packet['spin'])
-                    status_flags = 1 if packet['is_overridden'] else 0
-                    
-                    # Pack the data into a binary format
-                    # < = little-endian, I = unsigned int (4), B = unsigned char (1), f = float (4), x = padding
-                    binary_packets += struct.pack('<IBBBBffB3x', 
-                                                 packet['frame_index'],
-                                                 packet['stream_id'],
-                                                 symbol_idx,
-                                                 color_idx,
-                                                 spin_idx,
-                                                 packet['u_coord'],
-                                                 packet['v_coord'],
-                                                 status_flags)
-                if self.stream_mode == 'tcp':
-                    self.broadcast_data(binary_packets, is_binary=True)
-
-            else:
-                # Stream JSON data
-                json_output = json.dumps({'frame': self.frame_index, 'packets': current_frame_packets})
-                if self.stream_mode == 'stdout':
-                    print(json_output)
-                    sys.stdout.flush()
-                elif self.stream_mode == 'tcp':
-                    self.broadcast_data(json_output, is_binary=False)
-
-
-        self.root.after(self.animation_delay_ms.get(), self.advance_frame_loop)
+        metrics.lap('tab')
 
     def update_torus_plot(self):
+        if 'Visualizer' not in self.built_tabs:
+            return
         self.ax_torus.clear()
         elev = 25 + 10 * np.sin(self.frame_index * np.pi / 90)
         azim = (self.frame_index * 2) % 360
@@ -1255,9 +1449,9 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
         self._draw_stream_head_polygon(self.ax_torus)
 
         for i in range(self.num_active_streams):
-            for idx, (symbol_char, color_val, spin_char, u_pos, v_pos, is_overridden) in enumerate(
-                    self.trace_history[i]):
-                x_sym, y_sym, z_sym = torus_coords(u_pos, v_pos, R_TORUS, r_TORUS)
+            for idx, packet in enumerate(self.trace_history[i]):
+                symbol_char, color_val, is_overridden = packet.symbol, packet.color, packet.is_overridden
+                x_sym, y_sym, z_sym = torus_coords(packet.u_coord, packet.v_coord, R_TORUS, r_TORUS)
                 is_head = (idx == len(self.trace_history[i]) - 1)
                 base_size = 40
                 size = base_size * 2 if is_head else base_size
@@ -1280,36 +1474,36 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
         self.canvas_torus_widget.draw()
 
     def update_stream_panels(self):
+        if 'Visualizer' not in self.built_tabs:
+            return
         for i in range(self.num_active_streams):
             current_history_len = len(self.trace_history[i])
             for j in range(TRACE_LENGTH):
                 if i < len(self.stream_labels_in_panel) and j < len(self.stream_labels_in_panel[i]):
                     if j < current_history_len:
-                        sym, col_val, spn, _, _, is_overridden = self.trace_history[i][current_history_len - 1 - j]
-                        panel_text = f"{sym}{'(OVR)' if is_overridden else ''} {spn}"
-                        self.stream_labels_in_panel[i][j].config(text=panel_text, fg=col_val)
+                        packet = self.trace_history[i][current_history_len - 1 - j]
+                        panel_text = f"{packet.symbol}{'(OVR)' if packet.is_overridden else ''} {packet.spin}"
+                        self.stream_labels_in_panel[i][j].config(text=panel_text, fg=packet.color)
                     else:
                         self.stream_labels_in_panel[i][j].config(text="-", fg="white")
 
     def update_gaussian_plot(self, current_packets_data):
+        if 'Visualizer' not in self.built_tabs:
+            return
         self.ax_gaussian.clear()
         X_gauss = np.linspace(-3, 3, 50)
         Y_gauss = np.linspace(-3, 3, 50)
         X_gauss, Y_gauss = np.meshgrid(X_gauss, Y_gauss)
         Z_gauss = np.zeros_like(X_gauss)
         for packet_data in current_packets_data:
-            stream_id = packet_data['stream_id']
-            is_overridden = packet_data['is_overridden']
-            frame_idx = packet_data['frame_index']
+            stream_id = packet_data.stream_id
+            is_overridden = packet_data.is_overridden
+            frame_idx = packet_data.frame_index
             amplitude_multiplier = 1.8 if is_overridden else 1.0
             angle_offset = stream_id * (2 * np.pi / self.num_active_streams) if self.num_active_streams > 0 else 0
             center_x = 1.5 * np.cos(frame_idx * 0.05 + angle_offset)
             center_y = 1.5 * np.sin(frame_idx * 0.05 + angle_offset)
-            try:
-                symbol_idx = symbols.index(packet_data['symbol'])
-                perturb_factor = (symbol_idx - ELEMENT_COUNT / 2) * 0.1
-            except ValueError:
-                perturb_factor = 0
+            perturb_factor = (packet_data.symbol_idx - ELEMENT_COUNT / 2) * 0.1
             sigma = 0.8
             Z_i = amplitude_multiplier * np.exp(-(((X_gauss - (center_x + perturb_factor)) ** 2 / (2 * sigma ** 2)) + \
                                                  ((Y_gauss - (
@@ -1324,55 +1518,20 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
         self.canvas_gaussian_widget.draw()
 
     def update_packet_data_tab(self, current_frame_packets):
-        self.packet_data_text.config(state=tk.NORMAL)
-        self.packet_data_text.delete('1.0', tk.END)
-        if not current_frame_packets:
-            self.packet_data_text.insert(tk.END, "No packet data generated yet for this frame.")
-        else:
-            header = f"Frame: {self.frame_index}\n" + "=" * 40 + "\n"
-            self.packet_data_text.insert(tk.END, header)
-            for packet in current_frame_packets:
-                data_str = (f"Stream ID:      {packet['stream_id'] + 1}\n"
-                            f"  Symbol:         {packet['symbol']}\n"
-                            f"  Color:          {packet['color']}\n"
-                            f"  Spin:           {packet['spin']}\n"
-                            f"  U-Coord:        {packet['u_coord']:.4f}\n"
-                            f"  V-Coord:        {packet['v_coord']:.4f}\n"
-                            f"  Overridden:     {packet['is_overridden']}\n"
-                            f"-" * 40 + "\n")
-                self.packet_data_text.insert(tk.END, data_str)
-        self.packet_data_text.config(state=tk.DISABLED)
-
-    def update_tcp_output_tab(self, current_frame_packets):
-        self.tcp_output_text.config(state=tk.NORMAL)
-        self.tcp_output_text.delete('1.0', tk.END)
-        if not current_frame_packets:
-            self.tcp_output_text.insert(tk.END, "No packet data generated for this frame.")
-        else:
-            if self.binary_stream_mode.get():
-                header = f"--- FRAME {self.frame_index}: BINARY STREAM (showing hex representation) ---\n"
-                self.tcp_output_text.insert(tk.END, header)
-                binary_packets = b''
-                for packet in current_frame_packets:
-                    symbol_idx = symbols.index(packet['symbol'])
-                    color_idx = colors.index(packet['color'])
-                    spin_idx = spins.index(packet['spin'])
-                    status_flags = 1 if packet['is_overridden'] else 0
-                    
-                    binary_packets += struct.pack('<IBBBBffB3x', 
-                                                 packet['frame_index'], packet['stream_id'],
-                                                 symbol_idx, color_idx, spin_idx,
-                                                 packet['u_coord'], packet['v_coord'], status_flags)
-                # Show hex representation for visualization
-                hex_representation = binary_packets.hex(' ')
-                self.tcp_output_text.insert(tk.END, hex_representation)
-            else:
-                header = f"--- FRAME {self.frame_index}: JSON STREAM ---\n"
-                self.tcp_output_text.insert(tk.END, header)
-                json_output = json.dumps({'frame': self.frame_index, 'packets': current_frame_packets}, indent=2)
-                self.tcp_output_text.insert(tk.END, json_output)
+        """Appends the frame's packets to the packet log; rows are formatted only when on screen."""
+        if 'Packet Data' not in self.built_tabs:
+            return
+        self.packet_log.extend(current_frame_packets)
 
-        self.tcp_output_text.config(state=tk.DISABLED)
+    def update_tcp_output_tab(self, current_frame_packets, wire_payload, is_binary):
+        """Appends the frame exactly as serialized for the wire (no second serialization) to the output log."""
+        if 'TCP/Binary Output' not in self.built_tabs or not current_frame_packets:
+            return
+        self.wire_log.extend(((current_frame_packets[0].frame_index, wire_payload, is_binary),))
+
+    def _pack_binary_frame(self, current_frame_packets):
+        """Packs a frame's packets into consecutive 20-byte records (octa13_protocol.PACKET_RECORD)."""
+        return b''.join([packet.to_record() for packet in current_frame_packets])
 
     def _draw_torus_base_and_nodes(self, ax, nodes_list, elev, azim, is_destination_torus=False):
         ax.clear()
@@ -1409,6 +1568,8 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
         ax.axis("off")
 
     def update_transmission_tab_plots(self):
+        if 'Toroid Transmission' not in self.built_tabs:
+            return
         elev = 25 + 10 * np.sin(self.frame_index * np.pi / 120)
         azim_source = (self.frame_index * 1.5) % 360
         azim_dest = (self.frame_index * 1.5 + 10) % 360
@@ -1423,9 +1584,9 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
                                           edgecolor='#333333', linewidth=0.2)
 
         for i in range(self.num_active_streams):
-            for idx, (symbol_char, color_val, spin_char, u_pos, v_pos, is_overridden) in enumerate(
-                    self.trace_history[i]):
-                x_sym, y_sym, z_sym = torus_coords(u_pos, v_pos, R_TORUS, r_TORUS)
+            for idx, packet in enumerate(self.trace_history[i]):
+                symbol_char, color_val, is_overridden = packet.symbol, packet.color, packet.is_overridden
+                x_sym, y_sym, z_sym = torus_coords(packet.u_coord, packet.v_coord, R_TORUS, r_TORUS)
                 is_head = (idx == len(self.trace_history[i]) - 1)
 
                 base_size = 30
@@ -1464,8 +1625,8 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
         for i in range(self.num_active_streams):
             if self.trace_history[i]:
                 # Get the head of the trace
-                *_, u_pos, v_pos, _ = self.trace_history[i][-1]
-                x_sym, y_sym, z_sym = torus_coords(u_pos, v_pos, R_TORUS, r_TORUS)
+                head = self.trace_history[i][-1]
+                x_sym, y_sym, z_sym = torus_coords(head.u_coord, head.v_coord, R_TORUS, r_TORUS)
                 vertices.append((x_sym, y_sym, z_sym))
 
         if len(vertices) >= 3:
@@ -1546,13 +1707,14 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
 
     def update_polygon_analysis_tab(self):
         """Processes the head of each stream for the analysis windows."""
+        if 'Stream Polygon Analysis' not in self.built_tabs:
+            return
         for i in range(self.num_active_streams):
             if i < len(self.trace_history) and self.trace_history[i] and i < len(self.analysis_canvases):
-                packet_data = self.trace_history[i][-1]  # Get head packet
-                symbol_char, color_val, *_ = packet_data
+                packet = self.trace_history[i][-1]  # Get head packet
 
                 # Render symbol to an image array
-                symbol_img = self._render_symbol_to_array(symbol_char, color_val)
+                symbol_img = self._render_symbol_to_array(packet.symbol, packet.color)
                 self._update_analysis_canvas(i, "Vertex Symbol", symbol_img)
 
                 # Run conceptual VQ-VAE
@@ -1705,62 +1867,147 @@ The Octa13 symbolic protocol, by integrating these ideas, aims for a system that
     
     # --- TCP Server Methods for Data Streaming ---
     def start_tcp_server(self, host, port):
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        try:
-            self.server_socket.bind((host, port))
-            self.server_socket.listen(5)
-            print(f"[TCP Server] Listening for connections on {host}:{port}")
-            thread = threading.Thread(target=self.accept_clients, daemon=True)
-            thread.start()
-        except OSError as e:
-            print(f"[TCP Server] Error starting server: {e}")
+        if not self.broadcaster.start(host, port):
             self.stream_mode = None # Disable streaming if server fails
 
-    def accept_clients(self):
-        while True:
-            try:
-                client_socket, addr = self.server_socket.accept()
-                print(f"[TCP Server] Accepted connection from {addr}")
-                with self.lock:
-                    self.client_sockets.append(client_socket)
-            except OSError:
-                break # Socket was likely closed
-
     def broadcast_data(self, data, is_binary=False):
-        with self.lock:
-            dead_sockets = []
-            
-            # For JSON, append a newline. For binary, the structure is fixed-size, so no delimiter is needed.
-            message = data if is_binary else data.encode('utf-8') + b'\n'
+        # For JSON, append a newline. For binary, the structure is fixed-size, so no delimiter is needed.
+        message = data if is_binary else data.encode('utf-8') + b'\n'
+        self.broadcaster.broadcast(message)
 
-            for client_socket in self.client_sockets:
-                try:
-                    client_socket.sendall(message)
-                except (socket.error, BrokenPipeError):
-                    dead_sockets.append(client_socket)
-            
-            for dead in dead_sockets:
-                print("[TCP Server] Client disconnected.")
-                self.client_sockets.remove(dead)
+    def _write_stdout(self, data):
+        sys.stdout.write(data)
+        sys.stdout.flush()
+
+    def _emit_frame(self, data, is_binary):
+        """
+        Sends one serialized frame to the configured outputs and, if enabled, the session recording.
+        Returns the feed bytes for this frame (per client, before any JSON batching).
+        """
+        bytes_sent = 0
+        if not is_binary:
+            if self.json_batcher is not None:
+                self.json_batcher.add(data + '\n')
+                bytes_sent = len(data) + 1  # The serializer escapes to ASCII
+        elif self.stream_mode == 'tcp':
+            if self.latency_header and not self._compact_mode:
+                frame = timestamped_frame(self.feed_frame_index, data, self._frame_generated_ns, self._frame_serialized_ns)
+                self.broadcaster.broadcast(frame, on_locked=stamp_sent)
+                bytes_sent = len(frame)
+            else:
+                self.broadcast_data(data, is_binary=True)
+                bytes_sent = len(data)
+
+        if self.recorder is not None or self.multicast is not None:
+            message = data if is_binary else data.encode('utf-8') + b'\n'
+            if self.multicast is not None:
+                self.multicast.publish(self.feed_frame_index, message, is_binary)
+            if self.recorder is not None:
+                self.recorder.append(self.feed_frame_index, message, is_binary)
+        return bytes_sent
 
     def shutdown_server(self):
-        if self.stream_mode == 'tcp' and self.server_socket:
-            print("[TCP Server] Shutting down.")
-            with self.lock:
-                for client in self.client_sockets:
-                    client.close()
-            self.server_socket.close()
+        if self.stream_mode == 'tcp':
+            self.broadcaster.shutdown()
 
     def on_closing(self):
+        self._stop_producer()
+        if self.json_batcher is not None:
+            self.json_batcher.flush()
         self.shutdown_server()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.shm_ring is not None:
+            self.shm_ring.close()
+        if self.multicast is not None:
+            self.multicast.close()
+        if self.metrics_reporter is not None:
+            self.metrics_reporter.close()
+            print(self.metrics.summary_line(), file=sys.stderr)
+        if self.metrics_server is not None:
+            self.metrics_server.close()
         self.root.destroy()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCTA-13 Protocol Interactive Visualizer")
+    parser.add_argument('--stdout', action='store_true', help="Stream JSON frames to stdout instead of TCP.")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--json-batch', type=int, default=1, metavar='N',
+                        help="Write JSON frames in batches of N lines (stdout and TCP).")
+    parser.add_argument('--json-flush-ms', type=float, default=None, metavar='MS',
+                        help="Flush a partial JSON batch once its oldest frame is MS milliseconds old.")
+    parser.add_argument('--record', metavar='DIR', default=None,
+                        help="Append every transmitted frame to a recording in DIR (replay with octa13_recorder.py).")
+    parser.add_argument('--ledger', action='store_true',
+                        help="Hash-chain the recorded frames for tamper evidence (requires --record).")
+    parser.add_argument('--ledger-key-file', metavar='PATH', default=None,
+                        help="Key the ledger chain (HMAC-SHA-256) with the contents of PATH.")
+    parser.add_argument('--shm', metavar='NAME', default=None,
+                        help="Also publish binary frames into a shared-memory ring for local readers (octa13_shm.py).")
+    parser.add_argument('--multicast', metavar='GROUP:PORT', default=None,
+                        help="Also publish every frame to a UDP multicast group (receive with octa13_multicast.py).")
+    parser.add_argument('--multicast-iface', default='127.0.0.1',
+                        help="Local interface address used for multicast (default: loopback).")
+    parser.add_argument('--latency-header', action='store_true',
+                        help="Prefix binary TCP frames with send timestamps (measure with octa13_latency.py).")
+    parser.add_argument('--metrics-port', type=int, default=None, metavar='PORT',
+                        help="Serve frame-loop metrics in Prometheus text format on http://127.0.0.1:PORT/metrics.")
+    parser.add_argument('--metrics-summary', type=float, default=None, metavar='SEC',
+                        help="Print a frame-loop metrics summary to stderr every SEC seconds (useful with --stdout).")
+    parser.add_argument('--play', action='store_true',
+                        help="Start producing frames right away instead of waiting for the Play button.")
+    parser.add_argument('--streams', type=int, default=None, metavar='N',
+                        help=f"Active streams. Above {MAX_GUI_STREAMS} there is no window: frames are generated "
+                             "across worker processes (octa13_sharding.py) and sent as binary TCP frames and/or "
+                             "to --shm, without per-stream overrides.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"Worker processes for more than {MAX_GUI_STREAMS} streams (default: CPU count).")
+    parser.add_argument('--period-ms', type=int, default=None, metavar='MS',
+                        help=f"Frame period (the Cycle Freq slider; {DEFAULT_FRAME_PERIOD_MS} ms by default).")
+    args = parser.parse_args()
+    if args.ledger and not args.record:
+        parser.error("--ledger requires --record DIR")
+    if args.streams is not None and args.streams < 1:
+        parser.error("--streams must be at least 1")
+    if args.streams is not None and args.streams > MAX_GUI_STREAMS:
+        # Too many streams to draw or to generate on the Tk thread: hand the feed to the sharded engine
+        headless_unsupported = (('--stdout', args.stdout), ('--record', args.record), ('--multicast', args.multicast),
+                                ('--latency-header', args.latency_header), ('--json-batch', args.json_batch != 1),
+                                ('--json-flush-ms', args.json_flush_ms), ('--metrics-port', args.metrics_port is not None),
+                                ('--metrics-summary', args.metrics_summary))
+        unsupported = [flag for flag, used in headless_unsupported if used]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} not available above {MAX_GUI_STREAMS} streams "
+                         "(the sharded feed sends binary frames over TCP and --shm only)")
+        period_ms = DEFAULT_FRAME_PERIOD_MS if args.period_ms is None else args.period_ms
+        sys.exit(run_sharded_feed(args.streams, args.workers, host=args.host, port=args.port, shm_name=args.shm,
+                                  period=period_ms / 1000.0))
+    ledger_key = None
+    if args.ledger_key_file:
+        with open(args.ledger_key_file, 'rb') as key_file:
+            ledger_key = key_file.read().strip()
+
+    # Accept feed clients before the window and its plotting libraries come up
+    broadcaster = None
+    if not args.stdout:
+        broadcaster = TCPBroadcaster()
+        broadcaster.start(args.host, args.port)
+
     root = tk.Tk()
-    # To run with TCP streaming (default):
-    app = OCTA13Visualizer(root, stream_mode='tcp', host='localhost', port=9999)
-    # To run with stdout streaming, change the line above to:
-    # app = OCTA13Visualizer(root, stream_mode='stdout')
+    app = OCTA13Visualizer(root, stream_mode='stdout' if args.stdout else 'tcp', host=args.host, port=args.port,
+                           record_dir=args.record, shm_name=args.shm, multicast=args.multicast,
+                           multicast_iface=args.multicast_iface, json_batch_frames=args.json_batch,
+                           json_flush_interval=args.json_flush_ms / 1000.0 if args.json_flush_ms else None,
+                           ledger=args.ledger, ledger_key=ledger_key, latency_header=args.latency_header,
+                           metrics_port=args.metrics_port, metrics_interval=args.metrics_summary,
+                           broadcaster=broadcaster)
+    if args.streams is not None:
+        app.num_streams_var.set(args.streams)
+        app.apply_stream_count()
+    if args.period_ms is not None:
+        app.animation_delay_ms.set(args.period_ms)
+    if args.play:
+        app.start_animation()
     root.mainloop()
@@ -0,0 +1,439 @@
+"""
+Headless benchmark suite for the Octa13 pipeline, with machine-readable results.
+
+Cases (frame cases run at every --streams count, views at every --view-streams count):
+    generate           generate_octa13_packet for every stream of one frame
+    generate_tuples    generate_octa13_packet_data, the (symbol, color, spin, u, v) form
+    encode_binary      20-byte records, as the simulator's _pack_binary_frame
+    encode_json        NDJSONFrameSerializer.serialize_frame
+    encode_compact     CompactStreamEncoder.encode_frame
+    decode_*           the receiver's feed decoders on a block of DECODE_BLOCK_FRAMES frames
+    tcp_broadcast      TCPBroadcaster.broadcast of a binary frame, until every loopback client has it
+    payload_encode     periods_to_phases on ~PAYLOAD_BYTES of whole periods (octa13_payload.py)
+    payload_decode     phases_to_periods, the inverse
+    glyph_pack         pack_glyphs + glyph_bytes for batches of --grids 8x8 grids (Visualization/octa13_glyphs.py)
+    glyph_check        check_glyphs + failure_bitmap on batches of --grids 8x8 grids (Visualization/octa13_verify.py)
+    glyph_sync         GlyphSync.feed of a raw, sigil-framed stream of SYNC_GRIDS grids joined mid-glyph
+    glyph_hunt         GlyphSync.feed of random bytes of the same size: hunting that never locks
+    cube_export        export_cube of one grid to JSON, CSV and BIN
+    view_*             the simulator's matplotlib views (torus, gaussian, transmission) rendered on Agg canvases
+
+Each case is timed like timeit: calls are batched until a round takes --min-time seconds, and the
+best of --repeat rounds is reported next to the median. --output writes the results plus the commit,
+interpreter and library versions as JSON; --compare BASELINE.json lists cases slower than the
+baseline by more than --threshold and exits with status 1, so upgrades can be gated on it.
+
+Usage:
+    python octa13_bench.py --output bench.json
+    python octa13_bench.py --streams 4 1024 --only encode decode
+    python octa13_bench.py --compare bench.json --threshold 0.15
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import selectors
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from octa13_protocol import generate_octa13_packet, generate_octa13_packet_data
+from octa13_ndjson import NDJSONFrameSerializer
+from octa13_codec import CompactStreamEncoder
+from octa13_receiver import BinaryFeedDecoder, JSONFeedDecoder, CompactFeedDecoder
+from octa13_transport import TCPBroadcaster
+from octa13_payload import PERIOD_STREAM_BYTES, periods_to_phases, phases_to_periods
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, os.pardir, 'Visualization'))
+from octa13_glyphs import NOD_SYMBOLS, pack_glyphs, glyph_bytes, export_cube  # noqa: E402
+from octa13_sync import GlyphSync, glyph_stream_bytes, sigil_framed  # noqa: E402
+from octa13_verify import check_glyphs, failure_bitmap  # noqa: E402
+
+SIMULATOR_PATH = os.path.join(_HERE, 'Symbolic TCP Simulator.py')
+DECODE_BLOCK_FRAMES = 64
+FRAME_CYCLE = 256  # Distinct pre-generated frames the encoders cycle through
+PAYLOAD_BYTES = 1 << 22  # Payload per payload_* call, rounded down to whole periods (at least one)
+SYNC_GRIDS = 4096
+
+
+def _frame(streams, frame_index):
+    return [generate_octa13_packet(i, frame_index, streams) for i in range(streams)]
+
+
+def _binary(packets):
+    return b''.join([packet.to_record() for packet in packets])
+
+
+# --- Cases: each returns (call, items per call, bytes per call, cleanup or None) ---
+
+def case_generate(streams):
+    frames = itertools.count(1)
+    return (lambda: _frame(streams, next(frames))), streams, 0, None
+
+
+def case_generate_tuples(streams):
+    frames = itertools.count(1)
+
+    def call():
+        frame_index = next(frames)
+        return [generate_octa13_packet_data(i, frame_index, streams) for i in range(streams)]
+    return call, streams, 0, None
+
+
+def case_encode_binary(streams):
+    packets = _frame(streams, 1)
+    return (lambda: _binary(packets)), streams, len(_binary(packets)), None
+
+
+def case_encode_json(streams):
+    serializer = NDJSONFrameSerializer()
+    packets = _frame(streams, 1)
+    line_bytes = len(serializer.serialize_frame(1, packets)) + 1
+    return (lambda: serializer.serialize_frame(1, packets)), streams, line_bytes, None
+
+
+def case_encode_compact(streams):
+    encoder = CompactStreamEncoder()
+    cycle = [[packet.as_tuple() for packet in _frame(streams, f)] for f in range(1, FRAME_CYCLE + 1)]
+    frames = itertools.count(1)
+    sizes = []
+
+    def call():
+        frame_index = next(frames)
+        block = encoder.encode_frame(frame_index, cycle[frame_index % FRAME_CYCLE])
+        if len(sizes) < FRAME_CYCLE:
+            sizes.append(len(block))
+        return block
+    call()
+    return call, streams, float(np.mean(sizes)), None
+
+
+def _decode_case(streams, make_decoder, encode_block):
+    block = encode_block([_frame(streams, f) for f in range(1, DECODE_BLOCK_FRAMES + 1)])
+    return (lambda: make_decoder().decode(block)), streams * DECODE_BLOCK_FRAMES, len(block), None
+
+
+def case_decode_binary(streams):
+    return _decode_case(streams, BinaryFeedDecoder, lambda frames: b''.join(_binary(p) for p in frames))
+
+
+def case_decode_json(streams):
+    serializer = NDJSONFrameSerializer()
+    return _decode_case(streams, JSONFeedDecoder, lambda frames: b''.join(
+        (serializer.serialize_frame(f, p) + '\n').encode('utf-8') for f, p in enumerate(frames, 1)))
+
+
+def case_decode_compact(streams):
+    encoder = CompactStreamEncoder()
+    return _decode_case(streams, CompactFeedDecoder, lambda frames: b''.join(
+        encoder.encode_frame(f, [packet.as_tuple() for packet in p]) for f, p in enumerate(frames, 1)))
+
+
+def case_tcp_broadcast(streams, clients):
+    """One binary frame to `clients` loopback readers; a call returns once all of them have it."""
+    broadcaster = TCPBroadcaster(verbose=False)
+    broadcaster.start('127.0.0.1', 0)
+    port = broadcaster.server_socket.getsockname()[1]
+    sockets = [socket.create_connection(('127.0.0.1', port)) for _ in range(clients)]
+    while broadcaster.client_count < clients:
+        time.sleep(0.001)
+    selector = selectors.DefaultSelector()
+    for sock in sockets:
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+    state = {'received': 0, 'target': 0, 'stop': False}
+    delivered = threading.Event()
+
+    def reader():
+        while not state['stop']:
+            for key, _ in selector.select(0.1):
+                try:
+                    state['received'] += len(key.fileobj.recv(1 << 20))
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    return
+            if state['received'] >= state['target']:
+                delivered.set()
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    frame = _binary(_frame(streams, 1))
+
+    def call():
+        delivered.clear()
+        state['target'] += len(frame) * clients
+        broadcaster.broadcast(frame)
+        if not delivered.wait(10):
+            raise RuntimeError("Loopback clients stopped receiving.")
+
+    def cleanup():
+        state['stop'] = True
+        thread.join()
+        for sock in sockets:
+            sock.close()
+        broadcaster.shutdown()
+    return call, streams * clients, len(frame) * clients, cleanup
+
+
+def _payload(streams):
+    period = PERIOD_STREAM_BYTES * streams
+    size = max(1, PAYLOAD_BYTES // period) * period
+    return np.frombuffer(os.urandom(size), dtype=np.uint8)
+
+
+def case_payload_encode(streams):
+    data = _payload(streams)
+    return (lambda: periods_to_phases(data, streams)), len(data), len(data), None
+
+
+def case_payload_decode(streams):
+    data = _payload(streams)
+    phases = periods_to_phases(data, streams)
+    return (lambda: phases_to_periods(phases)), len(data), len(data), None
+
+
+def case_glyph_pack(grids):
+    batch = np.random.default_rng(13).integers(0, 8, size=(grids, 8, 8))
+    return (lambda: glyph_bytes(pack_glyphs(batch))), grids * 64, len(glyph_bytes(pack_glyphs(batch))), None
+
+
+def case_glyph_check(grids):
+    batch = pack_glyphs(np.random.default_rng(13).integers(0, 8, size=(grids, 8, 8)))
+    return (lambda: failure_bitmap(check_glyphs(batch))), batch.size, batch.size * 2, None
+
+
+def case_glyph_sync():
+    glyphs = sigil_framed(np.random.default_rng(13).integers(0, 8, size=(SYNC_GRIDS, 8, 8)))
+    stream = glyph_stream_bytes(glyphs)[1:]  # Joins 8 bits in: alignment has to be acquired first
+    return (lambda: GlyphSync().feed(stream)), len(glyphs), len(stream), None
+
+
+def case_glyph_hunt():
+    size = SYNC_GRIDS * 65 * 13 // 8  # glyph_sync's stream: a sigil and 64 glyphs of 13 bits per grid
+    noise = np.random.default_rng(13).integers(0, 256, size=size, dtype=np.uint8).tobytes()
+    return (lambda: GlyphSync().feed(noise)), size * 8, size, None  # Items: bit positions tested
+
+
+def case_cube_export():
+    scratch = tempfile.TemporaryDirectory()
+    grid = np.random.default_rng(13).integers(0, 8, size=(8, 8))
+    path = os.path.join(scratch.name, 'cube.octa13')
+    export_cube(grid, path, NOD_SYMBOLS)
+    size = sum(os.path.getsize(path.replace('.octa13', ext)) for ext in ('.json', '.csv', '.bin'))
+    return (lambda: export_cube(grid, path, NOD_SYMBOLS)), 512, size, scratch.cleanup
+
+
+# --- Simulator views on Agg canvases ---
+
+class _Value:
+    """Stands in for the Tk variables the view code reads."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+def load_simulator():
+    """The simulator module, or None if it cannot be imported here (e.g. no Tk)."""
+    try:
+        spec = importlib.util.spec_from_file_location('octa13_simulator', SIMULATOR_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    except ImportError as e:
+        print(f"[Bench] Skipping view cases: {e}")
+        return None
+
+
+def view_host(simulator, streams):
+    """An OCTA13Visualizer with full traces whose figures render on Agg canvases (sized as in the GUI)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    simulator._load_plotting()
+    host = simulator.OCTA13Visualizer.__new__(simulator.OCTA13Visualizer)
+    host.num_streams_var, host.selected_stream_var = _Value(streams), _Value(1)
+    host.built_tabs = {'Visualizer', 'Toroid Transmission'}
+    host.frame_index = 0
+    host._initialize_dynamic_structures()
+    for name, canvas_name, size, pad in (('torus', 'canvas_torus_widget', (8, 6), 0.5),
+                                         ('gaussian', 'canvas_gaussian_widget', (6, 3.5), 0.5),
+                                         ('trans_source', 'canvas_trans_source', (6, 5), 0.2),
+                                         ('trans_dest', 'canvas_trans_dest', (6, 5), 0.2)):
+        figure = Figure(figsize=size, dpi=100, facecolor='black')
+        setattr(host, canvas_name, FigureCanvasAgg(figure))
+        setattr(host, 'ax_' + name, figure.add_subplot(111, projection='3d'))
+        figure.tight_layout(pad=pad)
+    for _ in range(simulator.TRACE_LENGTH):
+        host.frame_index += 1
+        host.last_packets = _frame(streams, host.frame_index)
+        for i, packet in enumerate(host.last_packets):
+            host.trace_history[i].append(packet)
+        host._process_direct_stream_transmissions()
+    return host
+
+
+def _view_case(simulator, streams, draw):
+    host = view_host(simulator, streams)
+
+    def call():
+        host.frame_index += 1  # Moves the camera like the running simulator
+        draw(host)
+    return call, 1, 0, None
+
+
+VIEWS = {
+    'view_torus': lambda host: host.update_torus_plot(),
+    'view_gaussian': lambda host: host.update_gaussian_plot(host.last_packets),
+    'view_transmission': lambda host: host.update_transmission_tab_plots(),
+}
+
+
+# --- Runner ---
+
+def _run(call, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        call()
+    return time.perf_counter() - start
+
+
+def time_call(call, min_time, repeat):
+    """Seconds per call for each of `repeat` rounds of at least min_time seconds."""
+    call()  # Warm-up: caches, first-call imports, socket buffers
+    number, elapsed = 1, _run(call, 1)
+    while elapsed < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+        elapsed = _run(call, number)
+    return [elapsed / number] + [_run(call, number) / number for _ in range(repeat - 1)]
+
+
+def plan(args):
+    """(name, params, factory) for every selected case."""
+    cases = []
+    for streams in args.streams:
+        for name, factory in (('generate', case_generate), ('generate_tuples', case_generate_tuples),
+                              ('encode_binary', case_encode_binary), ('encode_json', case_encode_json),
+                              ('encode_compact', case_encode_compact), ('decode_binary', case_decode_binary),
+                              ('decode_json', case_decode_json), ('decode_compact', case_decode_compact),
+                              ('payload_encode', case_payload_encode), ('payload_decode', case_payload_decode)):
+            cases.append((name, {'streams': streams}, lambda f=factory, s=streams: f(s)))
+        for clients in args.clients:
+            cases.append(('tcp_broadcast', {'streams': streams, 'clients': clients},
+                          lambda s=streams, c=clients: case_tcp_broadcast(s, c)))
+    for grids in args.grids:
+        cases.append(('glyph_pack', {'grids': grids}, lambda g=grids: case_glyph_pack(g)))
+        cases.append(('glyph_check', {'grids': grids}, lambda g=grids: case_glyph_check(g)))
+    cases.append(('glyph_sync', {}, case_glyph_sync))
+    cases.append(('glyph_hunt', {}, case_glyph_hunt))
+    cases.append(('cube_export', {}, case_cube_export))
+    if args.only:
+        cases = [case for case in cases if any(word in case[0] for word in args.only)]
+    views = [name for name in VIEWS if not args.only or any(word in name for word in args.only)]
+    simulator = load_simulator() if views else None
+    if simulator is not None:
+        for streams in args.view_streams:
+            for name in views:
+                cases.append((name, {'streams': streams},
+                              lambda s=streams, d=VIEWS[name]: _view_case(simulator, s, d)))
+    return cases
+
+
+def run(args):
+    results = []
+    for name, params, factory in plan(args):
+        call, items, nbytes, cleanup = factory()
+        try:
+            rounds = time_call(call, args.min_time, args.repeat)
+        finally:
+            if cleanup is not None:
+                cleanup()
+        best = min(rounds)
+        result = {'name': name, 'params': params, 'best_s': best, 'median_s': statistics.median(rounds),
+                  'calls_per_s': 1.0 / best, 'items_per_s': items / best,
+                  'bytes_per_s': nbytes / best if nbytes else None, 'rounds': len(rounds)}
+        results.append(result)
+        label = ' '.join(f"{k}={v}" for k, v in params.items())
+        rate = f"  {result['bytes_per_s'] / 1e6:9.1f} MB/s" if nbytes else ''
+        print(f"[Bench] {name:<18} {label:<22} {best * 1e6:12.2f} us  {result['items_per_s']:14,.0f} items/s{rate}")
+    return results
+
+
+def environment():
+    def git(*command):
+        try:
+            return subprocess.run(('git',) + command, cwd=_HERE, capture_output=True, text=True,
+                                  timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+    import matplotlib
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'matplotlib': matplotlib.__version__, 'platform': platform.platform(),
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def compare(results, baseline, threshold):
+    """Prints cases slower than the baseline by more than `threshold`; returns how many there were."""
+    reference = {(r['name'], json.dumps(r['params'], sort_keys=True)): r for r in baseline['results']}
+    regressions = 0
+    for result in results:
+        base = reference.get((result['name'], json.dumps(result['params'], sort_keys=True)))
+        if base is None:
+            continue
+        ratio = result['best_s'] / base['best_s']
+        if ratio > 1 + threshold:
+            regressions += 1
+            label = ' '.join(f"{k}={v}" for k, v in result['params'].items())
+            print(f"[Bench] SLOWER {result['name']} {label}: {ratio:.2f}x the baseline")
+    print(f"[Bench] {regressions} regression(s) beyond {threshold:.0%} against {baseline['environment'].get('commit')}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Octa13 generation, encoding, transport, decoding "
+                                                 "and rendering.")
+    parser.add_argument('--streams', type=int, nargs='+', default=[4, 9, 64, 1024],
+                        help="Streams per frame for the frame cases.")
+    parser.add_argument('--view-streams', type=int, nargs='+', default=[1, 4, 9],
+                        help="Streams for the view cases (the simulator's slider goes to 9).")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8], help="Loopback clients for tcp_broadcast.")
+    parser.add_argument('--grids', type=int, nargs='+', default=[1, 64, 4096], help="Grids per glyph_pack and glyph_check call.")
+    parser.add_argument('--only', nargs='+', metavar='WORD', help="Run only cases whose name contains a WORD.")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum seconds per timing round.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing rounds per case.")
+    parser.add_argument('--output', metavar='PATH', help="Write results and environment as JSON.")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON from an earlier --output run.")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Allowed slowdown against --compare before a case counts as a regression.")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    report = {'environment': environment(), 'settings': {'min_time': args.min_time, 'repeat': args.repeat},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[Bench] Wrote {len(results)} results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(results, json.load(f), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Fixed-rate frame clock and the producer thread that runs the simulator's feed on it.
+
+FixedRateClock keeps its deadlines on a grid, deadline k = anchor + k * interval on CLOCK_MONOTONIC,
+so the time spent producing a frame and any sleep overshoot are absorbed by the next wait instead
+of adding up. When a frame overruns by a whole interval or more, the deadlines that already passed
+are skipped and reported as missed rather than produced in a catch-up burst. A new interval takes
+effect from the last tick, without a jump.
+
+FrameProducer calls produce(missed) on every tick from its own thread, so the feed keeps its rate
+no matter how long the Tk thread spends redrawing.
+
+Usage:
+    python octa13_clock.py --interval-ms 50 --seconds 5 [--work-ms 10]   # tick lateness and period
+"""
+import argparse
+import threading
+import time
+
+from octa13_latency import LatencyHistogram
+
+
+class FixedRateClock:
+    def __init__(self, interval_s):
+        self.interval_ns = int(interval_s * 1e9)
+        self.ticks = 0
+        self.missed = 0
+        self.lateness = LatencyHistogram()  # How far past its deadline each tick was released
+        self._next = None
+        self._last_tick = None
+        self._anchor_interval = self.interval_ns
+
+    def set_interval(self, interval_s):
+        """May be called from any thread; the tick after next follows the new interval."""
+        self.interval_ns = max(1, int(interval_s * 1e9))
+
+    def restart(self):
+        """The next wait() ticks immediately and starts a new grid (e.g. after a pause)."""
+        self._next = self._last_tick = None
+
+    def wait(self, stop=None):
+        """
+        Sleeps until the next deadline. Returns how many deadlines were skipped since the previous
+        tick, or None if `stop` (a threading.Event) was set while waiting.
+        """
+        interval = self.interval_ns
+        now = time.monotonic_ns()
+        if self._next is None:
+            self._next = now
+        elif interval != self._anchor_interval:
+            self._next = self._last_tick + interval  # Re-anchor on the new interval
+        self._anchor_interval = interval
+        missed = 0
+        if now - self._next >= interval:
+            missed = (now - self._next) // interval
+            self._next += missed * interval
+            self.missed += missed
+        delay = self._next - now
+        if delay > 0:
+            if stop is not None:
+                if stop.wait(delay / 1e9):
+                    return None
+            else:
+                time.sleep(delay / 1e9)
+        elif stop is not None and stop.is_set():
+            return None
+        self.lateness.record_value(time.monotonic_ns() - self._next)
+        self._last_tick = self._next
+        self._next += interval
+        self.ticks += 1
+        return missed
+
+
+class FrameProducer:
+    """Runs produce(missed) on a FixedRateClock from a daemon thread between start() and stop()."""
+
+    def __init__(self, produce, interval_s, name='octa13-producer'):
+        self.produce = produce
+        self.clock = FixedRateClock(interval_s)
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.clock.restart()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stops after the frame in progress; returns once the thread has exited."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            missed = self.clock.wait(self._stop)
+            if missed is None:
+                return
+            self.produce(missed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the fixed-rate clock's tick lateness and period.")
+    parser.add_argument('--interval-ms', type=float, default=50.0)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--work-ms', type=float, default=0.0, help="Busy time per tick, to simulate frame work.")
+    args = parser.parse_args(argv)
+
+    periods = LatencyHistogram()
+    previous = [None]
+
+    def produce(missed):
+        now = time.monotonic_ns()
+        if previous[0] is not None:
+            periods.record_value(now - previous[0])
+        previous[0] = now
+        end = time.perf_counter() + args.work_ms / 1000.0
+        while time.perf_counter() < end:
+            pass
+
+    producer = FrameProducer(produce, args.interval_ms / 1000.0)
+    started = time.monotonic()
+    producer.start()
+    time.sleep(args.seconds)
+    producer.stop()
+    elapsed = time.monotonic() - started
+    clock = producer.clock
+    late, period = clock.lateness.summary(), periods.summary()
+    print(f"[Clock] {clock.ticks} ticks in {elapsed:.2f} s ({clock.ticks / elapsed:.2f}/s, "
+          f"target {1000.0 / args.interval_ms:.2f}/s), missed {clock.missed}")
+    if late['count']:
+        print(f"[Clock] lateness p50/p99/max us: {late['p50_us']:.0f}/{late['p99_us']:.0f}/{late['max_us']:.0f}")
+    if period['count']:
+        print(f"[Clock] period mean/p99 ms: {period['mean_us'] / 1000:.3f}/{period['p99_us'] / 1000:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Multi-toroid cluster simulation: a ring of toroids T0 <-> T1 <-> ... <-> Tn-1, one process each.
+
+Every toroid runs its own streams (4 by default, as in the docs) and six resonance gates per stream,
+evenly spaced around the u circle. When a stream head crosses a gate, the head's glyph is sent to
+the next toroid in the ring; each toroid relays the glyphs it receives onwards until they have
+visited every toroid, so every glyph makes a full trip around the ring.
+
+Tick synchronization (lightweight, no central barrier):
+    * Phase: the coordinator hands every toroid the same CLOCK_MONOTONIC epoch and tick period;
+      tick k starts at epoch + k * period on all of them (period 0 = free-running).
+    * Causality: each tick a toroid sends one message to its right neighbour, then waits for its
+      left neighbour's message for the same tick, so T(i+1) can never be more than one tick ahead of
+      T(i), while each toroid only talks to two peers. The bound does not close around the ring:
+      T(i) may run up to i ticks ahead of T0 in the other direction, so a ring of N toroids can
+      spread over N - 1 ticks. The report gives the measured spread in ticks next to that bound.
+    * Barrier (--barrier-every K): every K ticks a token goes twice around the ring. The first lap
+      shows that every toroid has finished the tick; the second releases them. This brings the
+      whole ring back to the same tick at the cost of 2N hops, so the spread stays within
+      min(K, N - 1) ticks.
+
+Links are Unix-domain socket pairs. A tick message is a TICK_HEADER followed by GLYPH_RECORDs.
+The sockets are non-blocking and each toroid writes its message while it reads its neighbour's, so
+a tick larger than the socket buffers cannot leave the whole ring stuck in send.
+The coordinator reports per ring size: tick rate, end-to-end glyph throughput and latency (in ticks),
+tick lateness against the schedule, tick-interval jitter, cross-toroid skew per tick and how many
+ticks apart the leading and trailing toroids got.
+
+Usage:
+    python octa13_cluster.py                              # sweep 2..64 toroids, free-running
+    python octa13_cluster.py --toroids 6 --period-ms 5    # the six-toroid ring at 200 ticks/s
+    python octa13_cluster.py --barrier-every 16           # ring-wide barrier every 16 ticks
+    python octa13_cluster.py --streams 4096 --ticks 10    # the sweep with ticks far larger than a socket buffer
+"""
+import argparse
+import math
+import multiprocessing
+import select
+import signal
+import socket
+import struct
+import time
+
+import numpy as np
+
+from octa13_protocol import generate_octa13_packet
+
+STREAMS_PER_TOROID = 4
+GATES_PER_STREAM = 6
+GATE_ANGLE = 2 * math.pi / GATES_PER_STREAM
+
+# < = little-endian: tick (I), glyph count (I)
+TICK_HEADER = struct.Struct('<II')
+BARRIER_TICK = 0xFFFFFFFF  # TICK_HEADER tick of a barrier token; its count is the lap (1 or 2)
+# origin tick (I), origin toroid (H), stream (H), symbol/color/spin indices (B each), hops so far (B)
+GLYPH_RECORD = struct.Struct('<IHHBBBB')
+
+DEFAULT_SWEEP = [2, 4, 8, 16, 32, 64]
+SEND_CHUNK = 64 * 1024
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        try:
+            chunk = sock.recv(size - len(data))
+        except BlockingIOError:
+            select.select((sock,), (), ())
+            continue
+        if not chunk:
+            raise ConnectionError("Ring neighbour closed the link.")
+        data += chunk
+    return bytes(data)
+
+
+def _send_all(sock, data):
+    view = memoryview(data)
+    while view:
+        try:
+            view = view[sock.send(view[:SEND_CHUNK]):]
+        except BlockingIOError:
+            select.select((), (sock,), ())
+
+
+def _exchange(send_sock, recv_sock, message):
+    """
+    Sends `message` to the right neighbour while reading the left neighbour's tick message.
+    Returns (tick, glyph payload). Every toroid writes before it reads, so doing either one to
+    completion first would deadlock the ring as soon as a message outgrows the socket buffers.
+    """
+    view = memoryview(message)
+    data = bytearray()
+    expected = TICK_HEADER.size
+    header = None
+    while view or len(data) < expected:
+        readable, writable, _ = select.select((recv_sock,) if len(data) < expected else (),
+                                              (send_sock,) if view else (), ())
+        if writable:
+            try:
+                view = view[send_sock.send(view[:SEND_CHUNK]):]
+            except BlockingIOError:
+                pass
+        if readable:
+            try:
+                chunk = recv_sock.recv(min(expected - len(data), SEND_CHUNK))
+            except BlockingIOError:
+                continue
+            if not chunk:
+                raise ConnectionError("Ring neighbour closed the link.")
+            data += chunk
+            if header is None and len(data) >= TICK_HEADER.size:
+                header = TICK_HEADER.unpack_from(data)
+                expected = TICK_HEADER.size + header[1] * GLYPH_RECORD.size
+    return header[0], bytes(data[TICK_HEADER.size:])
+
+
+def _gate_of(u):
+    return int(u / GATE_ANGLE) % GATES_PER_STREAM
+
+
+def _barrier(toroid_index, send_sock, recv_sock):
+    """Two token laps around the ring: T0 starts each lap, every other toroid passes the token on."""
+    for lap in (1, 2):
+        if toroid_index == 0:
+            _send_all(send_sock, TICK_HEADER.pack(BARRIER_TICK, lap))
+        received = TICK_HEADER.unpack(_recv_exact(recv_sock, TICK_HEADER.size))
+        if received != (BARRIER_TICK, lap):
+            raise RuntimeError(f"T{toroid_index}: expected barrier lap {lap}, got {received}.")
+        if toroid_index != 0:
+            _send_all(send_sock, TICK_HEADER.pack(BARRIER_TICK, lap))
+
+
+def _toroid_process(toroid_index, ring_size, streams, ticks, epoch, period, barrier_every, send_sock, recv_sock,
+                    result_conn):
+    """One toroid: generate streams, emit gate glyphs, relay the left neighbour's glyphs, keep time."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The coordinator handles Ctrl+C
+    send_sock.setblocking(False)
+    recv_sock.setblocking(False)
+    tick_start = np.zeros(ticks)
+    last_gate = [None] * streams
+    relay = []  # Glyph records received last tick that still have toroids left to visit
+    emitted = delivered = latency_ticks = 0
+    for tick in range(ticks):
+        if period:
+            delay = epoch + tick * period - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        tick_start[tick] = time.monotonic()
+
+        outgoing = relay
+        frame_index = tick + toroid_index  # Toroids run phase-shifted copies of the same pattern
+        for stream_id in range(streams):
+            packet = generate_octa13_packet(stream_id, frame_index, streams)
+            gate = _gate_of(packet.u_coord)
+            if last_gate[stream_id] is not None and gate != last_gate[stream_id]:
+                outgoing.append(GLYPH_RECORD.pack(tick, toroid_index, stream_id, packet.symbol_idx,
+                                                  packet.color_idx, packet.spin_idx, 1))
+                emitted += 1
+            last_gate[stream_id] = gate
+        received_tick, payload = _exchange(send_sock, recv_sock,
+                                           TICK_HEADER.pack(tick, len(outgoing)) + b''.join(outgoing))
+        if received_tick != tick:
+            raise RuntimeError(f"T{toroid_index}: expected tick {tick} from the left neighbour, got {received_tick}.")
+        relay = []
+        for origin_tick, origin, stream_id, symbol_idx, color_idx, spin_idx, hops in GLYPH_RECORD.iter_unpack(payload):
+            if hops + 1 >= ring_size:
+                delivered += 1  # This toroid is the last one the glyph had left to visit
+                latency_ticks += tick - origin_tick
+            else:
+                relay.append(GLYPH_RECORD.pack(origin_tick, origin, stream_id, symbol_idx, color_idx, spin_idx,
+                                               hops + 1))
+        if barrier_every and (tick + 1) % barrier_every == 0:
+            _barrier(toroid_index, send_sock, recv_sock)
+
+    result_conn.send({'toroid': toroid_index, 'tick_start': tick_start, 'emitted': emitted,
+                      'delivered': delivered, 'latency_ticks': latency_ticks})
+    result_conn.close()
+    send_sock.close()
+    recv_sock.close()
+
+
+def run_cluster(ring_size, ticks, period=0.0, streams=STREAMS_PER_TOROID, start_delay=0.2, barrier_every=0):
+    """Runs one ring of `ring_size` toroid processes for `ticks` ticks and returns the measurements."""
+    if not 2 <= ring_size <= 255:
+        raise ValueError("The ring needs between 2 and 255 toroids.")
+    # links[i] carries T(i) -> T(i+1)
+    links = [socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM) for _ in range(ring_size)]
+    epoch = time.monotonic() + start_delay  # Far enough ahead that every process is up before tick 0
+    processes = []
+    result_conns = []
+    for i in range(ring_size):
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        send_sock = links[i][0]
+        recv_sock = links[i - 1][1]
+        process = multiprocessing.Process(target=_toroid_process, daemon=True,
+                                          args=(i, ring_size, streams, ticks, epoch, period, barrier_every,
+                                                send_sock, recv_sock, child_conn))
+        process.start()
+        child_conn.close()
+        processes.append(process)
+        result_conns.append(parent_conn)
+    for a, b in links:
+        a.close()
+        b.close()
+
+    try:
+        results = sorted((conn.recv() for conn in result_conns), key=lambda r: r['toroid'])
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    summary = _summarize(ring_size, ticks, period, epoch, results)
+    if barrier_every:
+        summary['spread_bound_ticks'] = min(barrier_every, ring_size - 1)
+    return summary
+
+
+def _summarize(ring_size, ticks, period, epoch, results):
+    starts = np.vstack([r['tick_start'] for r in results])  # (toroid, tick)
+    elapsed = starts[:, -1].max() - starts[:, 0].min()
+    intervals = np.diff(starts, axis=1)
+    skew = starts.max(axis=0) - starts.min(axis=0)
+    # When the last toroid starts tick k, the tick the leading one has reached, minus k
+    last_start = starts.max(axis=0)
+    reached = np.vstack([np.searchsorted(row, last_start, side='right') - 1 for row in starts])
+    spread = reached.max(axis=0) - np.arange(ticks)
+    delivered = sum(r['delivered'] for r in results)
+    summary = {
+        'toroids': ring_size,
+        'ticks': ticks,
+        'tick_rate': (ticks - 1) / elapsed if elapsed > 0 else float('inf'),
+        'glyphs_emitted': sum(r['emitted'] for r in results),
+        'glyphs_delivered': delivered,
+        'glyph_rate': delivered / elapsed if elapsed > 0 else float('inf'),
+        'latency_ticks': sum(r['latency_ticks'] for r in results) / delivered if delivered else 0.0,
+        'interval_jitter_us': float(intervals.std() * 1e6),
+        'skew_p50_us': float(np.percentile(skew, 50) * 1e6),
+        'skew_p99_us': float(np.percentile(skew, 99) * 1e6),
+        'skew_max_us': float(skew.max() * 1e6),
+        'spread_max_ticks': int(spread.max()),
+        'spread_bound_ticks': ring_size - 1,
+    }
+    if period:
+        lateness = starts - (epoch + np.arange(ticks) * period)
+        summary['late_p50_us'] = float(np.percentile(lateness, 50) * 1e6)
+        summary['late_p99_us'] = float(np.percentile(lateness, 99) * 1e6)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a ring of Octa13 toroids, one process per toroid.")
+    parser.add_argument('--toroids', type=int, nargs='+', default=DEFAULT_SWEEP, help="Ring sizes to run.")
+    parser.add_argument('--ticks', type=int, default=1000, help="Ticks per run.")
+    parser.add_argument('--period-ms', type=float, default=0.0,
+                        help="Tick period in milliseconds (0 = free-running, paced only by the ring).")
+    parser.add_argument('--streams', type=int, default=STREAMS_PER_TOROID, help="Streams per toroid.")
+    parser.add_argument('--barrier-every', type=int, default=0,
+                        help="Realign the whole ring with a token barrier every this many ticks (0 = never).")
+    args = parser.parse_args(argv)
+
+    period = args.period_ms / 1000.0
+    print(f"[Cluster] {args.ticks} ticks per run, {args.streams} streams per toroid, "
+          f"{'free-running' if not period else f'{args.period_ms} ms period'}"
+          f"{f', barrier every {args.barrier_every} ticks' if args.barrier_every else ''}")
+    try:
+        for ring_size in args.toroids:
+            s = run_cluster(ring_size, args.ticks, period, args.streams, barrier_every=args.barrier_every)
+            line = (f"[Cluster] T0..T{ring_size - 1:<3d} {s['tick_rate']:9.1f} ticks/s  {s['glyph_rate']:10.1f} glyphs/s"
+                    f"  latency {s['latency_ticks']:5.1f} ticks  jitter {s['interval_jitter_us']:8.1f} us"
+                    f"  skew p50/p99/max {s['skew_p50_us']:.0f}/{s['skew_p99_us']:.0f}/{s['skew_max_us']:.0f} us"
+                    f"  spread {s['spread_max_ticks']}/{s['spread_bound_ticks']} ticks")
+            if period:
+                line += f"  late p50/p99 {s['late_p50_us']:.0f}/{s['late_p99_us']:.0f} us"
+            print(line)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
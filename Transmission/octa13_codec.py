@@ -0,0 +1,487 @@
+"""
+Compact Octa13 stream formats.
+
+Two formats are provided, both carrying the same information as the 20-byte binary record
+(stream id, symbol/color/spin indices, u/v and the override flag):
+
+* Bit-packed (`pack_frame` / `unpack_frame`): stateless, fixed-width fields. Each packet is
+  3+3+3 index bits, u and v quantized to lattice levels, and one flag bit.
+* Entropy-coded (`CompactStreamEncoder` / `CompactStreamDecoder`): an adaptive binary range
+  coder (LZMA-style) over per-stream prediction residuals. Symbols advance by one per frame and
+  colors/spins follow their symbol, so on the generated feed almost every field is predicted and
+  a frame costs a few bytes regardless of its size in the other formats.
+
+u is quantized to NUM_DISCRETE_U_STEPS * u_substeps levels and v to v_levels levels around the
+torus; both are lossy by at most half a level (pi / levels radians).
+
+Entropy-coded block layout on the wire:
+    varint(body_length << 1 | keyframe) + range-coded body
+Models are reset at every keyframe, so a decoder joining mid-stream skips blocks until the
+next keyframe. Each block is flushed on its own so frames decode as soon as they arrive.
+
+Usage:
+    python octa13_codec.py --streams 4 --frames 2000    # compare stream sizes per format
+"""
+import argparse
+import json
+import math
+
+from octa13_protocol import (symbols, colors, spins, ELEMENT_COUNT, NUM_DISCRETE_U_STEPS, PACKET_RECORD,
+                             STATUS_OVERRIDDEN, generate_octa13_packet_data)
+
+TWO_PI = 2 * math.pi
+DEFAULT_U_SUBSTEPS = 8
+DEFAULT_V_LEVELS = 64
+DEFAULT_KEYFRAME_INTERVAL = 256
+
+_INDEX_BITS = (ELEMENT_COUNT - 1).bit_length()
+if 1 << _INDEX_BITS != ELEMENT_COUNT:
+    raise ValueError("The compact codec requires a power-of-two symbol alphabet.")
+
+
+def _quantize(angle, levels):
+    return int(round((angle % TWO_PI) * levels / TWO_PI)) % levels
+
+
+def _dequantize(level, levels):
+    return level * TWO_PI / levels
+
+
+# --- Varints ---
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    """Returns (value, new_pos), or (None, pos) if the varint is incomplete."""
+    value = shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    return None, pos
+
+
+# --- Bit-packed format ---
+
+class _BitWriter:
+    def __init__(self):
+        self.out = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, nbits):
+        self.acc = (self.acc << nbits) | value
+        self.nbits += nbits
+        while self.nbits >= 8:
+            self.nbits -= 8
+            self.out.append((self.acc >> self.nbits) & 0xFF)
+        self.acc &= (1 << self.nbits) - 1
+
+    def getvalue(self):
+        if self.nbits:
+            return bytes(self.out) + bytes([(self.acc << (8 - self.nbits)) & 0xFF])
+        return bytes(self.out)
+
+
+class _BitReader:
+    def __init__(self, data):
+        self.value = int.from_bytes(data, 'big')
+        self.remaining = len(data) * 8
+
+    def read(self, nbits):
+        self.remaining -= nbits
+        if self.remaining < 0:
+            raise ValueError("Bit-packed frame is truncated.")
+        return (self.value >> self.remaining) & ((1 << nbits) - 1)
+
+
+def pack_frame(frame_index, packets, u_substeps=DEFAULT_U_SUBSTEPS, v_levels=DEFAULT_V_LEVELS):
+    """
+    Bit-packs one frame. `packets` are (stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden)
+    tuples. Layout: frame index (32), packet count (16), stream id width (5), then per packet
+    stream id, three 3-bit indices, u level, v level and the override bit.
+    """
+    u_levels = NUM_DISCRETE_U_STEPS * u_substeps
+    u_bits = (u_levels - 1).bit_length()
+    v_bits = (v_levels - 1).bit_length()
+    id_bits = max((p[0] for p in packets), default=0).bit_length()
+    writer = _BitWriter()
+    writer.write(frame_index, 32)
+    writer.write(len(packets), 16)
+    writer.write(id_bits, 5)
+    for stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden in packets:
+        writer.write(stream_id, id_bits)
+        writer.write(symbol_idx, _INDEX_BITS)
+        writer.write(color_idx, _INDEX_BITS)
+        writer.write(spin_idx, _INDEX_BITS)
+        writer.write(_quantize(u, u_levels), u_bits)
+        writer.write(_quantize(v, v_levels), v_bits)
+        writer.write(1 if is_overridden else 0, 1)
+    return writer.getvalue()
+
+
+def unpack_frame(data, u_substeps=DEFAULT_U_SUBSTEPS, v_levels=DEFAULT_V_LEVELS):
+    """Inverse of pack_frame. Returns (frame_index, packets)."""
+    u_levels = NUM_DISCRETE_U_STEPS * u_substeps
+    u_bits = (u_levels - 1).bit_length()
+    v_bits = (v_levels - 1).bit_length()
+    reader = _BitReader(data)
+    frame_index = reader.read(32)
+    count = reader.read(16)
+    id_bits = reader.read(5)
+    packets = []
+    for _ in range(count):
+        packets.append((reader.read(id_bits), reader.read(_INDEX_BITS), reader.read(_INDEX_BITS),
+                        reader.read(_INDEX_BITS), _dequantize(reader.read(u_bits), u_levels),
+                        _dequantize(reader.read(v_bits), v_levels), bool(reader.read(1))))
+    return frame_index, packets
+
+
+def packets_to_records(frame_index, packets):
+    """Converts decoded packets back into the 20-byte binary records used by the TCP feed."""
+    return b''.join(PACKET_RECORD.pack(frame_index, stream_id & 0xFF, symbol_idx, color_idx, spin_idx, u, v,
+                                       STATUS_OVERRIDDEN if is_overridden else 0, stream_id >> 8)
+                    for stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden in packets)
+
+
+# --- Adaptive binary range coder ---
+
+_PROB_BITS = 11
+_PROB_INIT = 1 << (_PROB_BITS - 1)
+_MOVE_BITS = 5
+_TOP = 1 << 24
+
+
+class _RangeEncoder:
+    def __init__(self):
+        self.low = 0
+        self.range = 0xFFFFFFFF
+        self.cache = 0
+        self.cache_size = 1
+        self.out = bytearray()
+
+    def _shift_low(self):
+        low = self.low
+        if low < 0xFF000000 or low >= 0x100000000:
+            carry = low >> 32
+            temp = self.cache
+            while True:
+                self.out.append((temp + carry) & 0xFF)
+                temp = 0xFF
+                self.cache_size -= 1
+                if not self.cache_size:
+                    break
+            self.cache = (low >> 24) & 0xFF
+        self.cache_size += 1
+        self.low = (low & 0x00FFFFFF) << 8
+
+    def encode_bit(self, probs, i, bit):
+        p = probs[i]
+        bound = (self.range >> _PROB_BITS) * p
+        if bit:
+            self.low += bound
+            self.range -= bound
+            probs[i] = p - (p >> _MOVE_BITS)
+        else:
+            self.range = bound
+            probs[i] = p + (((1 << _PROB_BITS) - p) >> _MOVE_BITS)
+        while self.range < _TOP:
+            self.range <<= 8
+            self._shift_low()
+
+    def encode_direct(self, value, nbits):
+        for shift in range(nbits - 1, -1, -1):
+            self.range >>= 1
+            if (value >> shift) & 1:
+                self.low += self.range
+            while self.range < _TOP:
+                self.range <<= 8
+                self._shift_low()
+
+    def finish(self):
+        """Flushes the coder and returns the body. The leading byte is always zero and is dropped."""
+        # Pick the value in [low, low + range) with the most trailing zero bytes so they can be trimmed.
+        for zero_bytes in (4, 3, 2, 1):
+            mask = (1 << (8 * zero_bytes)) - 1
+            candidate = (self.low + mask) & ~mask
+            if candidate < self.low + self.range:
+                self.low = candidate
+                break
+        for _ in range(5):
+            self._shift_low()
+        return bytes(self.out[1:]).rstrip(b'\x00')
+
+
+class _RangeDecoder:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 4
+        self.range = 0xFFFFFFFF
+        self.code = int.from_bytes(data[:4].ljust(4, b'\x00'), 'big')
+
+    def _next_byte(self):
+        pos = self.pos
+        self.pos += 1
+        return self.data[pos] if pos < len(self.data) else 0  # Trimmed trailing zeros
+
+    def decode_bit(self, probs, i):
+        p = probs[i]
+        bound = (self.range >> _PROB_BITS) * p
+        if self.code < bound:
+            self.range = bound
+            probs[i] = p + (((1 << _PROB_BITS) - p) >> _MOVE_BITS)
+            bit = 0
+        else:
+            self.code -= bound
+            self.range -= bound
+            probs[i] = p - (p >> _MOVE_BITS)
+            bit = 1
+        while self.range < _TOP:
+            self.range <<= 8
+            self.code = ((self.code << 8) | self._next_byte()) & 0xFFFFFFFF
+        return bit
+
+    def decode_direct(self, nbits):
+        value = 0
+        for _ in range(nbits):
+            self.range >>= 1
+            bit = 1 if self.code >= self.range else 0
+            if bit:
+                self.code -= self.range
+            value = (value << 1) | bit
+            while self.range < _TOP:
+                self.range <<= 8
+                self.code = ((self.code << 8) | self._next_byte()) & 0xFFFFFFFF
+        return value
+
+
+class _BitTree:
+    """Adaptive model over values in [0, 2**nbits), coded MSB first through a binary tree."""
+
+    def __init__(self, nbits):
+        self.nbits = nbits
+        self.probs = [_PROB_INIT] * (1 << nbits)
+
+    def encode(self, rc, value):
+        node = 1
+        for shift in range(self.nbits - 1, -1, -1):
+            bit = (value >> shift) & 1
+            rc.encode_bit(self.probs, node, bit)
+            node = (node << 1) | bit
+
+    def decode(self, rc):
+        node = 1
+        for _ in range(self.nbits):
+            node = (node << 1) | rc.decode_bit(self.probs, node)
+        return node - (1 << self.nbits)
+
+
+class _StreamModel:
+    """Prediction state and adaptive models shared by the encoder and decoder."""
+
+    def __init__(self, u_substeps, v_levels):
+        self.u_substeps = u_substeps
+        self.u_levels = NUM_DISCRETE_U_STEPS * u_substeps
+        self.v_levels = v_levels
+        self.reset()
+
+    def reset(self):
+        self.flags = [_PROB_INIT] * 4  # frame index predicted, count predicted, stream id predicted, override
+        self.symbol = _BitTree(_INDEX_BITS)
+        self.color = _BitTree(_INDEX_BITS)
+        self.spin = _BitTree(_INDEX_BITS)
+        self.u = _BitTree((self.u_levels - 1).bit_length())
+        self.v = _BitTree((self.v_levels - 1).bit_length())
+        self.last_frame_index = -1
+        self.last_count = 0
+        self.last_symbol = {}
+        self.last_u = {}
+        self.last_v = {}
+
+
+class CompactStreamEncoder:
+    """Streaming encoder: feed frames in order, send the returned blocks in order."""
+
+    def __init__(self, u_substeps=DEFAULT_U_SUBSTEPS, v_levels=DEFAULT_V_LEVELS,
+                 keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.model = _StreamModel(u_substeps, v_levels)
+        self.keyframe_interval = keyframe_interval
+        self._frames_since_keyframe = None
+
+    def force_keyframe(self):
+        """Makes the next block a keyframe, e.g. when a new client joins."""
+        self._frames_since_keyframe = None
+
+    def encode_frame(self, frame_index, packets):
+        """
+        Encodes one frame of (stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden)
+        tuples and returns the framed block.
+        """
+        m = self.model
+        keyframe = self._frames_since_keyframe is None or self._frames_since_keyframe >= self.keyframe_interval
+        if keyframe:
+            m.reset()
+            self._frames_since_keyframe = 0
+        self._frames_since_keyframe += 1
+
+        rc = _RangeEncoder()
+        flags = m.flags
+        if frame_index == m.last_frame_index + 1:
+            rc.encode_bit(flags, 0, 0)
+        else:
+            rc.encode_bit(flags, 0, 1)
+            rc.encode_direct(frame_index, 32)
+        if len(packets) == m.last_count:
+            rc.encode_bit(flags, 1, 0)
+        else:
+            rc.encode_bit(flags, 1, 1)
+            rc.encode_direct(len(packets), 16)
+
+        expected_id = 0
+        for stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden in packets:
+            if stream_id == expected_id:
+                rc.encode_bit(flags, 2, 0)
+            else:
+                rc.encode_bit(flags, 2, 1)
+                rc.encode_direct(stream_id, 16)
+            expected_id = stream_id + 1
+
+            predicted_symbol = m.last_symbol.get(stream_id, -1) + 1
+            m.symbol.encode(rc, (symbol_idx - predicted_symbol) % ELEMENT_COUNT)
+            m.color.encode(rc, (color_idx - symbol_idx) % ELEMENT_COUNT)
+            m.spin.encode(rc, (spin_idx - symbol_idx) % ELEMENT_COUNT)
+
+            qu = _quantize(u, m.u_levels)
+            qv = _quantize(v, m.v_levels)
+            m.u.encode(rc, (qu - m.last_u.get(stream_id, 0) - m.u_substeps) % m.u_levels)
+            m.v.encode(rc, (qv - m.last_v.get(stream_id, 0)) % m.v_levels)
+            rc.encode_bit(flags, 3, 1 if is_overridden else 0)
+
+            m.last_symbol[stream_id] = symbol_idx
+            m.last_u[stream_id] = qu
+            m.last_v[stream_id] = qv
+
+        m.last_frame_index = frame_index
+        m.last_count = len(packets)
+
+        body = rc.finish()
+        block = bytearray()
+        _write_varint(block, (len(body) << 1) | (1 if keyframe else 0))
+        block += body
+        return bytes(block)
+
+
+class CompactStreamDecoder:
+    """Streaming decoder: feed arbitrary byte chunks, get back completed frames."""
+
+    def __init__(self, u_substeps=DEFAULT_U_SUBSTEPS, v_levels=DEFAULT_V_LEVELS):
+        self.model = _StreamModel(u_substeps, v_levels)
+        self.synchronized = False
+        self.blocks_skipped = 0
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Appends received bytes and returns a list of (frame_index, packets) now decodable."""
+        self._buffer += data
+        frames = []
+        pos = 0
+        while True:
+            header, body_start = _read_varint(self._buffer, pos)
+            if header is None:
+                break
+            body_end = body_start + (header >> 1)
+            if body_end > len(self._buffer):
+                break
+            body = bytes(self._buffer[body_start:body_end])
+            pos = body_end
+            if header & 1:
+                self.model.reset()
+                self.synchronized = True
+            if not self.synchronized:
+                self.blocks_skipped += 1
+                continue
+            frames.append(self._decode_body(body))
+        del self._buffer[:pos]
+        return frames
+
+    def _decode_body(self, body):
+        m = self.model
+        rc = _RangeDecoder(body)
+        flags = m.flags
+        frame_index = rc.decode_direct(32) if rc.decode_bit(flags, 0) else m.last_frame_index + 1
+        count = rc.decode_direct(16) if rc.decode_bit(flags, 1) else m.last_count
+
+        packets = []
+        expected_id = 0
+        for _ in range(count):
+            stream_id = rc.decode_direct(16) if rc.decode_bit(flags, 2) else expected_id
+            expected_id = stream_id + 1
+
+            symbol_idx = (m.symbol.decode(rc) + m.last_symbol.get(stream_id, -1) + 1) % ELEMENT_COUNT
+            color_idx = (m.color.decode(rc) + symbol_idx) % ELEMENT_COUNT
+            spin_idx = (m.spin.decode(rc) + symbol_idx) % ELEMENT_COUNT
+            qu = (m.u.decode(rc) + m.last_u.get(stream_id, 0) + m.u_substeps) % m.u_levels
+            qv = (m.v.decode(rc) + m.last_v.get(stream_id, 0)) % m.v_levels
+            is_overridden = bool(rc.decode_bit(flags, 3))
+
+            m.last_symbol[stream_id] = symbol_idx
+            m.last_u[stream_id] = qu
+            m.last_v[stream_id] = qv
+            packets.append((stream_id, symbol_idx, color_idx, spin_idx,
+                            _dequantize(qu, m.u_levels), _dequantize(qv, m.v_levels), is_overridden))
+
+        m.last_frame_index = frame_index
+        m.last_count = count
+        return frame_index, packets
+
+
+def _generated_frame(frame_index, num_streams):
+    packets = []
+    for i in range(num_streams):
+        symbol_char, color_val, spin_char, u, v = generate_octa13_packet_data(i, frame_index, num_streams)
+        packets.append((i, symbols.index(symbol_char), colors.index(color_val), spins.index(spin_char),
+                        float(u), float(v), False))
+    return packets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Octa13 stream sizes across wire formats.")
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--keyframe-interval', type=int, default=DEFAULT_KEYFRAME_INTERVAL)
+    args = parser.parse_args(argv)
+
+    encoder = CompactStreamEncoder(keyframe_interval=args.keyframe_interval)
+    decoder = CompactStreamDecoder()
+    sizes = {'json': 0, 'binary': 0, 'bitpacked': 0, 'entropy': 0}
+    for frame_index in range(1, args.frames + 1):
+        packets = _generated_frame(frame_index, args.streams)
+        json_packets = [{'stream_id': p[0], 'symbol': symbols[p[1]], 'color': colors[p[2]], 'spin': spins[p[3]],
+                         'u_coord': p[4], 'v_coord': p[5], 'is_overridden': p[6], 'frame_index': frame_index}
+                        for p in packets]
+        sizes['json'] += len(json.dumps({'frame': frame_index, 'packets': json_packets})) + 1
+        sizes['binary'] += PACKET_RECORD.size * len(packets)
+        sizes['bitpacked'] += len(pack_frame(frame_index, packets))
+        block = encoder.encode_frame(frame_index, packets)
+        sizes['entropy'] += len(block)
+        (decoded_index, decoded), = decoder.feed(block)
+        if decoded_index != frame_index or [p[:4] for p in decoded] != [p[:4] for p in packets]:
+            raise AssertionError(f"Round trip mismatch at frame {frame_index}")
+
+    total_packets = args.frames * args.streams
+    print(f"{args.frames} frames x {args.streams} streams ({total_packets} packets)")
+    for name, size in sizes.items():
+        print(f"  {name:<10} {size:>12} bytes  {size / args.frames:9.2f} B/frame  "
+              f"{8 * size / total_packets:8.2f} bits/packet")
+
+
+if __name__ == "__main__":
+    main()
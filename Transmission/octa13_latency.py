@@ -0,0 +1,257 @@
+"""
+Optional latency timestamps for the binary feed, and consumer-side latency histograms.
+
+With timestamps enabled, each binary frame on the wire is preceded by a 40-byte FRAME_HEADER
+(`<4sIIIqqq`):
+
+    magic b'O13T', frame index, record count, reserved,
+    generated_ns   CLOCK_MONOTONIC when the producer started building the frame
+    serialized_ns  when the frame's wire bytes were ready
+    sent_ns        when the broadcaster held its lock and started writing to clients
+
+The header is two record slots long, so a reader that skips it stays record-aligned. Producer and
+consumers on the same machine share CLOCK_MONOTONIC, so a consumer that notes its own arrival time
+can split the end-to-end latency into stages:
+
+    serialize   serialized - generated   building the frame (in the simulator: packets and packing)
+    lock_wait   sent - serialized        waiting for the broadcast lock (other frames, accepts)
+    delivery    received - sent          position in the fan-out loop, kernel, network, receiver wake-up
+    total       received - generated
+
+Usage:
+    python "Symbolic TCP Simulator.py" --latency-header        # then tick "Binary Stream"
+    python octa13_latency.py [--host localhost] [--port 9999]  # stage percentiles of the live feed
+"""
+import argparse
+import socket
+import struct
+import time
+
+import numpy as np
+
+from octa13_protocol import PACKET_DTYPE
+
+# < = little-endian: magic, frame index, record count, reserved (I each but magic), three q timestamps
+FRAME_HEADER = struct.Struct('<4sIIIqqq')
+HEADER_MAGIC = b'O13T'
+_SENT_OFFSET = FRAME_HEADER.size - 8
+_SENT_FIELD = struct.Struct('<q')
+_RECORD_SIZE = PACKET_DTYPE.itemsize
+
+STAGES = ('serialize', 'lock_wait', 'delivery', 'total')
+
+
+# --- Producer side ---
+
+def timestamped_frame(frame_index, payload, generated_ns, serialized_ns=None):
+    """Header + records as one bytearray. sent_ns stays 0 until stamp_sent() fills it in."""
+    serialized_ns = time.monotonic_ns() if serialized_ns is None else serialized_ns
+    frame = bytearray(FRAME_HEADER.size + len(payload))
+    FRAME_HEADER.pack_into(frame, 0, HEADER_MAGIC, frame_index, len(payload) // _RECORD_SIZE, 0,
+                           generated_ns, serialized_ns, 0)
+    frame[FRAME_HEADER.size:] = payload
+    return frame
+
+
+def stamp_sent(frame):
+    """Writes the send time into a timestamped_frame(); pass as TCPBroadcaster.broadcast(on_locked=...)."""
+    _SENT_FIELD.pack_into(frame, _SENT_OFFSET, time.monotonic_ns())
+
+
+# --- Histograms ---
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of nanosecond values in fixed memory: 16 buckets per power of two, so any
+    percentile is within 1/16 of the true value. Values of 2**max_exponent ns and more share the top bucket.
+    """
+
+    SUB_BUCKET_BITS = 4
+
+    def __init__(self, max_exponent=40):
+        self.max_exponent = max_exponent
+        self.counts = np.zeros((max_exponent + 1) << self.SUB_BUCKET_BITS, dtype=np.int64)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.negative = 0  # Values below zero (clocks that are not shared) are counted here and as 0
+
+    def _indices(self, values):
+        bit_length = np.frexp(values.astype(np.float64))[1]  # Exact for values below 2**53
+        shift = np.maximum(bit_length - (self.SUB_BUCKET_BITS + 1), 0)
+        return np.minimum((shift << self.SUB_BUCKET_BITS) + (values >> shift), len(self.counts) - 1)
+
+    def record_value(self, value_ns):
+        """One value; plain Python, much cheaper than record() for the one-frame-at-a-time case."""
+        if value_ns < 0:
+            self.negative += 1
+            value_ns = 0
+        shift = max(value_ns.bit_length() - (self.SUB_BUCKET_BITS + 1), 0)
+        self.counts[min((shift << self.SUB_BUCKET_BITS) + (value_ns >> shift), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def record(self, values_ns):
+        """An array of values (vectorized)."""
+        values = np.atleast_1d(np.asarray(values_ns, dtype=np.int64))
+        if not len(values):
+            return
+        negative = values < 0
+        if negative.any():
+            self.negative += int(negative.sum())
+            values = np.where(negative, 0, values)
+        self.counts += np.bincount(self._indices(values), minlength=len(self.counts))
+        self.count += len(values)
+        self.total_ns += int(values.sum())
+        low = int(values.min())
+        self.min_ns = low if self.min_ns is None else min(self.min_ns, low)
+        self.max_ns = max(self.max_ns, int(values.max()))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.negative += other.negative
+        if other.min_ns is not None:
+            self.min_ns = other.min_ns if self.min_ns is None else min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def _bucket_middle(self, index):
+        shift = max((index >> self.SUB_BUCKET_BITS) - 1, 0)
+        mantissa = index - (shift << self.SUB_BUCKET_BITS)
+        return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) / 2.0
+
+    def percentile(self, p):
+        """The p-th percentile in nanoseconds (bucket midpoint, clamped to the observed range)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(np.ceil(p / 100.0 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(max(self._bucket_middle(index), self.min_ns), self.max_ns)
+
+    def summary(self):
+        """count plus mean/p50/p99/p999/max in microseconds."""
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'mean_us': self.total_ns / self.count / 1000.0,
+                'p50_us': self.percentile(50) / 1000.0, 'p99_us': self.percentile(99) / 1000.0,
+                'p999_us': self.percentile(99.9) / 1000.0, 'max_us': self.max_ns / 1000.0}
+
+
+class StageLatency:
+    """One LatencyHistogram per stage (see the module docstring), fed from frame headers."""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def record_frame(self, generated_ns, serialized_ns, sent_ns, received_ns):
+        """One frame's timestamps (ints)."""
+        histograms = self.histograms
+        histograms['serialize'].record_value(serialized_ns - generated_ns)
+        histograms['lock_wait'].record_value(sent_ns - serialized_ns)
+        histograms['delivery'].record_value(received_ns - sent_ns)
+        histograms['total'].record_value(received_ns - generated_ns)
+
+    def record(self, generated_ns, serialized_ns, sent_ns, received_ns):
+        """Equal-length arrays of timestamps (vectorized)."""
+        generated_ns, serialized_ns, sent_ns, received_ns = (np.asarray(v, dtype=np.int64) for v in
+                                                             (generated_ns, serialized_ns, sent_ns, received_ns))
+        self.histograms['serialize'].record(serialized_ns - generated_ns)
+        self.histograms['lock_wait'].record(sent_ns - serialized_ns)
+        self.histograms['delivery'].record(received_ns - sent_ns)
+        self.histograms['total'].record(received_ns - generated_ns)
+
+    def merge(self, other):
+        for stage in STAGES:
+            self.histograms[stage].merge(other.histograms[stage])
+
+    def format(self):
+        parts = []
+        for stage in STAGES:
+            s = self.histograms[stage].summary()
+            if s['count']:
+                parts.append(f"{stage} {s['p50_us']:.0f}/{s['p99_us']:.0f}/{s['p999_us']:.0f}")
+        return ('p50/p99/p999 us: ' + '  '.join(parts)) if parts else 'no timestamped frames yet'
+
+
+# --- Consumer side ---
+
+class TimestampedFeedDecoder:
+    """
+    Splits a timestamped binary feed into frames and records each frame's stage latencies on arrival.
+    decode() has the same shape as the receiver's feed decoders (bytes in, PACKET_DTYPE records out).
+    """
+
+    def __init__(self, stages=None):
+        self.stages = stages if stages is not None else StageLatency()
+        self.resyncs = 0
+        self._buffer = bytearray()
+
+    def frames(self, data, received_ns=None):
+        """Returns [(header fields, records)] for every frame completed by `data`."""
+        received_ns = time.monotonic_ns() if received_ns is None else received_ns
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        pos = 0
+        while len(buffer) - pos >= FRAME_HEADER.size:
+            header = FRAME_HEADER.unpack_from(buffer, pos)
+            if header[0] != HEADER_MAGIC:
+                found = buffer.find(HEADER_MAGIC, pos + 1)
+                self.resyncs += 1
+                pos = found if found >= 0 else len(buffer) - len(HEADER_MAGIC) + 1
+                continue
+            end = pos + FRAME_HEADER.size + header[2] * _RECORD_SIZE
+            if end > len(buffer):
+                break
+            records = np.frombuffer(bytes(buffer[pos + FRAME_HEADER.size:end]), dtype=PACKET_DTYPE)
+            frames.append((header, records))
+            self.stages.record_frame(header[4], header[5], header[6], received_ns)
+            pos = end
+        del buffer[:pos]
+        return frames
+
+    def decode(self, data, received_ns=None):
+        frames = self.frames(data, received_ns)
+        if not frames:
+            return np.empty(0, dtype=PACKET_DTYPE)
+        return np.concatenate([records for _, records in frames])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show per-stage latency of a timestamped Octa13 binary feed.")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between reports.")
+    args = parser.parse_args(argv)
+
+    decoder = TimestampedFeedDecoder()
+    sock = socket.create_connection((args.host, args.port))
+    print(f"[Latency] Connected to {args.host}:{args.port}")
+    next_report = time.monotonic() + args.interval
+    frames = 0
+    try:
+        while True:
+            data = sock.recv(1 << 16)
+            if not data:
+                break
+            frames += len(decoder.frames(data))
+            if time.monotonic() >= next_report:
+                next_report += args.interval
+                print(f"[Latency] {frames} frames  {decoder.stages.format()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        print(f"[Latency] {frames} frames  {decoder.stages.format()}")
+        if decoder.resyncs:
+            print(f"[Latency] Resynchronized {decoder.resyncs} time(s); is the producer sending headers?")
+
+
+if __name__ == "__main__":
+    main()
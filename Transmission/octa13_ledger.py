@@ -0,0 +1,320 @@
+"""
+Hash-chained frame ledger for tamper evidence on recorded sessions.
+
+The chain is built over the exact bytes the recorder wrote (nothing is re-serialized): each frame's
+record header, so its frame index, timestamp, flags and length, then the wire payload. Frames are
+fed incrementally into one hash per checkpoint interval, seeded with the previous checkpoint:
+
+    digest[k] = H(digest[k - 1] || for each frame of interval k: record header (21) || payload)
+
+starting from 32 zero bytes, so the per-frame cost is two hash updates with no finalization.
+H is SHA-256 (hardware accelerated on most current CPUs) or BLAKE2b-256; with a ledger key it
+becomes HMAC-SHA-256 or keyed BLAKE2b, so the chain cannot be recomputed without the key.
+Every `checkpoint_interval` frames, and when the ledger is closed, the (sequence, frame index,
+time, digest) is appended to a checkpoint file; with the recorder that is `session-NNNNNN.o13chk`
+next to the session's first segment.
+
+Because every checkpoint pins the chain state, the intervals between consecutive checkpoints can be
+verified independently: `verify` splits each session into a few long runs of consecutive intervals
+per worker process, and each run reads its part of the log once, front to back.
+Altering, dropping or reordering any recorded frame, or changing its replay timestamp or its
+binary/session-start flags, breaks the interval that contains it; frames
+after the last checkpoint of an interrupted session are reported as not covered.
+
+Usage:
+    python "Symbolic TCP Simulator.py" --record sessions/a --ledger [--ledger-key-file KEY]
+    python octa13_ledger.py verify sessions/a [--key-file KEY] [--workers 4]
+    python octa13_ledger.py bench [--streams 9] [--frames 20000]
+"""
+import argparse
+import hashlib
+import hmac
+import os
+import struct
+import sys
+import time
+from multiprocessing import Pool
+
+from octa13_recorder import FLAG_BINARY, RECORD_HEADER, RecordedSession
+
+CHECKPOINT_MAGIC = b'O13CHK01'
+# algorithm name (16), checkpoint interval (4)
+CHECKPOINT_HEADER = struct.Struct('<16sI')
+# frames chained so far (8), frame index of the last one (4), wall-clock time (8), chain digest (32)
+CHECKPOINT_ENTRY = struct.Struct('<QId32s')
+
+DIGEST_BYTES = 32
+GENESIS_DIGEST = bytes(DIGEST_BYTES)
+DEFAULT_CHECKPOINT_INTERVAL = 256
+RUNS_PER_WORKER = 4  # Verification tasks per worker and session, for load balancing
+ALGORITHMS = ('sha256', 'blake2b')
+
+
+def _make_hasher(algorithm, key=None):
+    """Returns a zero-argument factory for fresh hash objects (copying a keyed template is cheapest)."""
+    if algorithm == 'sha256':
+        template = hmac.new(key, digestmod=hashlib.sha256) if key else hashlib.sha256()
+    elif algorithm == 'blake2b':
+        template = hashlib.blake2b(digest_size=DIGEST_BYTES, key=key or b'')
+    else:
+        raise ValueError(f"Unknown ledger algorithm '{algorithm}' (expected one of {', '.join(ALGORITHMS)}).")
+    return template.copy
+
+
+class FrameLedger:
+    """Feeds frames into the current interval's hash and closes the interval at each checkpoint."""
+
+    def __init__(self, algorithm='sha256', key=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.algorithm = algorithm
+        self.checkpoint_interval = checkpoint_interval
+        self._new_hasher = _make_hasher(algorithm, key)
+        self.digest = GENESIS_DIGEST  # As of the last checkpoint
+        self.sequence = 0
+        self.last_frame_index = 0
+        self._next_checkpoint = checkpoint_interval
+        self._start_interval()
+        self._checkpoint_file = None
+
+    def _start_interval(self):
+        self._hasher = self._new_hasher()
+        self._hasher.update(self.digest)
+        self._update = self._hasher.update
+
+    def open_checkpoints(self, path):
+        self._checkpoint_file = open(path, 'wb')
+        self._checkpoint_file.write(CHECKPOINT_MAGIC)
+        self._checkpoint_file.write(CHECKPOINT_HEADER.pack(self.algorithm.encode('ascii'), self.checkpoint_interval))
+        self._write_checkpoint()  # The genesis entry, so every interval has a start
+
+    def append(self, frame_index, header, payload):
+        """Chains one frame: its RECORD_HEADER bytes as the recorder wrote them, then its wire bytes."""
+        self._update(header)
+        self._update(payload)  # Separate update: the payload is never copied
+        self.sequence += 1
+        self.last_frame_index = frame_index
+        if self.sequence == self._next_checkpoint:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Closes the current interval (if it has frames) and records its digest."""
+        if self.sequence > self._next_checkpoint - self.checkpoint_interval:
+            self.digest = self._hasher.digest()
+            self._start_interval()
+            self._next_checkpoint = self.sequence + self.checkpoint_interval
+            self._write_checkpoint()
+        return self.digest
+
+    def _write_checkpoint(self):
+        if self._checkpoint_file is not None:
+            self._checkpoint_file.write(CHECKPOINT_ENTRY.pack(self.sequence, self.last_frame_index, time.time(),
+                                                              self.digest))
+
+    def flush(self):
+        if self._checkpoint_file is not None:
+            self._checkpoint_file.flush()
+
+    def close(self):
+        self.checkpoint()
+        if self._checkpoint_file is not None:
+            self._checkpoint_file.close()
+            self._checkpoint_file = None
+
+
+# --- Verification ---
+
+def read_checkpoints(path):
+    """Returns (algorithm, checkpoint interval, [(sequence, frame_index, timestamp, digest), ...])."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(CHECKPOINT_MAGIC):
+        raise ValueError(f"{path} is not an Octa13 ledger checkpoint file")
+    algorithm, interval = CHECKPOINT_HEADER.unpack_from(data, len(CHECKPOINT_MAGIC))
+    body = data[len(CHECKPOINT_MAGIC) + CHECKPOINT_HEADER.size:]
+    usable = len(body) - len(body) % CHECKPOINT_ENTRY.size  # Tolerate a torn final entry
+    return (algorithm.rstrip(b'\0').decode('ascii'), interval,
+            list(CHECKPOINT_ENTRY.iter_unpack(body[:usable])))
+
+
+def _verify_run(task):
+    """
+    Worker: recomputes the chain across a run of consecutive checkpoints, reading the log once from
+    the first one. Returns a list of errors.
+    """
+    directory, segment_number, offset, algorithm, key, checkpoints = task
+    new_hasher = _make_hasher(algorithm, key)
+    records = RecordedSession(directory).raw_records_at(segment_number, offset)
+    errors = []
+    for start, end in zip(checkpoints, checkpoints[1:]):
+        start_sequence, _, _, start_digest = start
+        end_sequence, end_frame_index, _, end_digest = end
+        hasher = new_hasher()
+        hasher.update(start_digest)  # Each interval starts from its recorded checkpoint, so one bad interval stays local
+        update = hasher.update
+        sequence, last_frame_index = start_sequence, None
+        for frame_index, header, payload in records:
+            update(header)
+            update(payload)
+            sequence += 1
+            last_frame_index = frame_index
+            if sequence == end_sequence:
+                break
+        if sequence < end_sequence:
+            errors.append(f"log ends at frame #{sequence}, checkpoint expects #{end_sequence}")
+            break
+        if hasher.digest() != end_digest or last_frame_index != end_frame_index:
+            errors.append(f"chain mismatch in frames #{start_sequence}..#{end_sequence - 1}")
+    return errors
+
+
+def verify_recording(directory, key=None, workers=None):
+    """
+    Verifies every ledgered session in a recording directory. Each session's checkpoints are split
+    into runs of consecutive intervals (RUNS_PER_WORKER per worker) that are verified in a process
+    pool, each run reading its stretch of the log sequentially. Returns a list of (checkpoint file,
+    frames verified, frames after the last checkpoint, [errors]) per session.
+    """
+    recording = RecordedSession(directory)
+    pool_size = workers or os.cpu_count() or 1
+    reports = []
+    tasks = []
+    for session_id, segments in recording.sessions():
+        name = f"session-{session_id:06d}.o13chk"
+        if not os.path.exists(os.path.join(directory, name)):
+            continue  # Recorded without --ledger
+        algorithm, _, checkpoints = read_checkpoints(os.path.join(directory, name))
+        if not checkpoints or checkpoints[0][0] != 0 or checkpoints[0][3] != GENESIS_DIGEST:
+            reports.append((name, 0, 0, ["missing or altered genesis checkpoint"]))
+            continue
+        recorded = sum(recording.segment_frame_count(n) for n in segments)
+        report = (name, checkpoints[-1][0], max(0, recorded - checkpoints[-1][0]), [])
+        reports.append(report)
+        intervals = len(checkpoints) - 1
+        per_run = max(1, -(-intervals // (pool_size * RUNS_PER_WORKER)))
+        for first in range(0, intervals, per_run):
+            run = checkpoints[first:first + per_run + 1]
+            located = recording.locate_record(session_id, run[0][0])
+            if located is None:
+                report[3].append(f"log ends before frame #{run[0][0]}, checkpoint expects #{run[-1][0]}")
+                break
+            tasks.append((report, (directory, located[0], located[1], algorithm, key, run)))
+
+    if tasks:
+        with Pool(workers) as pool:
+            results = pool.map(_verify_run, [task for _, task in tasks], chunksize=1)
+        for (report, _), errors in zip(tasks, results):
+            report[3].extend(errors)
+    return reports
+
+
+# --- Overhead benchmark ---
+
+def benchmark(num_streams, frame_count, algorithm='sha256', key=None, binary=True):
+    """
+    Times the simulator's recording send path (packet generation + serialization + a local socket
+    send + the recorder) and the ledger stage over the same frames. Returns (send path us/frame,
+    ledger us/frame).
+    """
+    import socket
+    import tempfile
+    from octa13_ndjson import NDJSONFrameSerializer
+    from octa13_protocol import generate_octa13_packet
+    from octa13_recorder import FrameRecorder
+
+    scratch = tempfile.TemporaryDirectory()
+    sender, receiver = socket.socketpair()
+    receiver.setblocking(False)
+    serializer = NDJSONFrameSerializer()
+
+    def send_path(sent):
+        recorder = FrameRecorder(tempfile.mkdtemp(dir=scratch.name))
+        start = time.perf_counter()
+        for frame_index in range(frame_count):
+            packets = [generate_octa13_packet(i, frame_index, num_streams) for i in range(num_streams)]
+            if binary:
+                message = b''.join([p.to_record() for p in packets])
+            else:
+                message = (serializer.serialize_frame(frame_index, packets) + '\n').encode('utf-8')
+            sender.sendall(message)
+            recorder.append(frame_index, message, binary)
+            sent.append(message)
+            if frame_index % 64 == 0:
+                try:
+                    while receiver.recv(1 << 20):
+                        pass
+                except BlockingIOError:
+                    pass
+        recorder.close()
+        return time.perf_counter() - start
+
+    def ledger_stage(sent):
+        ledger = FrameLedger(algorithm, key)
+        append = ledger.append
+        flags = FLAG_BINARY if binary else 0
+        headers = [RECORD_HEADER.pack(frame_index, time.time(), flags, len(message))  # Packed by the recorder
+                   for frame_index, message in enumerate(sent)]
+        start = time.perf_counter()
+        for frame_index, (header, message) in enumerate(zip(headers, sent)):
+            append(frame_index, header, message)
+        ledger.close()
+        return time.perf_counter() - start
+
+    try:
+        send_time = ledger_time = float('inf')
+        for _ in range(7):  # Best of several runs keeps scheduler noise out of both numbers
+            sent = []
+            send_time = min(send_time, send_path(sent))
+            ledger_time = min(ledger_time, ledger_stage(sent))
+    finally:
+        sender.close()
+        receiver.close()
+        scratch.cleanup()
+    return send_time / frame_count * 1e6, ledger_time / frame_count * 1e6
+
+
+def _read_key(path):
+    if not path:
+        return None
+    with open(path, 'rb') as f:
+        return f.read().strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or benchmark Octa13 frame ledgers.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify = sub.add_parser('verify', help="Check a recording against its ledger checkpoints.")
+    verify.add_argument('directory')
+    verify.add_argument('--key-file', help="Ledger key used when recording.")
+    verify.add_argument('--workers', type=int, default=None, help="Verifier processes (default: CPU count).")
+    bench = sub.add_parser('bench', help="Measure the ledger's overhead on the send path.")
+    bench.add_argument('--streams', type=int, default=9)
+    bench.add_argument('--frames', type=int, default=20000)
+    bench.add_argument('--algorithm', choices=ALGORITHMS, default='sha256')
+    bench.add_argument('--json', action='store_true', help="Measure the JSON feed instead of binary.")
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        send_us, ledger_us = benchmark(args.streams, args.frames, args.algorithm, binary=not args.json)
+        print(f"[Ledger] {args.streams} streams, {'JSON' if args.json else 'binary'} frames, {args.algorithm}")
+        print(f"[Ledger] send path {send_us:8.2f} us/frame, ledger stage {ledger_us:6.2f} us/frame "
+              f"(+{ledger_us / send_us * 100:.2f}%)")
+        return 0
+
+    started = time.monotonic()
+    reports = verify_recording(args.directory, _read_key(args.key_file), args.workers)
+    if not reports:
+        print(f"[Ledger] No ledger checkpoints found in {args.directory}")
+        return 1
+    failed = False
+    for name, frames, unverified, errors in reports:
+        print(f"[Ledger] {name}: {frames} frames {'OK' if not errors else 'FAILED'}")
+        if unverified:
+            print(f"[Ledger]   {unverified} frame(s) after the last checkpoint are not covered (interrupted session?)")
+        for error in errors:
+            print(f"[Ledger]   {error}")
+        failed = failed or bool(errors)
+    print(f"[Ledger] Verified in {time.monotonic() - started:.3f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+Subscriber fleet benchmark for the Octa13 TCP fan-out.
+
+N simulated subscribers connect to a producer's TCP port (the simulator, the sharded engine, a
+replay, or a producer this tool starts itself), consume and validate every frame, and record when
+each frame first reached them. N sweeps over the given client counts; for each step the tool reports:
+
+    * connect time (the accept loop's backlog shows up here first)
+    * aggregate throughput: frames and bytes delivered per second over all subscribers
+    * delivery latency p50/p99/p999, per (subscriber, frame)
+    * per-client lag: how many frames each subscriber trails the newest frame, sampled every 100 ms
+
+Latency reference: with --serve the producer runs in its own process and records a CLOCK_MONOTONIC
+send time per frame, so latencies are absolute (the clock is shared by every process on the
+machine). A --format timestamped feed (--latency-header, see octa13_latency.py) carries its own
+generation time, and the report adds the per-stage split. Against any other external producer,
+latency is measured from the first subscriber that got the frame, which is the fan-out spread the
+broadcast loop adds.
+
+Subscribers are asyncio protocols; --processes splits the fleet over several event loops.
+
+Usage:
+    python octa13_loadgen.py --serve --clients 1 10 100 1000              # self-contained sweep
+    python octa13_loadgen.py --serve --latency-header --format timestamped --clients 100
+    python octa13_loadgen.py --port 9999 --clients 1 10 100 --duration 20  # against the running simulator
+    python octa13_loadgen.py --port 9999 --format json --clients 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import signal
+import time
+
+import numpy as np
+
+from octa13_latency import StageLatency, TimestampedFeedDecoder, stamp_sent, timestamped_frame
+from octa13_protocol import PACKET_DTYPE
+
+DEFAULT_SWEEP = [1, 10, 100, 1000]
+SEND_RING = 1 << 20  # Send timestamps kept by the --serve producer, indexed by frame % SEND_RING
+LAG_SAMPLE_S = 0.1
+_RECORD_SIZE = PACKET_DTYPE.itemsize
+
+
+class Subscriber(asyncio.Protocol):
+    """One simulated client: validates the feed and notes the first arrival time of every frame."""
+
+    def __init__(self, fmt='binary', validate_every=100):
+        self.format = fmt
+        self.validate_every = validate_every
+        self.frames = []
+        self.arrivals = []
+        self.generated = []  # Header generation times (timestamped format only)
+        self.decoder = TimestampedFeedDecoder() if fmt == 'timestamped' else None
+        self.bytes = 0
+        self.invalid = 0
+        self.last_frame = -1
+        self.closed = asyncio.get_running_loop().create_future()
+        self.transport = None
+        self._remainder = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+    def data_received(self, data):
+        now = time.monotonic_ns()
+        self.bytes += len(data)
+        if self.decoder is not None:
+            for header, records in self.decoder.frames(data, now):
+                if len(records):
+                    self._binary_frames(records, now)
+                if self.frames and self.frames[-1] == header[1] and len(self.generated) < len(self.frames):
+                    self.generated.append(header[4])
+            return
+        data = self._remainder + data if self._remainder else data
+        if self.format == 'binary':
+            usable = len(data) - len(data) % _RECORD_SIZE
+            self._remainder = data[usable:]
+            if usable:
+                self._binary_frames(np.frombuffer(data, dtype=PACKET_DTYPE, count=usable // _RECORD_SIZE), now)
+        else:
+            end = data.rfind(b'\n') + 1
+            self._remainder = data[end:]
+            for line in data[:end].splitlines():
+                self._json_frame(line, now)
+
+    def _binary_frames(self, records, now):
+        frames = records['frame_index']
+        if (frames[0] < self.last_frame or (len(frames) > 1 and (np.diff(frames.astype(np.int64)) < 0).any())
+                or (records['symbol_idx'] > 7).any() or (records['color_idx'] > 7).any()
+                or (records['spin_idx'] > 7).any()):
+            self.invalid += 1
+        new = np.unique(frames[frames > self.last_frame]) if frames[-1] > self.last_frame else ()
+        for frame_index in new:
+            self.frames.append(int(frame_index))
+            self.arrivals.append(now)
+        if len(new):
+            self.last_frame = self.frames[-1]
+
+    def _json_frame(self, line, now):
+        # Cheap check on every line ('{"frame": N, "packets": [...]}'), full parse on a sample
+        if not line.startswith(b'{"frame": '):
+            self.invalid += 1
+            return
+        try:
+            frame_index = int(line[10:line.index(b',', 10)])
+            if self.validate_every and frame_index % self.validate_every == 0:
+                json.loads(line)['packets']
+        except (ValueError, KeyError):
+            self.invalid += 1
+            return
+        if frame_index > self.last_frame:
+            self.frames.append(frame_index)
+            self.arrivals.append(now)
+            self.last_frame = frame_index
+        else:
+            self.invalid += 1
+
+    def result(self):
+        result = {'frames': np.array(self.frames, dtype=np.int64), 'arrivals': np.array(self.arrivals, dtype=np.int64),
+                  'bytes': self.bytes, 'invalid': self.invalid}
+        if self.decoder is not None:
+            result['generated'] = np.array(self.generated, dtype=np.int64)
+            result['stages'] = self.decoder.stages
+            result['invalid'] += self.decoder.resyncs
+        return result
+
+
+async def run_fleet(host, port, clients, duration, fmt='binary', connect_concurrency=64, validate_every=100,
+                    barrier=None):
+    """
+    Connects `clients` subscribers, keeps them for `duration` seconds, returns their results.
+    With several fleet processes, `barrier` makes them all start measuring once everyone is connected.
+    """
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(connect_concurrency)
+    connect_times = []
+    failures = 0
+
+    async def connect():
+        nonlocal failures
+        async with gate:
+            started = time.perf_counter()
+            try:
+                _, subscriber = await loop.create_connection(lambda: Subscriber(fmt, validate_every), host, port)
+            except OSError:
+                failures += 1
+                return None
+            connect_times.append(time.perf_counter() - started)
+            return subscriber
+
+    subscribers = [s for s in await asyncio.gather(*(connect() for _ in range(clients))) if s is not None]
+    if barrier is not None:
+        await loop.run_in_executor(None, barrier.wait)
+    window_start = time.monotonic_ns()
+    bytes_before = [s.bytes for s in subscribers]
+    await asyncio.sleep(duration)
+    window = (window_start, time.monotonic_ns())
+    disconnected = sum(1 for s in subscribers if s.closed.done())
+    results = []
+    for subscriber, before in zip(subscribers, bytes_before):
+        subscriber.transport.close()
+        result = subscriber.result()
+        result['bytes'] -= before  # Bytes delivered inside the measurement window
+        results.append(result)
+    return {'subscribers': results, 'connect_times': connect_times, 'failures': failures,
+            'disconnected': disconnected, 'window': window}
+
+
+def _fleet_process(host, port, clients, duration, fmt, connect_concurrency, validate_every, barrier, conn):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The coordinator handles Ctrl+C
+    conn.send(asyncio.run(run_fleet(host, port, clients, duration, fmt, connect_concurrency, validate_every,
+                                    barrier)))
+    conn.close()
+
+
+def _producer_process(host, port, streams, fps, send_times, ready, stop, latency_header=False):
+    """--serve producer: broadcasts binary frames at a fixed rate and records each frame's send time."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from octa13_protocol import StreamBlockGenerator
+    from octa13_transport import TCPBroadcaster
+    broadcaster = TCPBroadcaster(verbose=False)
+    if not broadcaster.start(host, port):
+        ready.set()
+        return
+    ready.set()
+    generator = StreamBlockGenerator(0, streams, streams)
+    records = np.zeros(streams, dtype=PACKET_DTYPE)
+    times = np.frombuffer(send_times, dtype=np.int64)
+    period = 1.0 / fps if fps else 0.0
+    start = time.monotonic()
+    frame_index = 0
+    try:
+        while not stop.is_set():
+            if period:
+                delay = start + frame_index * period - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            generated_ns = time.monotonic_ns()
+            generator.fill(records, frame_index)
+            times[frame_index % SEND_RING] = time.monotonic_ns()
+            if latency_header:
+                broadcaster.broadcast(timestamped_frame(frame_index, records.tobytes(), generated_ns),
+                                      on_locked=stamp_sent)
+            else:
+                broadcaster.broadcast(records.tobytes())
+            frame_index += 1
+    finally:
+        broadcaster.shutdown()
+
+
+# --- Measurement ---
+
+def summarize(fleet_results, send_times=None):
+    """Folds the fleet's per-subscriber arrivals into one step's report."""
+    subscribers = [s for result in fleet_results for s in result['subscribers']]
+    t0 = max(result['window'][0] for result in fleet_results)
+    t1 = min(result['window'][1] for result in fleet_results)
+    duration = (t1 - t0) / 1e9
+    summary = {
+        'clients': len(subscribers),
+        'failures': sum(r['failures'] for r in fleet_results),
+        'disconnected': sum(r['disconnected'] for r in fleet_results),
+        'invalid': sum(s['invalid'] for s in subscribers),
+        'connect_p50_ms': 0.0, 'connect_max_ms': 0.0,
+    }
+    connect_times = np.concatenate([r['connect_times'] for r in fleet_results] or [[]])
+    if len(connect_times):
+        summary['connect_p50_ms'] = float(np.percentile(connect_times, 50) * 1000)
+        summary['connect_max_ms'] = float(connect_times.max() * 1000)
+
+    frames = np.concatenate([s['frames'] for s in subscribers] or [np.empty(0, np.int64)])
+    arrivals = np.concatenate([s['arrivals'] for s in subscribers] or [np.empty(0, np.int64)])
+    in_window = (arrivals >= t0) & (arrivals < t1)
+    frames, arrivals = frames[in_window], arrivals[in_window]
+    summary['frames_per_s'] = len(frames) / duration if duration > 0 else 0.0
+    summary['mbytes_per_s'] = sum(s['bytes'] for s in subscribers) / duration / 1e6 if duration > 0 else 0.0
+    if not len(frames):
+        return summary
+
+    # Reference time per frame: generation time from the frame header, the --serve producer's send
+    # time, or the first subscriber to receive it
+    first = frames.min()
+    if all('generated' in s and len(s['generated']) == len(s['frames']) for s in subscribers):
+        reference = np.concatenate([s['generated'] for s in subscribers])[in_window]
+        stages = StageLatency()
+        for s in subscribers:
+            stages.merge(s['stages'])
+        summary['stages'] = stages.format()
+    elif send_times is not None:
+        reference = np.frombuffer(send_times, dtype=np.int64)[frames % SEND_RING]
+    else:
+        earliest = np.full(frames.max() - first + 1, np.iinfo(np.int64).max)
+        np.minimum.at(earliest, frames - first, arrivals)
+        reference = earliest[frames - first]
+    latency_us = (arrivals - reference) / 1000.0
+    p50, p99, p999 = np.percentile(latency_us, [50, 99, 99.9])
+    summary.update({'latency_p50_us': float(p50), 'latency_p99_us': float(p99), 'latency_p999_us': float(p999),
+                    'latency_reference': ('generation' if 'stages' in summary else
+                                          'send' if send_times is not None else 'first subscriber')})
+
+    # Lag: frames behind the newest frame any subscriber had, sampled across the window
+    samples = np.arange(t0, t1, int(LAG_SAMPLE_S * 1e9))
+    last_frames = []
+    for s in subscribers:
+        if not len(s['frames']):
+            continue  # Never got a frame; shows up in the throughput instead
+        seen = np.searchsorted(s['arrivals'], samples, side='right') - 1
+        last_frames.append(np.where(seen >= 0, s['frames'][np.maximum(seen, 0)], -1))
+    last_frames = np.vstack(last_frames)
+    lag = last_frames.max(axis=0) - last_frames
+    summary['silent_clients'] = len(subscribers) - len(last_frames)
+    summary['lag_p50_frames'] = float(np.percentile(lag, 50))
+    summary['lag_max_frames'] = int(lag.max())
+    summary['worst_client_lag_mean'] = float(lag.mean(axis=1).max())
+    return summary
+
+
+def run_step(host, port, clients, duration, processes=1, fmt='binary', connect_concurrency=64, validate_every=100):
+    """One sweep step: the fleet split over `processes` event loops. Returns the raw fleet results."""
+    processes = max(1, min(processes, clients))
+    if processes == 1:
+        return [asyncio.run(run_fleet(host, port, clients, duration, fmt, connect_concurrency, validate_every))]
+    shares = [clients // processes + (1 if i < clients % processes else 0) for i in range(processes)]
+    barrier = multiprocessing.Barrier(processes)
+    workers = []
+    for share in shares:
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_fleet_process, daemon=True,
+                                          args=(host, port, share, duration, fmt, connect_concurrency,
+                                                validate_every, barrier, child_conn))
+        process.start()
+        child_conn.close()
+        workers.append((process, parent_conn))
+    results = [conn.recv() for _, conn in workers]
+    for process, _ in workers:
+        process.join()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Octa13 TCP fan-out with a fleet of subscribers.")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--clients', type=int, nargs='+', default=DEFAULT_SWEEP, help="Fleet sizes to sweep.")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds measured per step.")
+    parser.add_argument('--processes', type=int, default=1, help="Event-loop processes the fleet is split over.")
+    parser.add_argument('--format', choices=('binary', 'json', 'timestamped'), default='binary',
+                        help="Feed format to validate (timestamped = binary with --latency-header).")
+    parser.add_argument('--connect-concurrency', type=int, default=64, help="Connections opened at once.")
+    parser.add_argument('--validate-every', type=int, default=100,
+                        help="JSON: fully parse every Nth frame (others get a header check).")
+    parser.add_argument('--serve', action='store_true', help="Start a timestamping producer on --host/--port.")
+    parser.add_argument('--streams', type=int, default=9, help="--serve: streams per frame.")
+    parser.add_argument('--fps', type=float, default=60.0, help="--serve: frame rate (0 = as fast as possible).")
+    parser.add_argument('--latency-header', action='store_true', help="--serve: send timestamped frames.")
+    args = parser.parse_args(argv)
+
+    producer = send_times = None
+    if args.serve:
+        if args.format != ('timestamped' if args.latency_header else 'binary'):
+            parser.error("--serve produces the binary feed (--format timestamped with --latency-header).")
+        send_times = multiprocessing.RawArray('q', SEND_RING)
+        ready, stop = multiprocessing.Event(), multiprocessing.Event()
+        producer = multiprocessing.Process(target=_producer_process, daemon=True,
+                                           args=(args.host, args.port, args.streams, args.fps, send_times, ready,
+                                                 stop, args.latency_header))
+        producer.start()
+        ready.wait()
+        time.sleep(0.2)
+        if not producer.is_alive():
+            return 1
+
+    print(f"[LoadGen] {args.host}:{args.port}, {args.format} feed, {args.duration:g} s per step, "
+          f"{args.processes} fleet process(es)")
+    try:
+        for clients in args.clients:
+            results = run_step(args.host, args.port, clients, args.duration, args.processes, args.format,
+                               args.connect_concurrency, args.validate_every)
+            s = summarize(results, send_times)
+            line = (f"[LoadGen] clients {s['clients']:5d}  connect p50/max {s['connect_p50_ms']:.1f}/"
+                    f"{s['connect_max_ms']:.1f} ms  {s['frames_per_s']:10.1f} frames/s  {s['mbytes_per_s']:7.2f} MB/s")
+            if 'latency_p50_us' in s:
+                line += (f"  latency p50/p99/p999 {s['latency_p50_us']:.0f}/{s['latency_p99_us']:.0f}/"
+                         f"{s['latency_p999_us']:.0f} us  lag p50/max {s['lag_p50_frames']:.0f}/{s['lag_max_frames']}"
+                         f" frames")
+            if s['failures'] or s['disconnected'] or s['invalid'] or s.get('silent_clients'):
+                line += (f"  failed {s['failures']}  dropped {s['disconnected']}  invalid {s['invalid']}"
+                         f"  silent {s.get('silent_clients', 0)}")
+            print(line)
+            if 'stages' in s:
+                print(f"[LoadGen]              stages {s['stages']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if producer is not None:
+            stop.set()
+            producer.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Scrolling log view for rows arriving at frame rate: a ring buffer of raw records, shown through a
+Text widget that only ever holds the rows on screen.
+
+extend() stores records (no formatting, no Tk calls) and schedules at most one redraw per idle
+cycle. The redraw formats just the visible rows and replaces the widget's few dozen lines, so its
+cost depends on the window height, not on the frame rate or the history kept; while the view is
+not mapped (its tab is hidden) nothing is drawn at all. The scrollbar, mouse wheel and
+Page Up/Down, Home and End move through the whole ring.
+
+Follow keeps the newest rows in view. Scrolling back or finding a match turns it off; scrolling
+to the end or ticking Follow turns it on again. Find formats rows one at a time from the current
+position and stops at the next (Return) or previous (Shift+Return) row containing the text.
+
+Usage:
+    log = PacketLogView(parent, format_row, capacity=5000, title="Packet Log")
+    log.pack(fill=tk.BOTH, expand=True)
+    log.extend(records)   # Tk thread, e.g. once per frame
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+from collections import deque
+from tkinter import ttk
+
+WHEEL_ROWS = 3
+
+
+class PacketLogView:
+    def __init__(self, parent, format_row, capacity=5000, title=None, empty_text="", font=("Courier New", 10)):
+        self.format_row = format_row
+        self.rows = deque(maxlen=capacity)
+        self.appended = 0  # Rows ever appended; absolute row n is self.rows[n - self.first_row]
+        self.top = 0  # Absolute row shown on the first line
+        self.empty_text = empty_text
+        self.follow = tk.BooleanVar(value=True)
+        self.search_var = tk.StringVar()
+        self._match = None  # Absolute row of the last find() hit
+        self._redraw_pending = False
+        self._linespace = tkfont.Font(font=font).metrics('linespace')
+
+        self.frame = tk.Frame(parent, bg="black")
+        controls = tk.Frame(self.frame, bg="black")
+        controls.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        if title:
+            tk.Label(controls, text=title, fg="#61dafb", bg="black", font=("Arial", 12, "bold")).pack(side=tk.LEFT)
+        tk.Checkbutton(controls, text="Follow", variable=self.follow, command=self._schedule_redraw, fg="white",
+                       bg="black", selectcolor="black", activebackground="black",
+                       activeforeground="white").pack(side=tk.LEFT, padx=10)
+        search_entry = tk.Entry(controls, textvariable=self.search_var, width=24, bg="#282c34", fg="white",
+                                relief=tk.FLAT, insertbackground="white")
+        search_entry.pack(side=tk.LEFT, padx=(10, 2))
+        search_entry.bind('<Return>', lambda e: self.find())
+        search_entry.bind('<Shift-Return>', lambda e: self.find(backwards=True))
+        for text, backwards in (("Find", False), ("Prev", True)):
+            tk.Button(controls, text=text, command=lambda b=backwards: self.find(backwards=b), bg="#282c34",
+                      fg="white", relief=tk.FLAT, padx=5).pack(side=tk.LEFT, padx=2)
+        self.status_label = tk.Label(controls, text="", fg="#aaaaaa", bg="black", font=("Arial", 9))
+        self.status_label.pack(side=tk.RIGHT)
+
+        body = tk.Frame(self.frame, bg="black")
+        body.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        body.grid_columnconfigure(0, weight=1)
+        body.grid_rowconfigure(0, weight=1)
+        self.text = tk.Text(body, wrap=tk.NONE, bg="#1c1e22", fg="white", font=font, relief=tk.FLAT, borderwidth=0,
+                            height=1)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        x_scrollbar = ttk.Scrollbar(body, orient="horizontal", command=self.text.xview)
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.text.config(xscrollcommand=x_scrollbar.set, state=tk.DISABLED)
+        self.text.tag_configure('match', background="#61afef", foreground="black")
+
+        self.text.bind('<Configure>', lambda e: self._schedule_redraw())
+        self.text.bind('<Map>', lambda e: self._schedule_redraw())
+        self.text.bind('<Button-1>', lambda e: self.text.focus_set())
+        self.text.bind('<MouseWheel>', lambda e: self.scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.text.bind('<Button-4>', lambda e: self.scroll(-WHEEL_ROWS))  # X11 wheel
+        self.text.bind('<Button-5>', lambda e: self.scroll(WHEEL_ROWS))
+        self.text.bind('<Prior>', lambda e: self.scroll(-self.visible_row_count()))
+        self.text.bind('<Next>', lambda e: self.scroll(self.visible_row_count()))
+        self.text.bind('<Home>', lambda e: self._move(self.first_row))
+        self.text.bind('<End>', lambda e: self._move(self.appended))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    @property
+    def first_row(self):
+        return self.appended - len(self.rows)
+
+    def visible_row_count(self):
+        return max(1, self.text.winfo_height() // self._linespace)
+
+    # --- Data ---
+
+    def extend(self, records):
+        self.rows.extend(records)
+        self.appended += len(records)
+        self._schedule_redraw()
+
+    def clear(self):
+        self.rows.clear()
+        self.appended = self.top = 0
+        self._match = None
+        self._schedule_redraw()
+
+    # --- Navigation ---
+
+    def scroll(self, rows):
+        self._move(self.top + rows)
+
+    def _move(self, top):
+        self.top = top
+        self.follow.set(top >= self.appended - self.visible_row_count())  # Back at the end: follow again
+        self._schedule_redraw()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self._move(self.first_row + int(float(value) * len(self.rows)))
+        elif action == 'scroll':
+            self.scroll(int(value) * (self.visible_row_count() if unit == 'pages' else 1))
+
+    def find(self, backwards=False):
+        """Shows the next (or previous) row containing the search text; returns its absolute row or None."""
+        needle = self.search_var.get().lower()
+        if not needle or not self.rows:
+            return None
+        first, rows = self.first_row, list(self.rows)
+        if self._match is not None and first <= self._match < self.appended:
+            start = self._match - first
+        elif backwards:
+            start = min(self.top + self.visible_row_count(), self.appended) - first
+        else:
+            start = self.top - first - 1
+        step = -1 if backwards else 1
+        for offset in range(1, len(rows) + 1):
+            index = (start + step * offset) % len(rows)
+            if needle in self.format_row(rows[index]).lower():
+                self._match = first + index
+                self.follow.set(False)
+                self.top = self._match - self.visible_row_count() // 2
+                self._schedule_redraw()
+                return self._match
+        self._match = None
+        self.status_label.config(text=f"'{self.search_var.get()}' not found")
+        return None
+
+    # --- Drawing ---
+
+    def _schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.text.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        if not self.text.winfo_ismapped():
+            return  # <Map> brings it up to date when the tab is shown
+        count = self.visible_row_count()
+        first, end = self.first_row, self.appended
+        last_top = max(first, end - count)
+        self.top = last_top if self.follow.get() else min(max(self.top, first), last_top)
+        rows = self.rows
+        lines = [self.format_row(rows[n - first]) for n in range(self.top, min(self.top + count, end))]
+
+        text = self.text
+        x_position = text.xview()[0]
+        text.config(state=tk.NORMAL)
+        text.delete('1.0', tk.END)
+        text.insert('1.0', '\n'.join(lines) if lines else self.empty_text)
+        if self._match is not None and self.top <= self._match < self.top + len(lines):
+            line = self._match - self.top + 1
+            text.tag_add('match', f'{line}.0', f'{line}.end')
+        text.config(state=tk.DISABLED)
+        text.xview_moveto(x_position)
+
+        if rows:
+            self.scrollbar.set((self.top - first) / len(rows), (self.top - first + len(lines)) / len(rows))
+            self.status_label.config(text=f"rows {self.top + 1}-{self.top + len(lines)} of {first + 1}-{end}"
+                                          f"{'' if self.follow.get() else '  (paused)'}")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.status_label.config(text="")
@@ -0,0 +1,203 @@
+"""
+Frame-loop instrumentation: per-stage latency histograms and feed counters in fixed memory,
+served in Prometheus text format and/or summarized periodically on stderr.
+
+The producer calls begin_frame(missed), then lap(stage) after each stage (the time since the
+previous mark goes to that stage's histogram), then end_frame(bytes_sent). Marks are per thread:
+another thread (the Tk thread drawing the views) calls mark() and then laps its own stages. Each
+call is a perf_counter_ns() read plus one histogram increment (octa13_latency.LatencyHistogram), a
+couple of microseconds, so the instrumentation can stay on. NULL_METRICS has the same methods and
+does nothing.
+
+Exported series (prefix octa13_):
+    stage_seconds{stage=...}   histogram per stage, plus stage="frame" for the whole frame
+    frames_total, bytes_sent_total, dropped_frames_total   counters
+    clients, frames_per_second, bytes_per_second           gauges (rates over the last ~10 s)
+
+Dropped frames are the frame slots the producer's fixed-rate clock skipped (octa13_clock.py),
+i.e. the deadlines the feed could not keep.
+
+Usage:
+    python "Symbolic TCP Simulator.py" --metrics-port 9464 --metrics-summary 10
+    curl -s localhost:9464/metrics
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from octa13_latency import LatencyHistogram
+
+DEFAULT_METRICS_PORT = 9464
+# Prometheus bucket bounds (seconds) the fine-grained histograms are folded into on export
+EXPORT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                  1.0, 2.5)
+RATE_WINDOW_SLOTS = 11  # One-second snapshots; rates span the last 10 s
+
+
+class FrameLoopMetrics:
+    def __init__(self, stages, client_count=None):
+        self.stages = tuple(stages)
+        self.client_count = client_count  # Callable read at export time, e.g. lambda: broadcaster.client_count
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages + ('frame',)}
+        self.frames = 0
+        self.bytes_sent = 0
+        self.dropped_frames = 0
+        self._frame_start = 0
+        self._local = threading.local()
+        self._rate_times = np.zeros(RATE_WINDOW_SLOTS)
+        self._rate_frames = np.zeros(RATE_WINDOW_SLOTS, dtype=np.int64)
+        self._rate_bytes = np.zeros(RATE_WINDOW_SLOTS, dtype=np.int64)
+        self._rate_slots = 0
+        self._next_rate_sample = 0.0
+        # Bucket upper bounds of LatencyHistogram, for folding into EXPORT_BUCKETS
+        probe = LatencyHistogram()
+        shifts = np.maximum(np.arange(len(probe.counts)) // 16 - 1, 0)
+        self._bucket_upper_ns = ((np.arange(len(probe.counts)) - shifts * 16 + 1) << shifts) - 1
+
+    def begin_frame(self, missed=0):
+        """Starts a frame; `missed` is the number of frame slots skipped since the previous one."""
+        self.dropped_frames += missed
+        self._frame_start = self._local.mark = time.perf_counter_ns()
+
+    def mark(self):
+        """Starts timing stages on the calling thread without starting a frame."""
+        self._local.mark = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        local = self._local
+        self.histograms[stage].record_value(now - local.mark)
+        local.mark = now
+
+    def end_frame(self, bytes_sent=0):
+        now = time.perf_counter_ns()
+        self.histograms['frame'].record_value(now - self._frame_start)
+        self.frames += 1
+        self.bytes_sent += bytes_sent
+        seconds = now / 1e9
+        if seconds >= self._next_rate_sample:
+            self._next_rate_sample = seconds + 1.0
+            slot = self._rate_slots % RATE_WINDOW_SLOTS
+            self._rate_times[slot] = seconds
+            self._rate_frames[slot] = self.frames
+            self._rate_bytes[slot] = self.bytes_sent
+            self._rate_slots += 1
+
+    def rates(self):
+        """(frames/s, bytes/s) over the snapshot window."""
+        available = min(self._rate_slots, RATE_WINDOW_SLOTS)
+        if available < 2:
+            return 0.0, 0.0
+        newest = (self._rate_slots - 1) % RATE_WINDOW_SLOTS
+        oldest = self._rate_slots % RATE_WINDOW_SLOTS if available == RATE_WINDOW_SLOTS else 0
+        elapsed = self._rate_times[newest] - self._rate_times[oldest]
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return ((self._rate_frames[newest] - self._rate_frames[oldest]) / elapsed,
+                (self._rate_bytes[newest] - self._rate_bytes[oldest]) / elapsed)
+
+    def clients(self):
+        return self.client_count() if self.client_count is not None else 0
+
+    # --- Export ---
+
+    def prometheus_text(self):
+        lines = ['# HELP octa13_stage_seconds Time spent in each frame-loop stage.',
+                 '# TYPE octa13_stage_seconds histogram']
+        for stage, histogram in self.histograms.items():
+            counts = histogram.counts.copy()  # Snapshot; the frame loop keeps writing
+            cumulative = np.cumsum(counts)
+            total = int(cumulative[-1])
+            for bound in EXPORT_BUCKETS:
+                index = int(np.searchsorted(self._bucket_upper_ns, bound * 1e9, side='right'))
+                below = int(cumulative[index - 1]) if index else 0
+                lines.append(f'octa13_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {below}')
+            lines.append(f'octa13_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {total}')
+            lines.append(f'octa13_stage_seconds_sum{{stage="{stage}"}} {histogram.total_ns / 1e9:.9f}')
+            lines.append(f'octa13_stage_seconds_count{{stage="{stage}"}} {total}')
+        frames_per_s, bytes_per_s = self.rates()
+        for name, kind, value, help_text in (
+                ('frames_total', 'counter', self.frames, 'Frames produced.'),
+                ('bytes_sent_total', 'counter', self.bytes_sent, 'Wire bytes emitted.'),
+                ('dropped_frames_total', 'counter', self.dropped_frames, 'Frame slots missed by the loop.'),
+                ('clients', 'gauge', self.clients(), 'Connected TCP clients.'),
+                ('frames_per_second', 'gauge', round(frames_per_s, 3), 'Frame rate over the last 10 s.'),
+                ('bytes_per_second', 'gauge', round(bytes_per_s, 1), 'Output rate over the last 10 s.')):
+            lines += [f'# HELP octa13_{name} {help_text}', f'# TYPE octa13_{name} {kind}', f'octa13_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def summary_line(self):
+        frames_per_s, bytes_per_s = self.rates()
+        stages = '  '.join(f"{stage} {h.percentile(50) / 1000:.0f}/{h.percentile(99) / 1000:.0f}"
+                           for stage, h in self.histograms.items() if h.count)
+        return (f"[Metrics] {frames_per_s:.1f} frames/s  {bytes_per_s / 1000:.1f} kB/s  clients {self.clients()}  "
+                f"dropped {self.dropped_frames}  p50/p99 us: {stages}")
+
+
+class _NullMetrics:
+    """Stand-in when instrumentation is off; the frame loop calls it unconditionally."""
+
+    def begin_frame(self, missed=0):
+        pass
+
+    def mark(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end_frame(self, bytes_sent=0):
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+
+
+class MetricsServer:
+    """Serves metrics.prometheus_text() on http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, metrics, host='127.0.0.1', port=DEFAULT_METRICS_PORT):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[Metrics] Serving http://{host}:{self.httpd.server_address[1]}/metrics")
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MetricsReporter:
+    """Writes metrics.summary_line() to stderr (or `stream`) every `interval` seconds."""
+
+    def __init__(self, metrics, interval, stream=None):
+        self.metrics = metrics
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            print(self.metrics.summary_line(), file=self.stream, flush=True)
+
+    def close(self):
+        self._stop.set()
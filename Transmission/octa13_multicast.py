@@ -0,0 +1,339 @@
+"""
+UDP multicast publishing of the Octa13 frame feed.
+
+One publisher sends each frame once to a multicast group, so egress cost does not grow with the
+number of subscribers. Frames larger than a datagram are fragmented; every datagram carries a
+publisher-wide sequence number so receivers can detect gaps.
+
+Datagram header `<4sIIIHHB3x` (24 bytes):
+    magic b'O13M', datagram sequence, frame sequence, frame index, fragment index,
+    fragment count, flags (bit 0 = binary payload, bit 1 = retransmission)
+
+Repair: the publisher keeps its most recent datagrams in a bounded buffer and listens for NAKs
+(`<4sII` = b'O13N', first missing sequence, count) on the same socket it sends from. Receivers
+send NAKs from a private unicast socket to the source address of the datagrams they receive, and
+repairs come back unicast to that socket, so one lossy receiver does not cost the others anything.
+A gap is tracked and NAKed only for its last `restart_window` datagrams (the publisher's history by
+default); anything older cannot be repaired and is counted lost at once. A publisher restart (a new
+source address, or sequences jumping back by more than `restart_window`) resets the receiver.
+
+Usage:
+    python "Symbolic TCP Simulator.py" --multicast 239.13.13.13:9913
+    python octa13_multicast.py 239.13.13.13:9913 [--iface 127.0.0.1]
+"""
+import argparse
+import collections
+import select
+import socket
+import struct
+import threading
+import time
+
+DATAGRAM_HEADER = struct.Struct('<4sIIIHHB3x')
+NAK_MESSAGE = struct.Struct('<4sII')
+DATAGRAM_MAGIC = b'O13M'
+NAK_MAGIC = b'O13N'
+FLAG_BINARY = 0x01
+FLAG_RETRANSMIT = 0x02
+
+DEFAULT_GROUP = '239.13.13.13'
+DEFAULT_PORT = 9913
+DEFAULT_MAX_PAYLOAD = 1400  # Keeps datagrams under a typical 1500-byte MTU
+DEFAULT_HISTORY = 8192
+
+
+def parse_group(address):
+    """Parses 'GROUP:PORT' (port optional) into (group, port)."""
+    group, _, port = address.partition(':')
+    return group or DEFAULT_GROUP, int(port) if port else DEFAULT_PORT
+
+
+def _seq_delta(a, b):
+    """Signed distance a - b between two u32 sequence numbers."""
+    diff = (a - b) & 0xFFFFFFFF
+    return diff - 0x100000000 if diff >= 0x80000000 else diff
+
+
+class MulticastPublisher:
+    def __init__(self, group=DEFAULT_GROUP, port=DEFAULT_PORT, iface='127.0.0.1', ttl=1,
+                 max_payload=DEFAULT_MAX_PAYLOAD, history=DEFAULT_HISTORY):
+        self.destination = (group, port)
+        self.max_payload = max_payload
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if iface:
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface))
+        self.sock.bind((iface or '', 0))  # Ephemeral port: receivers NAK to the source address
+
+        self.sequence = 0
+        self.frame_sequence = 0
+        self.datagrams_sent = 0
+        self.bytes_sent = 0
+        self.retransmissions = 0
+        self.naks_received = 0
+        self._history = collections.OrderedDict()
+        self._history_size = history
+        self._lock = threading.Lock()
+        self._running = True
+        threading.Thread(target=self._serve_naks, daemon=True).start()
+        print(f"[Multicast] Publishing to {group}:{port} from {self.sock.getsockname()[0]}:{self.sock.getsockname()[1]}")
+
+    def publish(self, frame_index, payload, is_binary=True):
+        """Sends one frame, fragmenting it over as many datagrams as needed."""
+        chunks = [payload[i:i + self.max_payload] for i in range(0, len(payload), self.max_payload)] or [b'']
+        flags = FLAG_BINARY if is_binary else 0
+        with self._lock:
+            self.frame_sequence = (self.frame_sequence + 1) & 0xFFFFFFFF
+            for frag_index, chunk in enumerate(chunks):
+                self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+                datagram = DATAGRAM_HEADER.pack(DATAGRAM_MAGIC, self.sequence, self.frame_sequence, frame_index,
+                                                frag_index, len(chunks), flags) + chunk
+                self._history[self.sequence] = datagram
+                if len(self._history) > self._history_size:
+                    self._history.popitem(last=False)
+                try:
+                    self.sock.sendto(datagram, self.destination)
+                except OSError:
+                    continue  # Dropped like any other datagram; receivers will NAK it
+                self.datagrams_sent += 1
+                self.bytes_sent += len(datagram)
+
+    def _serve_naks(self):
+        while self._running:
+            try:
+                message, addr = self.sock.recvfrom(64)
+            except OSError:
+                break
+            if len(message) != NAK_MESSAGE.size:
+                continue
+            magic, first, count = NAK_MESSAGE.unpack(message)
+            if magic != NAK_MAGIC:
+                continue
+            self.naks_received += 1
+            with self._lock:
+                repairs = []
+                for offset in range(min(count, 1024)):
+                    datagram = self._history.get((first + offset) & 0xFFFFFFFF)
+                    if datagram is not None:
+                        # Mark as a retransmission so receivers can tell repairs from reordering.
+                        repairs.append(datagram[:20] + bytes([datagram[20] | FLAG_RETRANSMIT]) + datagram[21:])
+            for datagram in repairs:
+                try:
+                    self.sock.sendto(datagram, addr)
+                    self.retransmissions += 1
+                except OSError:
+                    break
+
+    def close(self):
+        self._running = False
+        self.sock.close()
+
+
+class MulticastReceiver:
+    """
+    Joins a group, reassembles frames and repairs gaps by NAKing the publisher.
+
+    recv_frame() returns completed frames as (frame_index, is_binary, payload). Frames complete in
+    arrival order, so a repaired frame can be delivered after frames that followed it; use
+    frame_index to reorder if needed. `stats()` reports gaps, repairs and losses.
+    """
+
+    def __init__(self, group=DEFAULT_GROUP, port=DEFAULT_PORT, iface='127.0.0.1', request_repairs=True,
+                 nak_interval=0.02, max_naks=5, frame_timeout=1.0, restart_window=DEFAULT_HISTORY):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind(('', port))
+        membership = socket.inet_aton(group) + socket.inet_aton(iface or '0.0.0.0')
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        # Repairs need their own socket: unicast to a SO_REUSEPORT-shared port could land on another receiver.
+        self.repair_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.repair_sock.bind((iface or '', 0))
+
+        self.request_repairs = request_repairs
+        self.nak_interval = nak_interval
+        self.max_naks = max_naks
+        self.frame_timeout = frame_timeout
+        self.restart_window = restart_window
+
+        self.publisher_addr = None
+        self.highest_sequence = None
+        self._missing = {}  # sequence -> [first_detected, last_nak, naks_sent]
+        self._partial = {}  # frame sequence -> [frame_index, flags, fragment count, {index: chunk}, first_seen]
+        self._completed = collections.deque()
+        self._recent_frames = collections.OrderedDict()  # Suppresses duplicate completions
+
+        self.datagrams_received = 0
+        self.duplicates = 0
+        self.gaps_detected = 0
+        self.datagrams_missing = 0
+        self.datagrams_recovered = 0
+        self.datagrams_lost = 0
+        self.frames_completed = 0
+        self.frames_incomplete = 0
+        self.restarts = 0
+
+    def _reset(self):
+        """Forgets the previous publisher's sequence space: its gaps, partial frames and completions."""
+        self.restarts += 1
+        self.highest_sequence = None
+        self.datagrams_lost += len(self._missing)
+        self.frames_incomplete += len(self._partial)
+        self._missing.clear()
+        self._partial.clear()
+        self._recent_frames.clear()
+
+    def _note_sequence(self, sequence, now, retransmit=False):
+        if self.highest_sequence is not None and not retransmit:
+            if _seq_delta(sequence, self.highest_sequence) < -self.restart_window:
+                self._reset()
+        if self.highest_sequence is None:
+            self.highest_sequence = sequence
+            return True
+        delta = _seq_delta(sequence, self.highest_sequence)
+        if delta > 0:
+            if delta > 1:
+                self.gaps_detected += 1
+                self.datagrams_missing += delta - 1
+                tracked = min(delta - 1, self.restart_window)
+                self.datagrams_lost += delta - 1 - tracked  # Already out of the publisher's history
+                first_missing = (sequence - tracked) & 0xFFFFFFFF
+                for offset in range(tracked):
+                    self._missing[(first_missing + offset) & 0xFFFFFFFF] = [now, 0.0, 0]
+                while len(self._missing) > self.restart_window:  # Oldest first: gaps are added in order
+                    del self._missing[next(iter(self._missing))]
+                    self.datagrams_lost += 1
+                self._send_nak(first_missing, tracked, now)
+            self.highest_sequence = sequence
+            return True
+        if sequence in self._missing:
+            del self._missing[sequence]
+            self.datagrams_recovered += 1
+            return True
+        self.duplicates += 1
+        return False
+
+    def _send_nak(self, first, count, now):
+        if not self.request_repairs or self.publisher_addr is None:
+            return
+        try:
+            self.repair_sock.sendto(NAK_MESSAGE.pack(NAK_MAGIC, first, count), self.publisher_addr)
+        except OSError:
+            return
+        for offset in range(count):
+            entry = self._missing.get((first + offset) & 0xFFFFFFFF)
+            if entry is not None:
+                entry[1] = now
+                entry[2] += 1
+
+    def _service_timers(self, now):
+        """Re-NAKs outstanding gaps, gives up on old ones and expires stale partial frames."""
+        retry = []
+        for sequence, (detected, last_nak, naks_sent) in list(self._missing.items()):
+            if naks_sent >= self.max_naks or now - detected > self.frame_timeout:
+                del self._missing[sequence]
+                self.datagrams_lost += 1
+            elif now - last_nak >= self.nak_interval:
+                retry.append(sequence)
+        for sequence in retry:
+            self._send_nak(sequence, 1, now)
+        for frame_sequence, partial in list(self._partial.items()):
+            if now - partial[4] > self.frame_timeout:
+                del self._partial[frame_sequence]
+                self.frames_incomplete += 1
+
+    def _handle_datagram(self, datagram, addr, now):
+        if len(datagram) < DATAGRAM_HEADER.size:
+            return
+        magic, sequence, frame_sequence, frame_index, frag_index, frag_count, flags = \
+            DATAGRAM_HEADER.unpack_from(datagram)
+        if magic != DATAGRAM_MAGIC or frag_index >= frag_count:
+            return
+        retransmit = bool(flags & FLAG_RETRANSMIT)
+        if not retransmit:
+            if self.publisher_addr is not None and addr != self.publisher_addr:
+                self._reset()  # A different socket: the publisher restarted and its sequences did too
+            self.publisher_addr = addr
+        self.datagrams_received += 1
+        if not self._note_sequence(sequence, now, retransmit) or frame_sequence in self._recent_frames:
+            return
+
+        partial = self._partial.get(frame_sequence)
+        if partial is None:
+            partial = self._partial[frame_sequence] = [frame_index, flags, frag_count, {}, now]
+        partial[3][frag_index] = datagram[DATAGRAM_HEADER.size:]
+        if len(partial[3]) == frag_count:
+            del self._partial[frame_sequence]
+            payload = b''.join(partial[3][i] for i in range(frag_count))
+            self._completed.append((frame_index, bool(flags & FLAG_BINARY), payload))
+            self.frames_completed += 1
+            self._recent_frames[frame_sequence] = True
+            if len(self._recent_frames) > 4096:
+                self._recent_frames.popitem(last=False)
+
+    def recv_frame(self, timeout=None):
+        """Blocks until a frame completes (or timeout expires, returning None)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._completed:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return None
+            wait = self.nak_interval if self._missing or self._partial else 0.5
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            readable, _, _ = select.select((self.sock, self.repair_sock), (), (), max(wait, 0.001))
+            for sock in readable:
+                try:
+                    datagram, addr = sock.recvfrom(65536)
+                except OSError:
+                    continue
+                self._handle_datagram(datagram, addr, time.monotonic())
+            self._service_timers(time.monotonic())
+        return self._completed.popleft()
+
+    def stats(self):
+        return {
+            'datagrams_received': self.datagrams_received, 'duplicates': self.duplicates,
+            'gaps_detected': self.gaps_detected, 'datagrams_missing': self.datagrams_missing,
+            'datagrams_recovered': self.datagrams_recovered, 'datagrams_lost': self.datagrams_lost,
+            'datagrams_outstanding': len(self._missing), 'frames_completed': self.frames_completed,
+            'frames_incomplete': self.frames_incomplete, 'restarts': self.restarts,
+        }
+
+    def close(self):
+        self.sock.close()
+        self.repair_sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receive the Octa13 multicast feed and report gap statistics.")
+    parser.add_argument('address', nargs='?', default=f"{DEFAULT_GROUP}:{DEFAULT_PORT}", help="GROUP:PORT")
+    parser.add_argument('--iface', default='127.0.0.1', help="Local interface address to join on.")
+    parser.add_argument('--no-repair', action='store_true', help="Detect gaps without requesting retransmission.")
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between reports.")
+    args = parser.parse_args(argv)
+
+    group, port = parse_group(args.address)
+    receiver = MulticastReceiver(group, port, iface=args.iface, request_repairs=not args.no_repair)
+    print(f"[Multicast] Joined {group}:{port} on {args.iface}")
+    window_start = time.monotonic()
+    frames = 0
+    try:
+        while True:
+            if receiver.recv_frame(timeout=args.interval) is not None:
+                frames += 1
+            now = time.monotonic()
+            if now - window_start >= args.interval:
+                print(f"[Multicast] {frames / (now - window_start):8.1f} frames/s  {receiver.stats()}")
+                window_start, frames = now, 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
+
+
+if __name__ == "__main__":
+    main()
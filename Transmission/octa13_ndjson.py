@@ -0,0 +1,64 @@
+"""
+Fast NDJSON serialization for the JSON feed.
+
+Symbols, colors and spins come from a fixed 8-entry alphabet, so the JSON text for every
+(symbol, color, spin) combination is built once up front; a packet is then a handful of string
+joins instead of a dict plus a trip through the generic json encoder. The output is byte-for-byte
+what `json.dumps({'frame': ..., 'packets': [...]})` produced for the same frame.
+
+NDJSONBatcher groups serialized frames into fewer writes: it flushes once `batch_frames` lines are
+pending or, when `flush_interval` is set, once the oldest pending line is that many seconds old
+(checked as frames arrive; call flush() when the feed pauses).
+"""
+import json
+import time
+
+from octa13_protocol import symbols, colors, spins
+
+
+class NDJSONFrameSerializer:
+    def __init__(self):
+        # '"symbol": "\\u2b22", "color": "#FF0000", "spin": "\\u2192", ' for every index combination
+        self._glyph_fragments = {}
+        for symbol_idx, symbol_char in enumerate(symbols):
+            for color_idx, color_val in enumerate(colors):
+                for spin_idx, spin_char in enumerate(spins):
+                    self._glyph_fragments[(symbol_idx, color_idx, spin_idx)] = (
+                        f'"symbol": {json.dumps(symbol_char)}, "color": {json.dumps(color_val)}, '
+                        f'"spin": {json.dumps(spin_char)}, ')
+
+    def serialize_packet(self, packet):
+        return (f'{{"stream_id": {packet.stream_id}, '
+                f'{self._glyph_fragments[(packet.symbol_idx, packet.color_idx, packet.spin_idx)]}'
+                f'"u_coord": {float(packet.u_coord)!r}, "v_coord": {float(packet.v_coord)!r}, '
+                f'"is_overridden": {"true" if packet.is_overridden else "false"}, '
+                f'"frame_index": {packet.frame_index}}}')
+
+    def serialize_frame(self, frame_index, packets):
+        """Returns the frame as one JSON line (without the trailing newline)."""
+        serialize_packet = self.serialize_packet
+        return f'{{"frame": {frame_index}, "packets": [{", ".join([serialize_packet(p) for p in packets])}]}}'
+
+
+class NDJSONBatcher:
+    def __init__(self, write, batch_frames=1, flush_interval=None):
+        self.write = write
+        self.batch_frames = max(1, batch_frames)
+        self.flush_interval = flush_interval
+        self._lines = []
+        self._oldest = None
+
+    def add(self, line):
+        """Queues one newline-terminated frame and flushes if the policy says so."""
+        if not self._lines:
+            self._oldest = time.monotonic()
+        self._lines.append(line)
+        if len(self._lines) >= self.batch_frames or (
+                self.flush_interval is not None and time.monotonic() - self._oldest >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            data = ''.join(self._lines)
+            self._lines = []
+            self.write(data)
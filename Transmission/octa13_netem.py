@@ -0,0 +1,515 @@
+"""
+Network impairment proxy for testing Octa13 feed consumers on one machine.
+
+The proxy sits between a producer (the simulator's TCP feed, the multicast publisher) and its
+clients and degrades the path in a controlled, seeded way:
+
+    * delay: constant, uniform (delay +- jitter), normal (sigma = jitter) or pareto (heavy tail)
+    * loss: independent, or in bursts of a given mean length (two-state Gilbert model)
+    * reordering: like netem, a reordered unit skips the delay and overtakes the ones held ahead of it
+      (UDP datagrams are also reordered by jitter alone, since each gets its own delay)
+    * duplication
+    * rate limit: units leave no faster than the configured bit rate (serialization delay)
+    * queue limit: TCP stops reading upstream while the queue is full, so backpressure reaches the
+      producer as it would on a slow link; UDP tail-drops instead
+
+A TCP byte stream cannot lose bytes, so the TCP framing decides what loss means:
+    bytes   (default) lost chunks are retransmitted after --rto-ms and hold everything behind them
+    records 20-byte binary records are dropped, duplicated or reordered whole
+    lines   newline-delimited JSON frames are dropped, duplicated or reordered whole
+With records/lines, delay and reordering apply per read chunk and loss/duplication per record/line.
+
+Every TCP client gets its own upstream connection and an independent, reproducible random stream
+(seed + connection number). UDP datagrams are impaired individually; datagrams sent back by
+receivers (multicast NAKs) are passed upstream unimpaired.
+
+Usage:
+    python octa13_netem.py tcp --listen 9998 --target localhost:9999 --delay-ms 40 --jitter-ms 10 --rate-kbps 2000
+    python octa13_netem.py tcp --listen 9998 --target localhost:9999 --framing records --loss 0.01 --reorder 0.05
+    python octa13_netem.py udp --listen 239.13.13.13:9913 --target 239.13.13.14:9914 --loss 0.02 --loss-burst 4
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import random
+import socket
+
+from octa13_protocol import PACKET_DTYPE
+
+DISTRIBUTIONS = ('constant', 'uniform', 'normal', 'pareto')
+FRAMINGS = ('bytes', 'records', 'lines')
+PARETO_ALPHA = 2.5
+DEFAULT_RTO_MS = 200.0
+DEFAULT_QUEUE_KB = 1024
+READ_BYTES = 64 * 1024
+_COUNTERS = ('units', 'bytes', 'sent', 'bytes_sent', 'dropped', 'overflow', 'duplicated', 'reordered', 'retransmitted')
+
+
+def parse_address(address, default_host='localhost'):
+    """Parses 'HOST:PORT' or 'PORT' into (host, port)."""
+    host, _, port = address.rpartition(':')
+    return host or default_host, int(port)
+
+
+class ImpairmentProfile:
+    """Impairment settings plus the random state that draws from them."""
+
+    def __init__(self, delay_ms=0.0, jitter_ms=0.0, distribution='uniform', loss=0.0, loss_burst=1.0,
+                 reorder=0.0, duplicate=0.0, rate_kbps=0.0, queue_kb=DEFAULT_QUEUE_KB, rto_ms=DEFAULT_RTO_MS,
+                 seed=None):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown delay distribution '{distribution}'.")
+        if not 0.0 <= loss < 1.0:
+            raise ValueError("Loss must be in [0, 1).")
+        if loss_burst < 1.0:
+            raise ValueError("The mean loss burst length is at least 1.")
+        self.delay = delay_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.distribution = distribution
+        self.loss = loss
+        self.loss_burst = loss_burst
+        self.reorder = reorder
+        self.duplicate = duplicate
+        self.rate_bps = rate_kbps * 1000.0
+        self.queue_bytes = int(queue_kb * 1024)
+        self.rto = rto_ms / 1000.0
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Gilbert model: stationary share of the bad (dropping) state equals `loss`
+        self._leave_bad = 1.0 / loss_burst
+        self._enter_bad = loss * self._leave_bad / (1.0 - loss)
+        self._bad = False
+
+    def spawn(self, stream):
+        """A copy with its own random stream, e.g. one per proxied connection."""
+        seed = None if self.seed is None else self.seed + stream
+        return ImpairmentProfile(self.delay * 1000.0, self.jitter * 1000.0, self.distribution, self.loss,
+                                 self.loss_burst, self.reorder, self.duplicate, self.rate_bps / 1000.0,
+                                 self.queue_bytes / 1024, self.rto * 1000.0, seed)
+
+    def sample_delay(self):
+        rng = self.rng
+        if self.distribution == 'constant' or not self.jitter:
+            delay = self.delay
+        elif self.distribution == 'uniform':
+            delay = self.delay + rng.uniform(-self.jitter, self.jitter)
+        elif self.distribution == 'normal':
+            delay = rng.gauss(self.delay, self.jitter)
+        else:
+            delay = self.delay + self.jitter * (rng.paretovariate(PARETO_ALPHA) - 1.0)
+        return max(delay, 0.0)
+
+    def sample_loss(self):
+        if not self.loss:
+            return False
+        if self._bad:
+            if self.rng.random() < self._leave_bad:
+                self._bad = False
+        elif self.rng.random() < self._enter_bad:
+            self._bad = True
+        return self._bad
+
+    def sample_reorder(self):
+        return bool(self.reorder) and self.rng.random() < self.reorder
+
+    def sample_duplicate(self):
+        return bool(self.duplicate) and self.rng.random() < self.duplicate
+
+    def describe(self):
+        parts = [f"delay {self.delay * 1000:g} ms"]
+        if self.jitter:
+            parts.append(f"{self.distribution} jitter {self.jitter * 1000:g} ms")
+        if self.loss:
+            parts.append(f"loss {self.loss * 100:g}%" + (f" (bursts of {self.loss_burst:g})" if self.loss_burst > 1 else ''))
+        if self.reorder:
+            parts.append(f"reorder {self.reorder * 100:g}%")
+        if self.duplicate:
+            parts.append(f"duplicate {self.duplicate * 100:g}%")
+        if self.rate_bps:
+            parts.append(f"rate {self.rate_bps / 1000:g} kbit/s")
+        return ', '.join(parts)
+
+
+class ImpairedLink:
+    """
+    One direction of impaired delivery. submit() schedules units; run() sends each one when due,
+    through `send` (a coroutine function taking the bytes), no faster than the profile's rate.
+    In-order links (TCP byte streams) never let a unit overtake an earlier one; tail-drop links
+    (UDP) discard units that do not fit in the queue instead of relying on the sender to wait.
+    """
+
+    def __init__(self, profile, send, in_order=False, tail_drop=False):
+        self.profile = profile
+        self.send = send
+        self.in_order = in_order
+        self.tail_drop = tail_drop
+        self.queued_bytes = 0
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+        self._heap = []
+        self._order = itertools.count()
+        self._last_due = 0.0
+        self._link_free = 0.0
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._loop = asyncio.get_running_loop()
+
+    def submit(self, data, lost=False, duplicate=False):
+        """
+        Schedules one unit whose loss/duplication fate the caller has drawn. Returns False if it was
+        dropped (lost, or the tail-drop queue is full).
+        """
+        profile = self.profile
+        counters = self.counters
+        counters['units'] += 1
+        counters['bytes'] += len(data)
+        due = self._loop.time()
+        if self.in_order:
+            if lost:
+                due += profile.rto  # Retransmission; holds back everything queued after it
+                counters['retransmitted'] += 1
+            due = max(due + profile.sample_delay(), self._last_due)
+        else:
+            if lost:
+                counters['dropped'] += 1
+                return False
+            if self.tail_drop and self.queued_bytes + len(data) > profile.queue_bytes:
+                counters['overflow'] += 1
+                return False
+            if profile.sample_reorder():
+                counters['reordered'] += 1
+            else:
+                due += profile.sample_delay()
+            if duplicate:
+                counters['duplicated'] += 1
+                self._push(due + profile.sample_delay(), data)
+        self._push(due, data)
+        return True
+
+    def _push(self, due, data):
+        self._last_due = max(self._last_due, due)
+        heapq.heappush(self._heap, (due, next(self._order), data))
+        self.queued_bytes += len(data)
+        if self.queued_bytes > self.profile.queue_bytes:
+            self._space.clear()
+        if self._heap[0][2] is data:
+            self._wake.set()  # New earliest unit
+
+    def close(self):
+        """Ends run() once everything already scheduled has been sent."""
+        heapq.heappush(self._heap, (self._last_due, next(self._order), None))
+        self._wake.set()
+
+    async def wait_for_space(self):
+        await self._space.wait()
+
+    async def run(self):
+        loop = self._loop
+        rate = self.profile.rate_bps
+        while True:
+            if not self._heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            due = self._heap[0][0]
+            if due > loop.time():
+                self._wake.clear()
+                timer = loop.call_at(due, self._wake.set)
+                await self._wake.wait()
+                timer.cancel()
+                continue
+            _, _, data = heapq.heappop(self._heap)
+            if data is None:
+                return
+            if rate:
+                # Serialization: the unit is delivered once its last bit has left the link
+                finish = max(loop.time(), self._link_free) + len(data) * 8 / rate
+                self._link_free = finish
+                await asyncio.sleep(finish - loop.time())
+            await self.send(data)
+            self.queued_bytes -= len(data)
+            if self.queued_bytes <= self.profile.queue_bytes:
+                self._space.set()
+            self.counters['sent'] += 1
+            self.counters['bytes_sent'] += len(data)
+
+
+# --- TCP ---
+
+class _UnitSplitter:
+    """Cuts a TCP byte stream into whole records or lines, keeping partial units for the next chunk."""
+
+    def __init__(self, framing):
+        self.framing = framing
+        self._remainder = b''
+
+    def split(self, chunk):
+        data = self._remainder + chunk if self._remainder else chunk
+        if self.framing == 'records':
+            size = PACKET_DTYPE.itemsize
+            usable = len(data) - len(data) % size
+            self._remainder = data[usable:]
+            return [data[i:i + size] for i in range(0, usable, size)]
+        end = data.rfind(b'\n') + 1
+        self._remainder = data[end:]
+        return data[:end].splitlines(keepends=True)
+
+
+class TCPImpairmentProxy:
+    def __init__(self, listen_host, listen_port, target_host, target_port, profile, framing='bytes'):
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing '{framing}'.")
+        self.listen = (listen_host, listen_port)
+        self.target = (target_host, target_port)
+        self.profile = profile
+        self.framing = framing
+        self.links = []
+        self.connections = 0
+        self._closed_counters = dict.fromkeys(_COUNTERS, 0)  # Totals of links that have gone away
+
+    def totals(self):
+        """Counters summed over every link, including closed ones, plus the bytes queued right now."""
+        totals = dict(self._closed_counters)
+        for link in self.links:
+            for name, value in link.counters.items():
+                totals[name] += value
+        totals['queued_bytes'] = sum(link.queued_bytes for link in self.links)
+        return totals
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle_client, *self.listen)
+        print(f"[NetEm] TCP {self.listen[0]}:{self.listen[1]} -> {self.target[0]}:{self.target[1]} "
+              f"({self.framing}; {self.profile.describe()})")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(self, client_reader, client_writer):
+        peer = client_writer.get_extra_info('peername')
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(*self.target)
+        except OSError as e:
+            print(f"[NetEm] Cannot reach {self.target[0]}:{self.target[1]} for {peer}: {e}")
+            client_writer.close()
+            return
+        print(f"[NetEm] Proxying {peer}")
+        self.connections += 1
+
+        async def send(data):
+            client_writer.write(data)
+            await client_writer.drain()
+
+        link = ImpairedLink(self.profile.spawn(self.connections), send, in_order=self.framing == 'bytes')
+        self.links.append(link)
+        tasks = [asyncio.create_task(link.run()),
+                 asyncio.create_task(self._pump_down(upstream_reader, link)),
+                 asyncio.create_task(self._pump_up(client_reader, upstream_writer))]
+        try:
+            await asyncio.wait(tasks[0::2], return_when=asyncio.FIRST_COMPLETED)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for writer in (client_writer, upstream_writer):
+                writer.close()
+            self.links.remove(link)
+            for name, value in link.counters.items():
+                self._closed_counters[name] += value
+            print(f"[NetEm] Closed {peer}")
+
+    async def _pump_down(self, reader, link):
+        """Producer -> client, through the impaired link. Pauses reading while the link queue is full."""
+        splitter = _UnitSplitter(self.framing) if self.framing != 'bytes' else None
+        profile = link.profile
+        read_bytes = max(1, min(READ_BYTES, profile.queue_bytes))
+        while True:
+            await link.wait_for_space()
+            chunk = await reader.read(read_bytes)
+            if not chunk:
+                break
+            if splitter is None:
+                link.submit(chunk, lost=profile.sample_loss())
+                continue
+            kept = []
+            for unit in splitter.split(chunk):
+                if profile.sample_loss():
+                    link.counters['dropped'] += 1
+                    continue
+                kept.append(unit)
+                if profile.sample_duplicate():
+                    link.counters['duplicated'] += 1
+                    kept.append(unit)
+            if kept:
+                link.submit(b''.join(kept))
+        link.close()
+
+    @staticmethod
+    async def _pump_up(reader, writer):
+        """Client -> producer, unimpaired (the feed protocols barely use this direction)."""
+        while True:
+            data = await reader.read(READ_BYTES)
+            if not data:
+                return
+            writer.write(data)
+            await writer.drain()
+
+
+# --- UDP ---
+
+class _DatagramHandler(asyncio.DatagramProtocol):
+    def __init__(self, handle):
+        self.handle = handle
+
+    def datagram_received(self, data, addr):
+        self.handle(data, addr)
+
+
+def _is_multicast(host):
+    try:
+        return 224 <= int(socket.inet_aton(host)[0]) <= 239
+    except OSError:
+        return False
+
+
+class UDPImpairmentProxy:
+    def __init__(self, listen_host, listen_port, target_host, target_port, profile, iface='127.0.0.1', ttl=1):
+        self.listen = (listen_host, listen_port)
+        self.target = (target_host, target_port)
+        self.profile = profile
+        self.iface = iface
+        self.ttl = ttl
+        self.upstream = None  # Last source of forward datagrams; replies from receivers go back there
+        self.replies = 0
+        self.link = None
+        self._in = self._out = None
+
+    def _listen_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        host, port = self.listen
+        if _is_multicast(host):
+            if hasattr(socket, 'SO_REUSEPORT'):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(('', port))
+            membership = socket.inet_aton(host) + socket.inet_aton(self.iface or '0.0.0.0')
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        else:
+            sock.bind((host, port))
+        return sock
+
+    def _send_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        if _is_multicast(self.target[0]):
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            if self.iface:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.iface))
+        sock.bind((self.iface or '', 0))
+        return sock
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self._in, _ = await loop.create_datagram_endpoint(lambda: _DatagramHandler(self._forward),
+                                                          sock=self._listen_socket())
+        self._out, _ = await loop.create_datagram_endpoint(lambda: _DatagramHandler(self._reply),
+                                                           sock=self._send_socket())
+
+        async def send(data):
+            self._out.sendto(data, self.target)
+
+        self.link = ImpairedLink(self.profile, send, tail_drop=True)
+        print(f"[NetEm] UDP {self.listen[0]}:{self.listen[1]} -> {self.target[0]}:{self.target[1]} "
+              f"({self.profile.describe()})")
+        try:
+            await self.link.run()
+        finally:
+            self._in.close()
+            self._out.close()
+
+    def totals(self):
+        totals = dict(self.link.counters) if self.link is not None else dict.fromkeys(_COUNTERS, 0)
+        totals['queued_bytes'] = self.link.queued_bytes if self.link is not None else 0
+        totals['replies'] = self.replies
+        return totals
+
+    def _forward(self, data, addr):
+        self.upstream = addr
+        self.link.submit(data, lost=self.profile.sample_loss(), duplicate=self.profile.sample_duplicate())
+
+    def _reply(self, data, addr):
+        if self.upstream is not None:
+            self.replies += 1
+            self._in.sendto(data, self.upstream)
+
+
+# --- CLI ---
+
+def _print_totals(totals, rate_kbps=None):
+    line = (f"[NetEm] in {totals['units']}  out {totals['sent']}  dropped {totals['dropped']}  "
+            f"overflow {totals['overflow']}  dup {totals['duplicated']}  reordered {totals['reordered']}  "
+            f"retransmitted {totals['retransmitted']}  queue {totals['queued_bytes'] / 1024:.1f} KB")
+    print(line + (f"  {rate_kbps:.1f} kbit/s" if rate_kbps is not None else ''))
+
+
+async def _report(proxy, interval):
+    loop = asyncio.get_running_loop()
+    last_bytes, last_time = 0, loop.time()
+    while True:
+        await asyncio.sleep(interval)
+        totals = proxy.totals()
+        now = loop.time()
+        _print_totals(totals, (totals['bytes_sent'] - last_bytes) * 8 / (now - last_time) / 1000.0)
+        last_bytes, last_time = totals['bytes_sent'], now
+
+
+async def _run(proxy, interval):
+    reporter = asyncio.create_task(_report(proxy, interval))
+    try:
+        await proxy.serve()
+    finally:
+        reporter.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Impair an Octa13 feed (delay, loss, reordering, rate) on its way "
+                                                 "to clients.")
+    parser.add_argument('protocol', choices=('tcp', 'udp'))
+    parser.add_argument('--listen', required=True, help="[HOST:]PORT clients connect to (UDP: may be a multicast group).")
+    parser.add_argument('--target', required=True, help="HOST:PORT of the producer (UDP: where to forward).")
+    parser.add_argument('--delay-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--loss', type=float, default=0.0, help="Loss probability (0-1).")
+    parser.add_argument('--loss-burst', type=float, default=1.0, help="Mean length of loss bursts.")
+    parser.add_argument('--reorder', type=float, default=0.0, help="Probability that a unit skips the delay.")
+    parser.add_argument('--duplicate', type=float, default=0.0, help="Duplication probability (0-1).")
+    parser.add_argument('--rate-kbps', type=float, default=0.0, help="Bandwidth cap (0 = unlimited).")
+    parser.add_argument('--queue-kb', type=float, default=DEFAULT_QUEUE_KB, help="Queue limit of each link.")
+    parser.add_argument('--framing', choices=FRAMINGS, default='bytes', help="TCP: what loss and reordering act on.")
+    parser.add_argument('--rto-ms', type=float, default=DEFAULT_RTO_MS, help="TCP bytes framing: retransmission delay.")
+    parser.add_argument('--iface', default='127.0.0.1', help="UDP: interface for multicast.")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible impairments.")
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between reports.")
+    args = parser.parse_args(argv)
+
+    profile = ImpairmentProfile(args.delay_ms, args.jitter_ms, args.distribution, args.loss, args.loss_burst,
+                                args.reorder, args.duplicate, args.rate_kbps, args.queue_kb, args.rto_ms, args.seed)
+    listen_host, listen_port = parse_address(args.listen, default_host='localhost' if args.protocol == 'tcp' else '')
+    target_host, target_port = parse_address(args.target)
+    if args.protocol == 'tcp':
+        proxy = TCPImpairmentProxy(listen_host, listen_port, target_host, target_port, profile, args.framing)
+    else:
+        proxy = UDPImpairmentProxy(listen_host, listen_port, target_host, target_port, profile, args.iface)
+    try:
+        asyncio.run(_run(proxy, args.interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _print_totals(proxy.totals())
+
+
+if __name__ == "__main__":
+    main()
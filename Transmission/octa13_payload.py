@@ -0,0 +1,282 @@
+"""
+Byte payloads carried in the solid-capacity slots of the Octa13 octaves (README, "Bit-Rate Calculation").
+
+Every stream passes through 8 solid slots per octave (cycle), cycling through the 13 solids in order:
+octave c holds solids (8c + j) % 13 for j = 0..7. After PERIOD_CYCLES = 13 octaves each solid has
+been used 8 times, so one period carries 8 * 1958 bits = 1958 bytes per stream, an average of
+1,204.92 bits per stream per octave, or 4,819.69 bits per cycle over 4 streams.
+
+Layout: the payload is cut into periods of PERIOD_STREAM_BYTES * num_streams bytes; stream s
+carries bytes [s * 1958, (s + 1) * 1958) of each period, bit by bit (MSB first) through its 104 slots
+in order. The unit on the wire is one stream's octave: the bits of its 8 slots, zero-padded to a
+whole byte (octave_bytes(cycle)). The encoder therefore works on whole periods as one reshape and
+13 bit slices, for any number of periods at once.
+
+The payload is closed by an 8-byte little-endian length in the last bytes of the final period
+(zero padding before it), so neither side needs to know the length up front: PayloadEncoder and
+PayloadDecoder take the payload in chunks of any size, and the decoder holds back the last period
+(and the 8 bytes before it, where up to 7 bytes of padding can fall) until finish().
+
+Usage:
+    python octa13_payload.py [--streams 4] [--size-mb 64 | --input FILE]   # round trip, goodput, MB/s
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+# (name, capacity in bits) in octave order, as listed in the README. The README's snub dodecahedron
+# figure (266) is kept as is so the rates match it, although its V+E+F is 302.
+SOLIDS = (('Truncated tetrahedron', 38), ('Cuboctahedron', 50), ('Truncated cube', 74),
+          ('Truncated octahedron', 74), ('Small rhombicuboctahedron', 98), ('Great rhombicuboctahedron', 146),
+          ('Snub cube', 122), ('Icosidodecahedron', 122), ('Truncated dodecahedron', 182),
+          ('Truncated icosahedron', 182), ('Small rhombicosidodecahedron', 242),
+          ('Great rhombicosidodecahedron', 362), ('Snub dodecahedron', 266))
+SOLID_CAPACITIES = np.array([capacity for _, capacity in SOLIDS], dtype=np.int64)
+SLOTS_PER_OCTAVE = 8
+PERIOD_CYCLES = len(SOLIDS)
+PERIOD_STREAM_BYTES = int(SOLID_CAPACITIES.sum()) * SLOTS_PER_OCTAVE // 8
+README_BITS_PER_CYCLE = 4819.69  # 4 streams
+LENGTH_TRAILER = struct.Struct('<Q')
+
+
+def octave_solids(cycle):
+    """Indices into SOLIDS of the 8 slots of octave `cycle`."""
+    return (cycle * SLOTS_PER_OCTAVE + np.arange(SLOTS_PER_OCTAVE)) % PERIOD_CYCLES
+
+
+_OCTAVE_BITS = np.array([SOLID_CAPACITIES[octave_solids(c)].sum() for c in range(PERIOD_CYCLES)])
+_OCTAVE_OFFSETS = np.concatenate([[0], np.cumsum(_OCTAVE_BITS)])  # Bit offsets within a stream's period
+_WIRE_OFFSETS = np.concatenate([[0], np.cumsum((_OCTAVE_BITS + 7) // 8)])  # Byte offsets of the octave blocks
+PERIOD_WIRE_BYTES = int(_WIRE_OFFSETS[-1])  # One stream's 13 octave blocks
+
+
+def octave_bits(cycle):
+    return int(_OCTAVE_BITS[cycle % PERIOD_CYCLES])
+
+
+def octave_bytes(cycle):
+    return (octave_bits(cycle) + 7) // 8
+
+
+def slot_bounds(cycle):
+    """Bit offsets of the 8 slots within an octave block (9 values, the last is octave_bits(cycle))."""
+    return np.concatenate([[0], np.cumsum(SOLID_CAPACITIES[octave_solids(cycle)])])
+
+
+# --- Vectorized core ---
+
+def periods_to_phases(data, num_streams):
+    """
+    Whole periods of payload (uint8, length a multiple of PERIOD_STREAM_BYTES * num_streams) to
+    13 arrays; phases[c] has shape (periods, num_streams, octave_bytes(c)).
+    """
+    bits = np.unpackbits(np.asarray(data, dtype=np.uint8).reshape(-1, num_streams, PERIOD_STREAM_BYTES), axis=2)
+    return [np.packbits(bits[:, :, _OCTAVE_OFFSETS[c]:_OCTAVE_OFFSETS[c + 1]], axis=2)
+            for c in range(PERIOD_CYCLES)]
+
+
+def phases_to_periods(phases):
+    """Inverse of periods_to_phases; returns the payload bytes as a flat uint8 array."""
+    bits = np.concatenate([np.unpackbits(phase, axis=2, count=int(_OCTAVE_BITS[c]))
+                           for c, phase in enumerate(phases)], axis=2)
+    return np.packbits(bits, axis=2).ravel()
+
+
+def periods_to_wire(data, num_streams):
+    """Like periods_to_phases, with each stream's 13 octave blocks back to back: (periods, num_streams, PERIOD_WIRE_BYTES)."""
+    return np.concatenate(periods_to_phases(data, num_streams), axis=2)
+
+
+def wire_to_periods(wire):
+    """Inverse of periods_to_wire for an array shaped (periods, streams, PERIOD_WIRE_BYTES)."""
+    return phases_to_periods([wire[:, :, _WIRE_OFFSETS[c]:_WIRE_OFFSETS[c + 1]] for c in range(PERIOD_CYCLES)])
+
+
+def payload_tail(rest, length, period_bytes):
+    """The final period(s) of a payload: the last `rest` bytes, zero padding and the trailer with `length`."""
+    tail_length = len(rest) + LENGTH_TRAILER.size
+    tail = np.zeros(tail_length + (-tail_length % period_bytes), dtype=np.uint8)
+    tail[:len(rest)] = rest
+    tail[-LENGTH_TRAILER.size:] = np.frombuffer(LENGTH_TRAILER.pack(length), dtype=np.uint8)
+    return tail
+
+
+class PayloadBlocks:
+    """
+    Encoded octaves for whole periods, starting at cycle first_cycle (a multiple of PERIOD_CYCLES).
+    phases[c][p, s] is the octave block of stream s in cycle first_cycle + PERIOD_CYCLES * p + c.
+    """
+
+    def __init__(self, first_cycle, phases):
+        self.first_cycle = first_cycle
+        self.phases = phases
+
+    @property
+    def periods(self):
+        return len(self.phases[0])
+
+    @property
+    def cycles(self):
+        return self.periods * PERIOD_CYCLES
+
+    @property
+    def num_streams(self):
+        return self.phases[0].shape[1]
+
+    def wire_bytes(self):
+        return sum(phase.size for phase in self.phases)
+
+    def blocks(self):
+        """(cycle, stream_id, octave block bytes) in cycle order, then stream order."""
+        for p in range(self.periods):
+            for c, phase in enumerate(self.phases):
+                cycle = self.first_cycle + p * PERIOD_CYCLES + c
+                for stream_id, block in enumerate(phase[p]):
+                    yield cycle, stream_id, block.tobytes()
+
+
+# --- Streaming ---
+
+class PayloadEncoder:
+    def __init__(self, num_streams):
+        self.num_streams = num_streams
+        self.period_bytes = PERIOD_STREAM_BYTES * num_streams
+        self.length = 0  # Payload bytes taken so far
+        self.next_cycle = 0
+        self._pending = np.empty(0, dtype=np.uint8)
+
+    def _blocks(self, data):
+        blocks = PayloadBlocks(self.next_cycle, periods_to_phases(data, self.num_streams))
+        self.next_cycle += blocks.cycles
+        return blocks
+
+    def encode(self, data):
+        """Encodes the whole periods available; returns PayloadBlocks, or None if less than a period is pending."""
+        data = np.frombuffer(data, dtype=np.uint8)
+        self.length += len(data)
+        if len(self._pending):
+            data = np.concatenate([self._pending, data])
+        whole = len(data) - len(data) % self.period_bytes
+        self._pending = data[whole:].copy()
+        return self._blocks(data[:whole]) if whole else None
+
+    def finish(self):
+        """The final period(s): the rest of the payload, zero padding and the length trailer."""
+        tail = payload_tail(self._pending, self.length, self.period_bytes)
+        self._pending = np.empty(0, dtype=np.uint8)
+        return self._blocks(tail)
+
+
+class PayloadDecoder:
+    def __init__(self, num_streams):
+        self.num_streams = num_streams
+        self.period_bytes = PERIOD_STREAM_BYTES * num_streams
+        self.length = 0  # Payload bytes returned so far
+        self.next_cycle = 0
+        self._hold_bytes = self.period_bytes + LENGTH_TRAILER.size  # Enough to contain trailer and padding
+        self._held = None
+
+    def decode(self, blocks):
+        """Payload bytes of all but the newest period (and 8 bytes) received; `blocks` must continue at next_cycle."""
+        if blocks.first_cycle != self.next_cycle:
+            raise ValueError(f"Expected blocks from cycle {self.next_cycle}, got {blocks.first_cycle}.")
+        self.next_cycle += blocks.cycles
+        return self.take(phases_to_periods(blocks.phases))
+
+    def take(self, data):
+        """Like decode(), for periods already decoded to payload bytes (a uint8 array of whole periods)."""
+        if self._held is not None:
+            data = np.concatenate([self._held, data])
+        split = max(0, len(data) - self._hold_bytes)
+        self._held = data[split:].copy()  # `data` may be a buffer the caller reuses
+        out = data[:split]
+        self.length += len(out)
+        return out.tobytes()
+
+    def finish(self):
+        """The rest of the payload, up to the length in the trailer."""
+        if self._held is None:
+            raise ValueError("No payload received.")
+        total = LENGTH_TRAILER.unpack(self._held[-LENGTH_TRAILER.size:].tobytes())[0]
+        remaining = total - self.length
+        if not 0 <= remaining <= len(self._held) - LENGTH_TRAILER.size:
+            raise ValueError(f"Trailer length {total} does not fit the {self.length} bytes already decoded.")
+        self.length = total
+        out, self._held = self._held[:remaining].tobytes(), None
+        return out
+
+
+def encode_file(src, num_streams, chunk_bytes=1 << 22):
+    """Yields PayloadBlocks for a binary file object read `chunk_bytes` at a time, ending with finish()."""
+    encoder = PayloadEncoder(num_streams)
+    while True:
+        chunk = src.read(chunk_bytes)
+        if not chunk:
+            break
+        blocks = encoder.encode(chunk)
+        if blocks is not None:
+            yield blocks
+    yield encoder.finish()
+
+
+def decode_to_file(blocks_iter, num_streams, dst):
+    """Writes the payload carried by consecutive PayloadBlocks to a binary file object; returns its length."""
+    decoder = PayloadDecoder(num_streams)
+    for blocks in blocks_iter:
+        dst.write(decoder.decode(blocks))
+    dst.write(decoder.finish())
+    return decoder.length
+
+
+# --- Goodput measurement ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round-trip a payload through the solid-capacity slots and "
+                                                 "report goodput per cycle against the README figure.")
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--size-mb', type=float, default=64.0, help="Random payload size (ignored with --input).")
+    parser.add_argument('--input', default=None, help="Encode this file instead of random bytes.")
+    parser.add_argument('--chunk-mb', type=float, default=4.0, help="Bytes handed to the encoder per call.")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            payload = f.read()
+    else:
+        payload = os.urandom(int(args.size_mb * (1 << 20)))
+    chunk = max(1, int(args.chunk_mb * (1 << 20)))
+
+    encoder = PayloadEncoder(args.streams)
+    started = time.perf_counter()
+    encoded = [blocks for blocks in (encoder.encode(payload[i:i + chunk]) for i in range(0, len(payload), chunk))
+               if blocks is not None]
+    encoded.append(encoder.finish())
+    encode_s = time.perf_counter() - started
+
+    decoder = PayloadDecoder(args.streams)
+    started = time.perf_counter()
+    decoded = [decoder.decode(blocks) for blocks in encoded]
+    decoded.append(decoder.finish())
+    decode_s = time.perf_counter() - started
+    ok = b''.join(decoded) == payload
+
+    cycles = sum(blocks.cycles for blocks in encoded)
+    wire = sum(blocks.wire_bytes() for blocks in encoded)
+    capacity_per_cycle = SOLID_CAPACITIES.sum() * SLOTS_PER_OCTAVE / PERIOD_CYCLES * args.streams
+    goodput = len(payload) * 8 / cycles
+    mb = len(payload) / 1e6
+    print(f"[Payload] {len(payload)} bytes over {args.streams} streams: {cycles} cycles, round trip "
+          f"{'OK' if ok else 'MISMATCH'}")
+    print(f"[Payload] goodput {goodput:.2f} bits/cycle of {capacity_per_cycle:.2f} slot capacity "
+          f"(README, 4 streams: {README_BITS_PER_CYCLE}); octave blocks with byte padding {wire * 8 / cycles:.2f} "
+          f"bits/cycle on the wire")
+    print(f"[Payload] encode {mb / encode_s:.1f} MB/s  decode {mb / decode_s:.1f} MB/s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Octa13 protocol constants shared by the simulator and the stream tools.
+
+Everything here is independent of Tk and matplotlib so that headless tools (codecs, recorders,
+benchmarks) can import it without pulling in the GUI.
+"""
+import math
+import struct
+
+import numpy as np
+
+# Octa13 symbolic elements
+symbols = ["⬢", "⬡", "◉", "⬣", "⬠", "⬤", "△", "◯"]
+colors = ["#FF0000", "#0000FF", "#00FF00", "#FFFF00", "#FF00FF", "#00FFFF", "#FF69B4", "#FFFFFF"]  # Hex colors
+spins = ["→", "↺", "↻", "∞", "⇅", "⇆", "⤡", "⟳"]
+
+ELEMENT_COUNT = len(symbols)
+if not (len(colors) == ELEMENT_COUNT and len(spins) == ELEMENT_COUNT):
+    raise ValueError("Symbols, colors, and spins lists must have the same number of elements.")
+
+# Glyph -> index tables, for the few places that still receive glyphs (e.g. the override menu)
+SYMBOL_INDEX = {symbol_char: i for i, symbol_char in enumerate(symbols)}
+
+# Base9 System for Toroid
+NUM_DISCRETE_U_STEPS = 9
+U_STEP_ANGLE = 2 * math.pi / NUM_DISCRETE_U_STEPS
+
+# Binary wire record, one per packet (see the TCP/Binary Output tab for the field table).
+# < = little-endian, I = unsigned int (4), B = unsigned char (1), f = float (4), x = padding
+# The byte after the status flags carries stream_id >> 8; it is zero (as the old padding was) below 256 streams.
+PACKET_RECORD = struct.Struct('<IBBBBffBB2x')
+STATUS_OVERRIDDEN = 0x01
+MAX_STREAMS = 1 << 16
+
+# The same record as a NumPy dtype, for zero-copy views over received or shared buffers.
+PACKET_DTYPE = np.dtype([('frame_index', '<u4'), ('stream_id', 'u1'), ('symbol_idx', 'u1'), ('color_idx', 'u1'),
+                         ('spin_idx', 'u1'), ('u_coord', '<f4'), ('v_coord', '<f4'), ('status_flags', 'u1'),
+                         ('stream_id_hi', 'u1'), ('reserved', 'V2')])
+if PACKET_DTYPE.itemsize != PACKET_RECORD.size:
+    raise ValueError("PACKET_DTYPE must match the PACKET_RECORD layout.")
+
+
+class Octa13Packet:
+    """
+    One packet of one stream in one frame, carried as integer indices from generation onwards.
+
+    Glyphs and hex colors are looked up from the alphabet tables only when something is displayed;
+    the wire formats use the indices directly.
+    """
+
+    __slots__ = ('stream_id', 'frame_index', 'symbol_idx', 'color_idx', 'spin_idx', 'u_coord', 'v_coord',
+                 'is_overridden')
+
+    def __init__(self, stream_id, frame_index, symbol_idx, color_idx, spin_idx, u_coord, v_coord, is_overridden=False):
+        self.stream_id = stream_id
+        self.frame_index = frame_index
+        self.symbol_idx = symbol_idx
+        self.color_idx = color_idx
+        self.spin_idx = spin_idx
+        self.u_coord = u_coord
+        self.v_coord = v_coord
+        self.is_overridden = is_overridden
+
+    @property
+    def symbol(self):
+        return symbols[self.symbol_idx]
+
+    @property
+    def color(self):
+        return colors[self.color_idx]
+
+    @property
+    def spin(self):
+        return spins[self.spin_idx]
+
+    def to_record(self):
+        """Packs the packet into its 20-byte binary wire record."""
+        return PACKET_RECORD.pack(self.frame_index, self.stream_id & 0xFF, self.symbol_idx, self.color_idx,
+                                  self.spin_idx, self.u_coord, self.v_coord,
+                                  STATUS_OVERRIDDEN if self.is_overridden else 0, self.stream_id >> 8)
+
+    def to_json_dict(self):
+        """The packet as it appears in the JSON feed (field order is part of the format)."""
+        return {'stream_id': self.stream_id, 'symbol': symbols[self.symbol_idx], 'color': colors[self.color_idx],
+                'spin': spins[self.spin_idx], 'u_coord': self.u_coord, 'v_coord': self.v_coord,
+                'is_overridden': self.is_overridden, 'frame_index': self.frame_index}
+
+    def as_tuple(self):
+        """(stream_id, symbol_idx, color_idx, spin_idx, u, v, is_overridden), as used by octa13_codec."""
+        return (self.stream_id, self.symbol_idx, self.color_idx, self.spin_idx, self.u_coord, self.v_coord,
+                self.is_overridden)
+
+    def __repr__(self):
+        return (f"Octa13Packet(stream_id={self.stream_id}, frame_index={self.frame_index}, "
+                f"symbol={self.symbol}, u={self.u_coord:.4f}, v={self.v_coord:.4f}, "
+                f"overridden={self.is_overridden})")
+
+
+def generate_octa13_packet(stream_id, frame_index, num_streams_total):
+    """
+    Generates a standard Octa13 packet as indices, incorporating the base9 system for the
+    u-coordinate. Symbol, color and spin share the generated index.
+    """
+    symbol_idx = (frame_index + stream_id) % ELEMENT_COUNT
+
+    # Distribute streams more evenly for different counts
+    if num_streams_total > 0:
+        initial_u_offset_steps = stream_id * (NUM_DISCRETE_U_STEPS / num_streams_total)
+        current_u_discrete_step = (frame_index + initial_u_offset_steps) % NUM_DISCRETE_U_STEPS
+        u = current_u_discrete_step * U_STEP_ANGLE
+        v = (((frame_index // ELEMENT_COUNT) * math.pi / 8) + stream_id * (math.pi / num_streams_total * 0.5)) % (
+                2 * math.pi)
+    else:
+        u, v = 0.0, 0.0
+
+    return Octa13Packet(stream_id, frame_index, symbol_idx, symbol_idx, symbol_idx, u, v)
+
+
+def generate_octa13_packet_data(stream_id, frame_index, num_streams_total):
+    """
+    Generates a standard Octa13 packet (symbol, color, spin) and its torus coordinates,
+    incorporating the base9 system for the u-coordinate.
+    """
+    packet = generate_octa13_packet(stream_id, frame_index, num_streams_total)
+    return packet.symbol, packet.color, packet.spin, packet.u_coord, packet.v_coord
+
+
+def record_stream_ids(records):
+    """Full stream ids of a PACKET_DTYPE array (low byte plus the high byte)."""
+    return records['stream_id'].astype(np.uint32) | (records['stream_id_hi'].astype(np.uint32) << 8)
+
+
+class StreamBlockGenerator:
+    """
+    Vectorized generate_octa13_packet for a contiguous block of streams, writing straight into
+    PACKET_DTYPE records. The per-stream terms are computed once, and the float arithmetic follows
+    the scalar version step for step, so the records match Octa13Packet.to_record() byte for byte.
+    """
+
+    def __init__(self, stream_lo, stream_hi, num_streams_total):
+        if not 0 <= stream_lo <= stream_hi <= num_streams_total <= MAX_STREAMS:
+            raise ValueError(f"Invalid stream block [{stream_lo}, {stream_hi}) of {num_streams_total} streams.")
+        stream_ids = np.arange(stream_lo, stream_hi, dtype=np.int64)
+        self.count = len(stream_ids)
+        self._stream_ids = stream_ids
+        self._u_offset_steps = stream_ids * (NUM_DISCRETE_U_STEPS / num_streams_total)
+        self._v_stream_term = stream_ids * (math.pi / num_streams_total * 0.5)
+        self._template = np.zeros(self.count, dtype=PACKET_DTYPE)
+        self._template['stream_id'] = stream_ids & 0xFF
+        self._template['stream_id_hi'] = stream_ids >> 8
+
+    def fill(self, out, frame_index):
+        """Writes this block's records for `frame_index` into `out` (a PACKET_DTYPE array of `count`)."""
+        out[...] = self._template
+        out['frame_index'] = frame_index
+        symbol_idx = (frame_index + self._stream_ids) % ELEMENT_COUNT
+        out['symbol_idx'] = symbol_idx
+        out['color_idx'] = symbol_idx
+        out['spin_idx'] = symbol_idx
+        out['u_coord'] = ((frame_index + self._u_offset_steps) % NUM_DISCRETE_U_STEPS) * U_STEP_ANGLE
+        out['v_coord'] = (((frame_index // ELEMENT_COUNT) * math.pi / 8) + self._v_stream_term) % (2 * math.pi)
+        return out
@@ -0,0 +1,489 @@
+"""
+Streaming receiver engine for the destination side of the Octa13 feed.
+
+Packets are handled as PACKET_DTYPE record arrays, a chunk at a time, with no per-packet Python:
+
+    * Reorder window: records are held until the feed has moved `window_frames` past their frame
+      (or they have waited `max_hold_ms`), then released in frame order to the consumer.
+    * Per-stream checks on every released batch: sorting by (stream, frame) turns gaps and
+      duplicates into differences between neighbours. Each stream keeps its last delivered frame
+      and a 64-frame bitmap of frames seen, so records that arrive after their frame was released
+      are classified as late or as duplicates.
+    * Statistics in fixed memory: cumulative counters, a ring of one-second counter snapshots for
+      rolling rates, and a ring of the most recent hold latencies (arrival to release).
+
+Restarts: a frame back near 0 (below window_frames) from more than window_frames past it, or any
+frame RESET_DISTANCE behind the release point, means the producer started over (a simulator Reset
+or a new session); the receiver then releases what it holds and forgets per-stream history.
+Replays restart it at every recorded session boundary.
+
+Lost = packets of a stream that were never delivered between two delivered ones. Late packets are
+not delivered (their frame has gone), so they stay counted as lost.
+
+Feeds: the simulator's TCP feed (binary records, JSON lines, compact blocks, or binary frames with
+--latency-header timestamps, whose per-stage latencies are reported too) or a recording.
+
+Usage:
+    python octa13_receiver.py tcp [--host localhost] [--port 9999] [--format binary|json|compact|timestamped]
+    python octa13_receiver.py replay sessions/a
+    python octa13_receiver.py bench [--streams 9] [--packets 5000000]
+"""
+import argparse
+import json
+import socket
+import time
+
+import numpy as np
+
+from octa13_latency import TimestampedFeedDecoder
+from octa13_protocol import PACKET_DTYPE, STATUS_OVERRIDDEN, SYMBOL_INDEX, colors, spins, record_stream_ids
+
+DEFAULT_WINDOW_FRAMES = 8
+DEFAULT_MAX_HOLD_MS = 250
+RESET_DISTANCE = 4096  # A frame this far behind the release point means the producer restarted
+BITMAP_FRAMES = 64
+ROLLING_SECONDS = 60
+REPLAY_BATCH_RECORDS = 16384  # Recorded frames are decoded and fed this many records at a time
+REPLAY_BATCH_JSON_BYTES = 1 << 21  # The same for JSON lines (~16k records)
+LATENCY_SAMPLES = 8192
+_MAX_STREAMS = 1 << 16
+
+_COUNTERS = ('received', 'delivered', 'lost', 'duplicates', 'late')
+
+
+class StreamReceiver:
+    """
+    Reorders and checks a packet feed. `on_release(records)` (optional) receives each released batch
+    in frame order (streams ascending within a frame), duplicates removed.
+    """
+
+    def __init__(self, window_frames=DEFAULT_WINDOW_FRAMES, max_hold_ms=DEFAULT_MAX_HOLD_MS, on_release=None):
+        self.window_frames = window_frames
+        self.max_hold_ns = int(max_hold_ms * 1e6)
+        self.on_release = on_release
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+        self.resets = 0
+
+        self._stream_capacity = 0
+        self._last_frame = np.empty(0, dtype=np.int64)   # Last delivered frame per stream, -1 = none yet
+        self._seen = np.empty(0, dtype=np.uint64)         # Bit k: frame last_frame - k was seen
+        self._stream_lost = np.empty(0, dtype=np.int64)
+        self._grow_streams(256)
+
+        self._pending = np.empty(0, dtype=PACKET_DTYPE)
+        self._pending_arrival = np.empty(0, dtype=np.int64)
+        self._highest_frame = -1
+        self._released_through = -1  # Every frame <= this has been released
+
+        self._latency_ring = np.zeros(LATENCY_SAMPLES, dtype=np.int64)
+        self._latency_count = 0
+        self._rolling_ring = np.zeros((ROLLING_SECONDS, len(_COUNTERS)), dtype=np.int64)
+        self._rolling_time = np.zeros(ROLLING_SECONDS)
+        self._rolling_slots = 0
+        self._next_snapshot = 0.0
+
+    def _grow_streams(self, needed):
+        capacity = max(needed, self._stream_capacity * 2, 256)
+        capacity = min(capacity, _MAX_STREAMS)
+        extra = capacity - self._stream_capacity
+        self._last_frame = np.concatenate([self._last_frame, np.full(extra, -1, dtype=np.int64)])
+        self._seen = np.concatenate([self._seen, np.zeros(extra, dtype=np.uint64)])
+        self._stream_lost = np.concatenate([self._stream_lost, np.zeros(extra, dtype=np.int64)])
+        self._stream_capacity = capacity
+
+    # --- Input ---
+
+    def feed(self, records, arrival_ns=None):
+        """Adds a chunk of PACKET_DTYPE records (any mix of frames) and releases what the window allows."""
+        if len(records) == 0:
+            return
+        arrival_ns = time.monotonic_ns() if arrival_ns is None else arrival_ns
+        frames = records['frame_index'].astype(np.int64)
+        while True:  # A chunk can hold the end of one run of frames and the start of the next
+            split = self._restart_point(frames)
+            if split is None:
+                break
+            self._accept(records[:split], frames[:split], arrival_ns)
+            self.restart()
+            records, frames = records[split:], frames[split:]
+        self._accept(records, frames, arrival_ns)
+        self.service(arrival_ns)
+
+    def _restart_point(self, frames):
+        """Index of the first record that jumps back to a frame near 0 past the reorder window, or None."""
+        near_zero = frames < self.window_frames
+        if not near_zero.any():
+            return None
+        before = np.maximum.accumulate(np.concatenate(([self._highest_frame], frames[:-1])))
+        hits = np.flatnonzero(near_zero & (frames < before - self.window_frames))
+        return int(hits[0]) if len(hits) else None
+
+    def _accept(self, records, frames, arrival_ns):
+        if not len(records):
+            return
+        self.counters['received'] += len(records)
+        if self._released_through >= 0 and frames.max() < self._released_through - RESET_DISTANCE:
+            self.restart()
+        late = frames <= self._released_through
+        if late.any():
+            self._classify_late(records[late], frames[late])
+            keep = ~late
+            records, frames = records[keep], frames[keep]
+        if len(records):
+            self._pending = np.concatenate([self._pending, records])
+            self._pending_arrival = np.concatenate([self._pending_arrival,
+                                                    np.full(len(records), arrival_ns, dtype=np.int64)])
+            self._highest_frame = max(self._highest_frame, int(frames.max()))
+
+    def service(self, now_ns=None):
+        """Releases frames that left the reorder window or waited longer than max_hold_ms."""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        self._snapshot(now_ns / 1e9)
+        if not len(self._pending):
+            return
+        threshold = self._highest_frame - self.window_frames
+        expired = self._pending_arrival <= now_ns - self.max_hold_ns
+        if expired.any():
+            threshold = max(threshold, int(self._pending['frame_index'][expired].max()))
+        if threshold > self._released_through:
+            self._release_through(threshold, now_ns)
+
+    def flush(self):
+        """Releases everything still held (end of feed)."""
+        if len(self._pending):
+            self._release_through(self._highest_frame, time.monotonic_ns())
+
+    def restart(self):
+        """Starts over after the producer did: releases what is held and forgets per-stream history."""
+        self.flush()
+        self.resets += 1
+        self._last_frame[:] = -1
+        self._seen[:] = 0
+        self._highest_frame = -1
+        self._released_through = -1
+
+    # --- Release and per-stream checks ---
+
+    def _release_through(self, threshold, now_ns):
+        frames = self._pending['frame_index'].astype(np.int64)
+        ready = frames <= threshold
+        batch, batch_arrival = self._pending[ready], self._pending_arrival[ready]
+        self._pending, self._pending_arrival = self._pending[~ready], self._pending_arrival[~ready]
+        self._released_through = threshold
+        if not len(batch):
+            return
+        order = np.lexsort((record_stream_ids(batch), batch['frame_index']))  # Frame order, streams ascending
+        batch, batch_arrival = batch[order], batch_arrival[order]
+        keep = self._check_streams(batch)
+        delivered = batch[keep]
+        self.counters['delivered'] += len(delivered)
+        self._record_latency(now_ns - batch_arrival[keep])
+        if self.on_release is not None and len(delivered):
+            self.on_release(delivered)
+
+    def _check_streams(self, batch):
+        """Updates per-stream state for an in-order batch; returns the mask of non-duplicate records."""
+        streams = record_stream_ids(batch).astype(np.int64)
+        frames = batch['frame_index'].astype(np.int64)
+        if streams.max() >= self._stream_capacity:
+            self._grow_streams(int(streams.max()) + 1)
+
+        order = np.lexsort((frames, streams))
+        s, f = streams[order], frames[order]
+        group_start = np.ones(len(s), dtype=bool)
+        group_start[1:] = s[1:] != s[:-1]
+        starts = np.flatnonzero(group_start)
+        group_streams = s[starts]
+
+        previous = np.empty_like(f)
+        previous[1:] = f[:-1]
+        old_last = self._last_frame[group_streams]
+        previous[starts] = np.where(old_last >= 0, old_last, f[starts] - 1)  # A stream's first packet has no gap
+        step = f - previous
+        duplicate = step == 0
+        gaps = np.maximum(step - 1, 0)
+
+        lost = np.add.reduceat(gaps, starts)
+        self._stream_lost[group_streams] += lost
+        self.counters['lost'] += int(lost.sum())
+        self.counters['duplicates'] += int(duplicate.sum())
+
+        # Last frame per stream and the seen-bitmap shifted up to it
+        ends = np.r_[starts[1:], len(s)] - 1
+        new_last = f[ends]
+        shift = np.where(old_last >= 0, new_last - old_last, BITMAP_FRAMES)
+        bitmap = self._seen[group_streams]
+        bitmap = np.where(shift < BITMAP_FRAMES, bitmap << np.minimum(shift, BITMAP_FRAMES - 1).astype(np.uint64),
+                          np.uint64(0))
+        offset = np.repeat(new_last, np.diff(np.r_[starts, len(s)])) - f
+        bits = np.where(offset < BITMAP_FRAMES, np.left_shift(np.uint64(1), np.minimum(offset, 63).astype(np.uint64)),
+                        np.uint64(0))
+        self._seen[group_streams] = bitmap | np.bitwise_or.reduceat(bits, starts)
+        self._last_frame[group_streams] = new_last
+
+        keep = np.empty(len(s), dtype=bool)
+        keep[order] = ~duplicate
+        return keep
+
+    def _classify_late(self, records, frames):
+        """Records whose frame was already released: duplicates if seen before, otherwise late."""
+        streams = record_stream_ids(records).astype(np.int64)
+        if streams.max() >= self._stream_capacity:
+            self._grow_streams(int(streams.max()) + 1)
+        # Repeats inside this chunk are duplicates of its first copy
+        keys = (streams << 32) | frames
+        _, first = np.unique(keys, return_index=True)
+        repeats = len(keys) - len(first)
+        streams, frames = streams[first], frames[first]
+
+        offset = self._last_frame[streams] - frames
+        in_bitmap = (offset >= 0) & (offset < BITMAP_FRAMES) & (self._last_frame[streams] >= 0)
+        bit = np.left_shift(np.uint64(1), np.clip(offset, 0, 63).astype(np.uint64))
+        seen = in_bitmap & ((self._seen[streams] & bit) != 0)
+        np.bitwise_or.at(self._seen, streams[in_bitmap & ~seen], bit[in_bitmap & ~seen])
+        self.counters['duplicates'] += repeats + int(seen.sum())
+        self.counters['late'] += int((~seen).sum())
+
+    # --- Statistics ---
+
+    def _record_latency(self, latencies_ns):
+        if not len(latencies_ns):
+            return
+        latencies_ns = latencies_ns[-LATENCY_SAMPLES:]
+        positions = (self._latency_count + np.arange(len(latencies_ns))) % LATENCY_SAMPLES
+        self._latency_ring[positions] = latencies_ns
+        self._latency_count += len(latencies_ns)
+
+    def _snapshot(self, now):
+        if now < self._next_snapshot:
+            return
+        self._next_snapshot = now + 1.0
+        slot = self._rolling_slots % ROLLING_SECONDS
+        self._rolling_ring[slot] = [self.counters[name] for name in _COUNTERS]
+        self._rolling_time[slot] = now
+        self._rolling_slots += 1
+
+    def rolling(self, seconds=10):
+        """Per-second rates over (up to) the last `seconds` seconds of snapshots."""
+        available = min(self._rolling_slots, ROLLING_SECONDS)
+        if available < 2:
+            return dict.fromkeys(_COUNTERS, 0.0)
+        newest = (self._rolling_slots - 1) % ROLLING_SECONDS
+        back = min(seconds, available - 1)
+        oldest = (self._rolling_slots - 1 - back) % ROLLING_SECONDS
+        elapsed = self._rolling_time[newest] - self._rolling_time[oldest]
+        delta = self._rolling_ring[newest] - self._rolling_ring[oldest]
+        return {name: float(value) / elapsed for name, value in zip(_COUNTERS, delta)}
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['pending'] = len(self._pending)
+        stats['resets'] = self.resets
+        stats['streams'] = int((self._last_frame >= 0).sum())
+        expected = stats['delivered'] + stats['lost']
+        stats['loss_ratio'] = stats['lost'] / expected if expected else 0.0
+        samples = self._latency_ring[:min(self._latency_count, LATENCY_SAMPLES)]
+        if len(samples):
+            p50, p99 = np.percentile(samples, [50, 99]) / 1000.0
+            stats['hold_p50_us'], stats['hold_p99_us'] = float(p50), float(p99)
+        return stats
+
+    def stream_losses(self):
+        """Lost packet count per stream that has been seen, as {stream_id: lost}."""
+        active = np.flatnonzero(self._last_frame >= 0)
+        return dict(zip(active.tolist(), self._stream_lost[active].tolist()))
+
+
+# --- Feed decoders (wire bytes -> PACKET_DTYPE records) ---
+
+class BinaryFeedDecoder:
+    """Splits a byte stream of 20-byte records, carrying partial records between chunks."""
+
+    def __init__(self):
+        self._remainder = b''
+
+    def decode(self, data):
+        data = self._remainder + data if self._remainder else data
+        usable = len(data) - len(data) % PACKET_DTYPE.itemsize
+        self._remainder = bytes(data[usable:])
+        return np.frombuffer(data, dtype=PACKET_DTYPE, count=usable // PACKET_DTYPE.itemsize).copy()
+
+
+class JSONFeedDecoder:
+    """Parses newline-delimited JSON frames into records."""
+
+    _COLOR_INDEX = {color: i for i, color in enumerate(colors)}
+    _SPIN_INDEX = {spin: i for i, spin in enumerate(spins)}
+
+    def __init__(self):
+        self._remainder = b''
+
+    def decode(self, data):
+        lines = (self._remainder + data).split(b'\n')
+        self._remainder = lines.pop()
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+            frame = json.loads(line)
+            for p in frame['packets']:
+                stream_id = p['stream_id']
+                rows.append((p['frame_index'], stream_id & 0xFF, SYMBOL_INDEX[p['symbol']],
+                             self._COLOR_INDEX[p['color']], self._SPIN_INDEX[p['spin']], p['u_coord'], p['v_coord'],
+                             STATUS_OVERRIDDEN if p['is_overridden'] else 0, stream_id >> 8, b''))
+        return np.array(rows, dtype=PACKET_DTYPE)
+
+
+class CompactFeedDecoder:
+    """Decodes the entropy-coded compact feed (octa13_codec) into records."""
+
+    def __init__(self):
+        from octa13_codec import CompactStreamDecoder
+        self._decoder = CompactStreamDecoder()
+
+    def decode(self, data):
+        from octa13_codec import packets_to_records
+        payload = b''.join(packets_to_records(frame_index, packets)
+                           for frame_index, packets in self._decoder.feed(data))
+        return np.frombuffer(payload, dtype=PACKET_DTYPE).copy()
+
+
+DECODERS = {'binary': BinaryFeedDecoder, 'json': JSONFeedDecoder, 'compact': CompactFeedDecoder,
+            'timestamped': TimestampedFeedDecoder}
+
+
+# --- CLI ---
+
+def _print_stats(receiver, label, decoder=None):
+    stats = receiver.stats()
+    rates = receiver.rolling()
+    hold = (f"  hold p50/p99 {stats['hold_p50_us']:.0f}/{stats['hold_p99_us']:.0f} us"
+            if 'hold_p50_us' in stats else '')
+    print(f"[Receiver] {label} {rates['received']:10.0f} pkt/s  delivered {stats['delivered']}  lost {stats['lost']} "
+          f"({stats['loss_ratio'] * 100:.3f}%)  dup {stats['duplicates']}  late {stats['late']}  "
+          f"streams {stats['streams']}{hold}")
+    if isinstance(decoder, TimestampedFeedDecoder):
+        print(f"[Receiver] {label} stages {decoder.stages.format()}")
+
+
+def run_tcp(args):
+    receiver = StreamReceiver(args.window, args.max_hold_ms)
+    decoder = DECODERS[args.format]()
+    sock = socket.create_connection((args.host, args.port))
+    sock.settimeout(0.1)
+    print(f"[Receiver] Connected to {args.host}:{args.port} ({args.format} feed)")
+    next_report = time.monotonic() + args.interval
+    try:
+        while True:
+            try:
+                data = sock.recv(1 << 20)
+                if not data:
+                    break
+                receiver.feed(decoder.decode(data))
+            except socket.timeout:
+                receiver.service()
+            if time.monotonic() >= next_report:
+                next_report += args.interval
+                _print_stats(receiver, 'tcp', decoder)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        receiver.flush()
+        _print_stats(receiver, 'end', decoder)
+
+
+def run_replay(args):
+    """Feeds a recording through the receiver in batches of about REPLAY_BATCH_RECORDS records."""
+    from octa13_recorder import RecordedSession
+    receiver = StreamReceiver(args.window, args.max_hold_ms)
+    decoders = {True: CompactFeedDecoder() if args.compact else BinaryFeedDecoder(), False: JSONFeedDecoder()}
+    batch, batch_bytes, batch_binary = [], 0, None
+    batch_limit = {True: REPLAY_BATCH_RECORDS * PACKET_DTYPE.itemsize, False: REPLAY_BATCH_JSON_BYTES}
+
+    def flush():
+        if batch:
+            receiver.feed(decoders[batch_binary].decode(b''.join(batch)))
+            batch.clear()
+
+    started = time.perf_counter()
+    current_session = None
+    for session_id, _, _, is_binary, payload in RecordedSession(args.directory, args.session).session_frames():
+        if session_id != current_session:
+            flush()  # Every session numbers its frames from 0 again
+            if current_session is not None:
+                receiver.restart()
+            current_session = session_id
+        if is_binary != batch_binary or batch_bytes >= batch_limit[batch_binary]:
+            flush()  # Frames are whole, so a batch never splits a record or a line
+            batch_binary, batch_bytes = is_binary, 0
+        batch.append(payload)
+        batch_bytes += len(payload)
+    flush()
+    receiver.flush()
+    elapsed = time.perf_counter() - started
+    print(f"[Receiver] {receiver.counters['received']} packets in {elapsed:.3f} s "
+          f"({receiver.counters['received'] / elapsed:.0f} pkt/s)")
+    _print_stats(receiver, 'replay')
+
+
+def run_bench(args):
+    """Synthetic feed with drops, duplicates and reordering; reports packets per second."""
+    from octa13_protocol import StreamBlockGenerator
+    rng = np.random.default_rng(37)
+    frames = args.packets // args.streams
+    generator = StreamBlockGenerator(0, args.streams, args.streams)
+    records = np.zeros((frames, args.streams), dtype=PACKET_DTYPE)
+    for frame_index in range(frames):
+        generator.fill(records[frame_index], frame_index)
+    records = records.ravel()
+    dropped = rng.random(len(records)) < args.loss
+    duplicated = np.flatnonzero(rng.random(len(records)) < args.duplicates)
+    feed = np.concatenate([records[~dropped], records[duplicated]])
+    position = np.r_[np.flatnonzero(~dropped), duplicated].astype(np.float64)
+    position += rng.integers(0, args.jitter * args.streams + 1, size=len(position))  # Local reordering
+    feed = feed[np.argsort(position, kind='stable')]
+
+    receiver = StreamReceiver(window_frames=args.window, max_hold_ms=1e9)
+    chunk = args.chunk
+    started = time.perf_counter()
+    for start in range(0, len(feed), chunk):
+        receiver.feed(feed[start:start + chunk])
+    receiver.flush()
+    elapsed = time.perf_counter() - started
+    stats = receiver.stats()
+    print(f"[Receiver] {len(feed)} packets, {args.streams} streams, chunks of {chunk}: "
+          f"{len(feed) / elapsed / 1e6:.2f} M packets/s")
+    print(f"[Receiver] injected: dropped {int(dropped.sum())}, duplicated {len(duplicated)}")
+    print(f"[Receiver] detected: lost {stats['lost']}, duplicates {stats['duplicates']}, late {stats['late']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receive, reorder and check an Octa13 feed.")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW_FRAMES, help="Reorder window in frames.")
+    parser.add_argument('--max-hold-ms', type=float, default=DEFAULT_MAX_HOLD_MS,
+                        help="Release held frames after this long even if the window has not moved.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    tcp = sub.add_parser('tcp', help="Connect to the simulator's TCP feed.")
+    tcp.add_argument('--host', default='localhost')
+    tcp.add_argument('--port', type=int, default=9999)
+    tcp.add_argument('--format', choices=sorted(DECODERS), default='binary')
+    tcp.add_argument('--interval', type=float, default=2.0, help="Seconds between reports.")
+    replay = sub.add_parser('replay', help="Run a recording through the receiver as fast as possible.")
+    replay.add_argument('directory')
+    replay.add_argument('--session', type=int, default=None, help="Only this session (default: all, in order).")
+    replay.add_argument('--compact', action='store_true', help="Binary frames were recorded in the compact format.")
+    bench = sub.add_parser('bench', help="Measure throughput on a synthetic impaired feed.")
+    bench.add_argument('--streams', type=int, default=9)
+    bench.add_argument('--packets', type=int, default=5000000)
+    bench.add_argument('--chunk', type=int, default=16384, help="Records per feed() call.")
+    bench.add_argument('--loss', type=float, default=0.001)
+    bench.add_argument('--duplicates', type=float, default=0.001)
+    bench.add_argument('--jitter', type=int, default=2, help="Maximum reordering distance in frames.")
+    args = parser.parse_args(argv)
+
+    {'tcp': run_tcp, 'replay': run_replay, 'bench': run_bench}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Append-only recording and replay of the Octa13 frame feed.
+
+A recording is a directory of segments. Each segment is a pair of files:
+
+    session-000000.o13log   magic + a sequence of [record header][wire bytes]
+    session-000000.o13idx   one (frame index, byte offset) entry per record
+
+Record header: `<IdBI` = frame index (4), wall-clock timestamp (8), flags (1, bit 0 = binary,
+bit 1 = first record of a session), payload length (4). The payload is exactly what was put on the
+wire (binary records, or a JSON line including its trailing newline), so a replay is byte-identical
+to the original session.
+
+Every simulator run starts a new session in a fresh segment; a session rolls over into further
+segments as they fill up. A session is identified by its first segment number, and reading, seeking
+and replay work within sessions: frame indices restart with every session (and after a simulator
+Reset), and the wall-clock gap between two sessions is not part of either.
+
+Usage:
+    python octa13_recorder.py info  <dir>
+    python octa13_recorder.py replay <dir> [--session N] [--speed 4 | --speed 0] [--host localhost] [--port 9999]
+"""
+import argparse
+import bisect
+import os
+import struct
+import sys
+import time
+
+from octa13_transport import TCPBroadcaster
+
+SEGMENT_MAGIC = b'O13LOG01'
+RECORD_HEADER = struct.Struct('<IdBI')
+INDEX_ENTRY = struct.Struct('<IQ')
+FLAG_BINARY = 0x01
+FLAG_SESSION_START = 0x02
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_BUFFER_BYTES = 1024 * 1024
+
+
+def _segment_paths(directory, segment_number):
+    base = os.path.join(directory, f"session-{segment_number:06d}")
+    return base + '.o13log', base + '.o13idx'
+
+
+def _list_segments(directory):
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith('session-') and name.endswith('.o13log'):
+            try:
+                numbers.append(int(name[len('session-'):-len('.o13log')]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+class FrameRecorder:
+    """Appends wire frames to a segmented, indexed log using buffered writes."""
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, buffer_bytes=DEFAULT_BUFFER_BYTES,
+                 ledger=None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.buffer_bytes = buffer_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        existing = _list_segments(directory)
+        # Never append into an existing segment: a new session always starts a fresh one.
+        self.segment_number = existing[-1] + 1 if existing else 0
+        self.frames_written = 0
+        self.bytes_written = 0
+        self._log_file = None
+        self._idx_file = None
+        self._offset = 0
+        self._session_flag = FLAG_SESSION_START  # Set on the session's first record only
+        self._open_segment()
+        # Optional hash chain over the recorded frames (octa13_ledger.FrameLedger); its checkpoints
+        # are written next to the first segment of this session.
+        self.ledger = ledger
+        if ledger is not None:
+            ledger.open_checkpoints(os.path.join(directory, f"session-{self.segment_number:06d}.o13chk"))
+
+    def _open_segment(self):
+        log_path, idx_path = _segment_paths(self.directory, self.segment_number)
+        self._log_file = open(log_path, 'wb', buffering=self.buffer_bytes)
+        self._idx_file = open(idx_path, 'wb', buffering=max(4096, self.buffer_bytes // 16))
+        self._log_file.write(SEGMENT_MAGIC)
+        self._offset = len(SEGMENT_MAGIC)
+
+    def _close_segment(self):
+        if self._log_file:
+            self._log_file.close()
+            self._idx_file.close()
+            self._log_file = None
+            self._idx_file = None
+
+    def append(self, frame_index, payload, is_binary, timestamp=None):
+        """Appends one frame exactly as it was sent on the wire."""
+        if self._log_file is None:
+            raise ValueError("Recorder is closed.")
+        if self._offset >= self.segment_bytes:
+            self._close_segment()
+            self.segment_number += 1
+            self._open_segment()
+
+        header = RECORD_HEADER.pack(frame_index, time.time() if timestamp is None else timestamp,
+                                    (FLAG_BINARY if is_binary else 0) | self._session_flag, len(payload))
+        self._session_flag = 0
+        self._idx_file.write(INDEX_ENTRY.pack(frame_index, self._offset))
+        self._log_file.write(header)
+        self._log_file.write(payload)
+        self._offset += RECORD_HEADER.size + len(payload)
+        self.frames_written += 1
+        self.bytes_written += len(payload)
+        if self.ledger is not None:
+            self.ledger.append(frame_index, header, payload)
+
+    def flush(self):
+        if self._log_file:
+            self._log_file.flush()
+            self._idx_file.flush()
+        if self.ledger is not None:
+            self.ledger.flush()
+
+    def close(self):
+        self._close_segment()
+        if self.ledger is not None:
+            self.ledger.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _starts_session(directory, segment_number):
+    """True if the segment's first record carries FLAG_SESSION_START (or the segment has no records)."""
+    if os.path.exists(os.path.join(directory, f"session-{segment_number:06d}.o13chk")):
+        return True  # Ledger checkpoints sit next to a session's first segment (also in older recordings)
+    log_path, _ = _segment_paths(directory, segment_number)
+    with open(log_path, 'rb') as f:
+        header = f.read(len(SEGMENT_MAGIC) + RECORD_HEADER.size)[len(SEGMENT_MAGIC):]
+    if len(header) < RECORD_HEADER.size:
+        return True
+    return bool(RECORD_HEADER.unpack(header)[2] & FLAG_SESSION_START)
+
+
+def _group_sessions(directory, segments):
+    """[(session id, [segment numbers])]; the id is the session's first segment number."""
+    sessions = []
+    for n in segments:
+        if not sessions or _starts_session(directory, n):
+            sessions.append((n, []))
+        sessions[-1][1].append(n)
+    return sessions
+
+
+class RecordedSession:
+    """
+    Read access to a recording directory, with index-based seeking by frame index. With `session`
+    (a session id), only that session's segments are read.
+    """
+
+    def __init__(self, directory, session=None):
+        self.directory = directory
+        self._sessions = _group_sessions(directory, _list_segments(directory))
+        if not self._sessions:
+            raise FileNotFoundError(f"No Octa13 recording segments found in {directory}")
+        if session is not None:
+            chosen = [group for group in self._sessions if group[0] == session]
+            if not chosen:
+                raise ValueError(f"No session {session} in {directory} (sessions: "
+                                 f"{', '.join(str(group[0]) for group in self._sessions)})")
+            self._sessions = chosen
+        self.segments = [n for _, segments in self._sessions for n in segments]
+        self._session_of = {n: session_id for session_id, segments in self._sessions for n in segments}
+        self._index_cache = {}
+
+    def sessions(self):
+        """[(session id, [segment numbers])] in recording order."""
+        return [(session_id, list(segments)) for session_id, segments in self._sessions]
+
+    def _load_index(self, segment_number):
+        """(frame indices, byte offsets, run starts): a run is a stretch of non-decreasing frame indices."""
+        if segment_number not in self._index_cache:
+            _, idx_path = _segment_paths(self.directory, segment_number)
+            with open(idx_path, 'rb') as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size  # Tolerate a torn final entry
+            entries = list(INDEX_ENTRY.iter_unpack(data[:usable]))
+            frames = [e[0] for e in entries]
+            runs = [0] + [i for i in range(1, len(frames)) if frames[i] < frames[i - 1]]  # Simulator Resets
+            self._index_cache[segment_number] = (frames, [e[1] for e in entries], runs)
+        return self._index_cache[segment_number]
+
+    def frame_count(self):
+        return sum(len(self._load_index(n)[0]) for n in self.segments)
+
+    def segment_frame_count(self, segment_number):
+        return len(self._load_index(segment_number)[0])
+
+    def frame_range(self):
+        """Returns (first, last) recorded frame index, or None for an empty recording."""
+        first = last = None
+        for n in self.segments:
+            frames, _, _ = self._load_index(n)
+            if frames:
+                first = frames[0] if first is None else first
+                last = frames[-1]
+        return None if first is None else (first, last)
+
+    def _locate(self, frame_index):
+        """
+        Finds the (segment, offset) of the first record at or after frame_index, in the first run of
+        increasing frame indices that reaches it (frame indices restart after a Reset or a new session).
+        """
+        for n in self.segments:
+            frames, offsets, runs = self._load_index(n)
+            for lo, hi in zip(runs, runs[1:] + [len(frames)]):
+                if frames[hi - 1] >= frame_index:
+                    return n, offsets[bisect.bisect_left(frames, frame_index, lo, hi)]
+        return None
+
+    def locate_record(self, session_id, record_number):
+        """The (segment, offset) of a session's record_number-th record, or None past its end."""
+        for n in dict(self._sessions).get(session_id, ()):
+            _, offsets, _ = self._load_index(n)
+            if record_number < len(offsets):
+                return n, offsets[record_number]
+            record_number -= len(offsets)
+        return None
+
+    def frames(self, start_frame=None):
+        """Yields (frame_index, timestamp, is_binary, payload) in recorded order."""
+        return (record[1:] for record in self.session_frames(start_frame))
+
+    def session_frames(self, start_frame=None):
+        """Like frames(), with the session id first: (session_id, frame_index, timestamp, is_binary, payload)."""
+        if start_frame is None:
+            return self._read(self.segments, len(SEGMENT_MAGIC))
+        located = self._locate(start_frame)
+        if located is None:
+            return iter(())
+        return self.records_at(*located, whole_recording=True)
+
+    def records_at(self, segment_number, offset, whole_recording=False):
+        """
+        Records from a byte offset in a segment (as found by locate_record) to the end of its
+        session, or of the recording with whole_recording; with the session id first, as session_frames().
+        """
+        session_id = self._session_of[segment_number]
+        segments = [n for n in self.segments if n >= segment_number
+                    and (whole_recording or self._session_of[n] == session_id)]
+        return self._read(segments, offset)
+
+    def raw_records_at(self, segment_number, offset):
+        """Like records_at(), as (frame_index, record header bytes, payload): what the ledger chains."""
+        session_id = self._session_of[segment_number]
+        segments = [n for n in self.segments if n >= segment_number and self._session_of[n] == session_id]
+        return self._read(segments, offset, raw=True)
+
+    def _read(self, segments, start_offset, raw=False):
+        for i, n in enumerate(segments):
+            session_id = self._session_of[n]
+            log_path, _ = _segment_paths(self.directory, n)
+            with open(log_path, 'rb', buffering=DEFAULT_BUFFER_BYTES) as f:
+                if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                    raise ValueError(f"{log_path} is not an Octa13 recording segment")
+                if i == 0:
+                    f.seek(start_offset)
+                while True:
+                    header = f.read(RECORD_HEADER.size)
+                    if len(header) < RECORD_HEADER.size:
+                        break
+                    frame_index, timestamp, flags, length = RECORD_HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length:
+                        break  # Torn write at the end of an interrupted session
+                    if raw:
+                        yield frame_index, header, payload
+                        continue
+                    yield session_id, frame_index, timestamp, bool(flags & FLAG_BINARY), payload
+
+
+class FrameReplayer:
+    """
+    Streams a recorded session into a broadcast callable.
+
+    speed=1.0 replays in real time, speed=N replays N times faster, and speed=0 (or None)
+    sends frames as fast as the broadcaster accepts them. Pacing is anchored to the first
+    frame, so slow sends are caught up instead of accumulating drift, and re-anchored at every
+    session start and frame-index reset.
+    """
+
+    def __init__(self, session, broadcast, speed=1.0):
+        self.session = session
+        self.broadcast = broadcast
+        self.speed = speed
+        self.running = False
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def run(self, start_frame=None, loop=False):
+        self.running = True
+        while self.running:
+            anchor_recorded = anchor_monotonic = None
+            previous_session = previous_frame = None
+            for session_id, frame_index, timestamp, _, payload in self.session.session_frames(start_frame):
+                if not self.running:
+                    break
+                if self.speed:
+                    if session_id != previous_session or frame_index < previous_frame:
+                        # New session or simulator Reset: pace from here, not across the gap before it
+                        anchor_recorded, anchor_monotonic = timestamp, time.monotonic()
+                    due = anchor_monotonic + (timestamp - anchor_recorded) / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                previous_session, previous_frame = session_id, frame_index
+                self.broadcast(payload)
+                self.frames_sent += 1
+                self.bytes_sent += len(payload)
+            if not loop:
+                break
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def _print_info(directory):
+    recording = RecordedSession(directory)
+    print(f"Recording:  {directory}")
+    print(f"Segments:   {len(recording.segments)}")
+    print(f"Frames:     {recording.frame_count()}")
+    for session_id, segments in recording.sessions():
+        session = RecordedSession(directory, session_id)
+        frame_range = session.frame_range()
+        resets = sum(len(session._load_index(n)[2]) - 1 for n in segments)
+        line = f"Session {session_id}: {len(segments)} segment(s), {session.frame_count()} frames"
+        if frame_range:
+            first = next(session.frames())
+            last_segment = [n for n in segments if session.segment_frame_count(n)][-1]
+            last = next(session.records_at(last_segment, session._load_index(last_segment)[1][-1]))
+            line += (f", frame range {frame_range[0]} .. {frame_range[1]}, {resets} reset(s), "
+                     f"duration {last[2] - first[1]:.3f} s")
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded Octa13 session.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('info', help="Summarize a recording.")
+    info.add_argument('directory')
+    replay = sub.add_parser('replay', help="Serve a recording to TCP clients.")
+    replay.add_argument('directory')
+    replay.add_argument('--host', default='localhost')
+    replay.add_argument('--port', type=int, default=9999)
+    replay.add_argument('--speed', type=float, default=1.0,
+                        help="Replay speed multiplier; 0 sends as fast as possible.")
+    replay.add_argument('--session', type=int, default=None,
+                        help="Session to replay, as listed by info (default: the latest).")
+    replay.add_argument('--start-frame', type=int, default=None, help="First frame index, within the session.")
+    replay.add_argument('--wait-clients', type=int, default=1,
+                        help="Number of clients to wait for before starting the replay.")
+    replay.add_argument('--loop', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        _print_info(args.directory)
+        return 0
+
+    session_id = args.session
+    if session_id is None:
+        session_id = RecordedSession(args.directory).sessions()[-1][0]
+    session = RecordedSession(args.directory, session_id)
+    broadcaster = TCPBroadcaster()
+    if not broadcaster.start(args.host, args.port):
+        return 1
+    try:
+        while broadcaster.client_count < args.wait_clients:
+            time.sleep(0.05)
+        replayer = FrameReplayer(session, broadcaster.broadcast, speed=args.speed)
+        started = time.monotonic()
+        replayer.run(start_frame=args.start_frame, loop=args.loop)
+        elapsed = time.monotonic() - started
+        print(f"[Replay] Sent {replayer.frames_sent} frames ({replayer.bytes_sent} bytes) in {elapsed:.3f} s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broadcaster.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
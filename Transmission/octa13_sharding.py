@@ -0,0 +1,241 @@
+"""
+Multi-process frame engine for very high stream counts.
+
+The streams are split into contiguous shards, one per worker process. Every worker generates and
+encodes its shard's binary records straight into a shared output buffer at the shard's offset, so
+each frame is already assembled in stream order when the workers report back; the coordinator only
+hands out frame batches and passes finished frames to a sink (TCP broadcaster, shared-memory ring,
+or nothing when benchmarking).
+
+Output buffer (multiprocessing.shared_memory): `depth` frame slots of num_streams * 20 bytes.
+The coordinator keeps two batches in flight, so workers fill batch k + 1 while batch k is consumed.
+
+The simulator hands generation to this engine when started with more streams than its Active
+Streams slider allows (`--streams 4096`); that feed is headless, so the GUI's per-stream overrides
+do not apply to it.
+
+Usage:
+    python octa13_sharding.py --streams 4096 --workers 1 2 4 8        # throughput sweep
+    python octa13_sharding.py --streams 4096 --workers 4 --serve      # binary feed on localhost:9999
+    python octa13_sharding.py --streams 4096 --workers 4 --shm octa13 # publish to a shared-memory ring
+    python "Symbolic TCP Simulator.py" --streams 4096 --period-ms 50   # the same feed, from the simulator
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from octa13_protocol import PACKET_DTYPE, StreamBlockGenerator
+
+DEFAULT_BATCH_FRAMES = 16
+
+
+def shard_bounds(num_streams, num_shards):
+    """Splits [0, num_streams) into num_shards contiguous ranges whose sizes differ by at most one."""
+    base, extra = divmod(num_streams, num_shards)
+    bounds = []
+    lo = 0
+    for shard in range(num_shards):
+        hi = lo + base + (1 if shard < extra else 0)
+        bounds.append((lo, hi))
+        lo = hi
+    return bounds
+
+
+def _shard_worker(shm_name, depth, num_streams, stream_lo, stream_hi, conn):
+    """Worker process: fills its shard of each requested frame slot, then acknowledges the batch."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the coordinator, which stops the pool
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray((depth, num_streams), dtype=PACKET_DTYPE, buffer=shm.buf)
+        generator = StreamBlockGenerator(stream_lo, stream_hi, num_streams)
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            first_frame, count = command
+            for frame_index in range(first_frame, first_frame + count):
+                generator.fill(frames[frame_index % depth, stream_lo:stream_hi], frame_index)
+            conn.send(count)
+        del frames
+    finally:
+        shm.close()
+        conn.close()
+
+
+class ShardedFrameEngine:
+    """Coordinator for a pool of shard workers. Use as a context manager or call close()."""
+
+    def __init__(self, num_streams, workers=None, batch_frames=DEFAULT_BATCH_FRAMES):
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, num_streams))
+        self.num_streams = num_streams
+        self.workers = workers
+        self.batch_frames = batch_frames
+        self.depth = 2 * batch_frames
+        self.frame_bytes = num_streams * PACKET_DTYPE.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.depth * self.frame_bytes)
+        self.frames = np.ndarray((self.depth, num_streams), dtype=PACKET_DTYPE, buffer=self.shm.buf)
+        self.bounds = shard_bounds(num_streams, workers)
+        self._connections = []
+        self._processes = []
+        for stream_lo, stream_hi in self.bounds:
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_worker, daemon=True,
+                                              args=(self.shm.name, self.depth, num_streams, stream_lo, stream_hi,
+                                                    child_conn))
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def _dispatch(self, first_frame, count):
+        for conn in self._connections:
+            conn.send((first_frame, count))
+
+    def _wait(self):
+        for conn in self._connections:
+            conn.recv()
+
+    def run(self, start_frame, frame_count, consume=None):
+        """
+        Generates frames [start_frame, start_frame + frame_count) and calls consume(frame_index, records)
+        for each one in order. `records` is a view into the shared buffer, valid only during the call.
+        """
+        end_frame = start_frame + frame_count
+        batch_start = start_frame
+        batch_count = min(self.batch_frames, end_frame - batch_start)
+        if batch_count <= 0:
+            return
+        self._dispatch(batch_start, batch_count)
+        while batch_count > 0:
+            self._wait()
+            next_start = batch_start + batch_count
+            next_count = min(self.batch_frames, end_frame - next_start)
+            if next_count > 0:
+                self._dispatch(next_start, next_count)  # Workers fill the other half of the buffer meanwhile
+            if consume is not None:
+                for frame_index in range(batch_start, next_start):
+                    consume(frame_index, self.frames[frame_index % self.depth])
+            batch_start, batch_count = next_start, next_count
+
+    def close(self):
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._connections:
+            conn.close()
+        self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --- Benchmark / feed CLI ---
+
+def measure_throughput(num_streams, workers, frame_count, batch_frames=DEFAULT_BATCH_FRAMES, consume=None):
+    """Returns frames per second for one engine configuration (pool start-up excluded)."""
+    with ShardedFrameEngine(num_streams, workers, batch_frames) as engine:
+        engine.run(0, engine.depth)  # Warm-up: workers attached and every buffer page touched
+        start = time.perf_counter()
+        engine.run(engine.depth, frame_count, consume)
+        return frame_count / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Octa13 frames for many streams across worker processes.")
+    parser.add_argument('--streams', type=int, default=4096, help="Number of streams per frame.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Worker counts to measure (the feed modes use the first one).")
+    parser.add_argument('--frames', type=int, default=2000, help="Frames per measurement.")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_FRAMES, help="Frames per worker dispatch.")
+    parser.add_argument('--serve', action='store_true', help="Broadcast binary frames over TCP until interrupted.")
+    parser.add_argument('--host', default='localhost', help="Host for --serve.")
+    parser.add_argument('--port', type=int, default=9999, help="Port for --serve.")
+    parser.add_argument('--shm', metavar='NAME', help="Publish frames to a shared-memory ring until interrupted.")
+    parser.add_argument('--period-ms', type=float, default=0.0,
+                        help="Frame period for --serve / --shm (0 = as fast as the workers go).")
+    args = parser.parse_args(argv)
+
+    if args.serve or args.shm:
+        return run_feed(args.streams, args.workers[0], args.batch, host=args.host if args.serve else None,
+                        port=args.port, shm_name=args.shm, period=args.period_ms / 1000.0)
+
+    print(f"[Sharding] {args.streams} streams, {args.frames} frames per run, {os.cpu_count()} CPU(s) available")
+    baseline = None
+    for workers in args.workers:
+        rate = measure_throughput(args.streams, workers, args.frames, args.batch)
+        baseline = baseline or rate
+        print(f"[Sharding] workers {workers:3d}: {rate:10.1f} frames/s  {rate * args.streams / 1e6:8.2f} M packets/s"
+              f"  speedup {rate / baseline:5.2f}x")
+
+
+def run_feed(num_streams, workers=None, batch_frames=DEFAULT_BATCH_FRAMES, host='localhost', port=9999,
+             shm_name=None, period=0.0):
+    """
+    Streams binary frames until interrupted: over TCP when `host` is set, into a shared-memory ring
+    when `shm_name` is. `period` (seconds) paces the frames from the first one; 0 sends them as fast
+    as the workers produce them. Returns a process exit status.
+    """
+    broadcaster = ring = None
+    if host is not None:
+        from octa13_transport import TCPBroadcaster
+        broadcaster = TCPBroadcaster()
+        if not broadcaster.start(host, port):
+            return 1
+    if shm_name:
+        from octa13_shm import SharedFrameRing
+        try:
+            ring = SharedFrameRing(shm_name, slot_bytes=num_streams * PACKET_DTYPE.itemsize)
+        except FileExistsError:
+            print(f"[Sharding] Shared-memory block '{shm_name}' already exists; pick another name.")
+            if broadcaster is not None:
+                broadcaster.shutdown()
+            return 1
+
+    def consume(frame_index, records):
+        if period:
+            delay = anchor + frame_index * period - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        payload = records.view(np.uint8)
+        if broadcaster is not None:
+            broadcaster.broadcast(payload)
+        if ring is not None:
+            ring.publish(frame_index, payload)
+
+    frame_index = 0
+    try:
+        with ShardedFrameEngine(num_streams, workers, batch_frames) as engine:
+            print(f"[Sharding] Streaming {num_streams} streams with {engine.workers} worker(s). Ctrl+C to stop.")
+            anchor = time.monotonic()  # Pool start-up does not count against the schedule
+            while True:
+                engine.run(frame_index, batch_frames, consume)
+                frame_index += batch_frames
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if broadcaster is not None:
+            broadcaster.shutdown()
+        if ring is not None:
+            ring.close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Shared-memory ring buffer transport for consumers on the same host.
+
+The simulator (single writer) publishes each frame's binary records into a named
+multiprocessing.shared_memory block; any number of reader processes attach by name and consume
+frames as NumPy views over the shared buffer, with no sockets and no copies.
+
+Layout:
+    header (64 bytes): magic, slot count, slot payload capacity, published frame count
+    slot  (32-byte header + payload capacity):
+        seq_begin u64, seq_end u64, publish_ns u64, frame_index u32, length u32, payload...
+
+Protocol (a per-slot seqlock, lock-free for both sides):
+    writer: seq_begin = n; write header fields and payload; seq_end = n; published = n
+    reader: wait for seq_end == n; build the view; the frame is valid for as long as
+            seq_begin is still n (the writer sets seq_begin = n + slot_count before reusing the slot)
+Readers that fall more than slot_count frames behind skip ahead and count the overrun.
+
+Usage:
+    python "Symbolic TCP Simulator.py" --shm octa13        # publish
+    python octa13_shm.py octa13                           # attach and report rate / latency
+"""
+import argparse
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from octa13_protocol import PACKET_DTYPE
+
+RING_MAGIC = b'O13SHM01'
+HEADER_BYTES = 64
+SLOT_HEADER_BYTES = 32
+DEFAULT_SLOT_COUNT = 256
+DEFAULT_SLOT_BYTES = 64 * 1024
+
+_HEADER_DTYPE = np.dtype([('magic', 'S8'), ('slot_count', '<u4'), ('slot_bytes', '<u4'), ('published', '<u8')])
+_SLOT_DTYPE = np.dtype([('seq_begin', '<u8'), ('seq_end', '<u8'), ('publish_ns', '<u8'),
+                        ('frame_index', '<u4'), ('length', '<u4')])
+
+
+class _RingView:
+    """NumPy views over the header and slot headers of a mapped ring."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        if bytes(self.header['magic']) != RING_MAGIC:
+            raise ValueError(f"Shared memory block '{shm.name}' is not an Octa13 frame ring.")
+        self.slot_count = int(self.header['slot_count'])
+        self.slot_bytes = int(self.header['slot_bytes'])
+        self.stride = SLOT_HEADER_BYTES + self.slot_bytes
+        self.slots = [np.ndarray((), dtype=_SLOT_DTYPE, buffer=shm.buf, offset=HEADER_BYTES + i * self.stride)
+                      for i in range(self.slot_count)]
+
+    def payload_offset(self, slot_index):
+        return HEADER_BYTES + slot_index * self.stride + SLOT_HEADER_BYTES
+
+    def release(self):
+        # Views must be dropped before the mapping can be closed.
+        self.header = None
+        self.slots = []
+
+
+class SharedFrameRing:
+    """Single-writer side of the ring. Create once per producer and publish frames in order."""
+
+    def __init__(self, name, slot_count=DEFAULT_SLOT_COUNT, slot_bytes=DEFAULT_SLOT_BYTES):
+        slot_bytes = (slot_bytes + 7) & ~7  # Keep every slot header 8-byte aligned
+        size = HEADER_BYTES + slot_count * (SLOT_HEADER_BYTES + slot_bytes)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=self.shm.buf, offset=0)
+        header['slot_count'] = slot_count
+        header['slot_bytes'] = slot_bytes
+        header['published'] = 0
+        header['magic'] = RING_MAGIC  # Written last: readers refuse the block until it is set
+        del header
+        self.ring = _RingView(self.shm)
+        self.name = self.shm.name
+        self.published = 0
+
+    def publish(self, frame_index, payload):
+        """Copies one frame's binary records into the next slot."""
+        length = len(payload)
+        ring = self.ring
+        if length > ring.slot_bytes:
+            raise ValueError(f"Frame of {length} bytes exceeds the ring slot size ({ring.slot_bytes} bytes).")
+        seq = self.published + 1
+        slot_index = (seq - 1) % ring.slot_count
+        slot = ring.slots[slot_index]
+        slot['seq_begin'] = seq
+        slot['publish_ns'] = time.monotonic_ns()
+        slot['frame_index'] = frame_index
+        slot['length'] = length
+        start = ring.payload_offset(slot_index)
+        self.shm.buf[start:start + length] = payload
+        slot['seq_end'] = seq
+        ring.header['published'] = seq
+        self.published = seq
+
+    def close(self, unlink=True):
+        self.ring.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class ShmFrame:
+    """A frame read from the ring. `records` is a zero-copy view; check is_valid() after using it."""
+
+    __slots__ = ('sequence', 'frame_index', 'publish_ns', 'records', '_slot')
+
+    def __init__(self, sequence, frame_index, publish_ns, records, slot):
+        self.sequence = sequence
+        self.frame_index = frame_index
+        self.publish_ns = publish_ns
+        self.records = records
+        self._slot = slot
+
+    def is_valid(self):
+        """True while the writer has not started reusing this frame's slot."""
+        return int(self._slot['seq_begin']) == self.sequence
+
+
+class SharedFrameReader:
+    """Attaches to a ring created by SharedFrameRing in another process."""
+
+    def __init__(self, name, from_oldest=False):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13 always registers with the resource tracker
+            self.shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass  # Worst case the tracker warns about (or unlinks) the block when this reader exits
+        self.ring = _RingView(self.shm)
+        published = int(self.ring.header['published'])
+        if from_oldest:
+            self.next_sequence = max(1, published - self.ring.slot_count + 1)
+        else:
+            self.next_sequence = published + 1
+        self.frames_read = 0
+        self.frames_overrun = 0
+
+    def poll(self):
+        """Returns the next ShmFrame, or None if the writer has not published it yet."""
+        ring = self.ring
+        while True:
+            seq = self.next_sequence
+            slot = ring.slots[(seq - 1) % ring.slot_count]
+            seq_end = int(slot['seq_end'])
+            if seq_end < seq:
+                return None
+            if seq_end == seq:
+                frame_index = int(slot['frame_index'])
+                publish_ns = int(slot['publish_ns'])
+                length = int(slot['length'])
+                records = np.ndarray((length // PACKET_DTYPE.itemsize,), dtype=PACKET_DTYPE, buffer=self.shm.buf,
+                                     offset=ring.payload_offset((seq - 1) % ring.slot_count))
+                if int(slot['seq_begin']) == seq:
+                    self.next_sequence = seq + 1
+                    self.frames_read += 1
+                    return ShmFrame(seq, frame_index, publish_ns, records, slot)
+            # The slot was reused before we got to it: resynchronize to the oldest frame still in the ring.
+            published = int(ring.header['published'])
+            oldest = max(seq + 1, published - ring.slot_count + 2)
+            self.frames_overrun += oldest - seq
+            self.next_sequence = oldest
+
+    def read(self):
+        """Like poll() but returns (frame_index, publish_ns, records copy), validated after the copy."""
+        while True:
+            frame = self.poll()
+            if frame is None:
+                return None
+            records = frame.records.copy()
+            if frame.is_valid():
+                return frame.frame_index, frame.publish_ns, records
+            self.frames_overrun += 1
+
+    def frames(self, idle_sleep=0.0001):
+        """Yields ShmFrames forever, sleeping briefly while the ring is idle."""
+        while True:
+            frame = self.poll()
+            if frame is None:
+                time.sleep(idle_sleep)
+                continue
+            yield frame
+
+    def close(self):
+        self.ring.release()
+        self.shm.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attach to an Octa13 shared-memory frame ring and report stats.")
+    parser.add_argument('name', help="Shared memory block name given to the simulator's --shm option.")
+    parser.add_argument('--interval', type=float, default=2.0, help="Seconds between reports.")
+    args = parser.parse_args(argv)
+
+    reader = SharedFrameReader(args.name)
+    print(f"[SHM Reader] Attached to '{args.name}' ({reader.ring.slot_count} slots x {reader.ring.slot_bytes} bytes)")
+    window_start = time.monotonic()
+    frames = packets = 0
+    latencies = []
+    try:
+        for frame in reader.frames():
+            latencies.append(time.monotonic_ns() - frame.publish_ns)
+            frames += 1
+            packets += len(frame.records)
+            now = time.monotonic()
+            if now - window_start >= args.interval:
+                lat = np.array(latencies) / 1000.0
+                print(f"[SHM Reader] {frames / (now - window_start):8.1f} frames/s  {packets / (now - window_start):10.1f}"
+                      f" packets/s  latency p50 {np.percentile(lat, 50):.1f} us  p99 {np.percentile(lat, 99):.1f} us"
+                      f"  overruns {reader.frames_overrun}")
+                window_start, frames, packets, latencies = now, 0, 0, []
+    except KeyboardInterrupt:
+        pass
+    finally:
+        frame = None  # Drop the last view so the mapping can be closed
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
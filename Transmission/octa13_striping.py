@@ -0,0 +1,333 @@
+"""
+Parallel payload striping across streams, with in-order reassembly on the receiving side.
+
+A payload is laid out as in octa13_payload.py: every period of PERIOD_STREAM_BYTES * num_streams
+bytes gives each stream its own 1958-byte segment, which travels as that stream's 13 octave blocks
+(PERIOD_WIRE_BYTES). Streams are therefore independent, and the work is split the way
+octa13_sharding.py splits frame generation: contiguous shards of streams, one worker process per
+shard, working in place on shared-memory buffers. The coordinator only reads the source, hands out
+batches of periods and passes results on.
+
+StripedEncoder reads a file object straight into the shared input buffer (period order) while the
+workers encode the previous batch into the output buffer (stream order), then gives the sink one
+contiguous stripe per stream and batch: sink(stream_id, first_cycle, wire), with wire shaped
+(periods, PERIOD_WIRE_BYTES) and cycle = the frame index of the stream's first octave.
+
+StripedDecoder.add(stream_id, first_cycle, wire) accepts stripes in any order, within and across
+streams. Periods are decoded (by the workers) and returned in payload order once every stream has
+delivered them, so streams that run ahead are buffered and a slow stream only delays the output.
+
+Usage:
+    python octa13_striping.py --streams 4 --workers 1 2 4 --size-mb 256   # encode/decode MB/s per worker count
+"""
+import argparse
+import io
+import os
+import random
+import signal
+import time
+from multiprocessing import shared_memory
+import multiprocessing
+
+import numpy as np
+
+from octa13_payload import (PERIOD_CYCLES, PERIOD_STREAM_BYTES, PERIOD_WIRE_BYTES, PayloadDecoder, payload_tail,
+                            periods_to_wire, wire_to_periods)
+from octa13_sharding import shard_bounds
+
+DEFAULT_BATCH_PERIODS = 64
+
+
+def _stripe_worker(input_name, output_name, input_shape, output_shape, stream_lo, stream_hi, decode, conn):
+    """Worker process: encodes (or decodes) its shard of streams for each batch, then acknowledges it."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the coordinator, which stops the pool
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    try:
+        inputs = np.ndarray(input_shape, dtype=np.uint8, buffer=input_shm.buf)
+        outputs = np.ndarray(output_shape, dtype=np.uint8, buffer=output_shm.buf)
+        streams = stream_hi - stream_lo
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            slot, periods = command
+            if decode:  # Stream-major wire in, period-major payload out
+                wire = inputs[slot, stream_lo:stream_hi, :periods].transpose(1, 0, 2)
+                outputs[slot, :periods, stream_lo:stream_hi] = wire_to_periods(wire).reshape(
+                    periods, streams, PERIOD_STREAM_BYTES)
+            else:  # Period-major payload in, stream-major wire out
+                wire = periods_to_wire(inputs[slot, :periods, stream_lo:stream_hi], streams)
+                outputs[slot, stream_lo:stream_hi, :periods] = wire.transpose(1, 0, 2)
+            conn.send(periods)
+        del inputs, outputs
+    finally:
+        input_shm.close()
+        output_shm.close()
+        conn.close()
+
+
+class _StripePool:
+    """Two slots of shared input and output buffers and one worker per shard of streams."""
+
+    def __init__(self, num_streams, workers, batch_periods, decode):
+        workers = max(1, min(workers or os.cpu_count() or 1, num_streams))
+        payload_shape = (2, batch_periods, num_streams, PERIOD_STREAM_BYTES)
+        wire_shape = (2, num_streams, batch_periods, PERIOD_WIRE_BYTES)
+        input_shape, output_shape = (wire_shape, payload_shape) if decode else (payload_shape, wire_shape)
+        self.workers = workers
+        self._input_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(input_shape)))
+        self._output_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(output_shape)))
+        self.inputs = np.ndarray(input_shape, dtype=np.uint8, buffer=self._input_shm.buf)
+        self.outputs = np.ndarray(output_shape, dtype=np.uint8, buffer=self._output_shm.buf)
+        self._connections = []
+        self._processes = []
+        for stream_lo, stream_hi in shard_bounds(num_streams, workers):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_stripe_worker, daemon=True,
+                                              args=(self._input_shm.name, self._output_shm.name, input_shape,
+                                                    output_shape, stream_lo, stream_hi, decode, child_conn))
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def dispatch(self, slot, periods):
+        for conn in self._connections:
+            conn.send((slot, periods))
+
+    def wait(self):
+        for conn in self._connections:
+            conn.recv()
+
+    def close(self):
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._connections:
+            conn.close()
+        self.inputs = self.outputs = None
+        for shm in (self._input_shm, self._output_shm):
+            shm.close()
+            shm.unlink()
+
+
+def _read_full(src, view):
+    """readinto() until `view` is full or the source is exhausted; returns the bytes read."""
+    filled = 0
+    while filled < len(view):
+        count = src.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+class StripedEncoder:
+    """Use as a context manager or call close()."""
+
+    def __init__(self, num_streams, workers=None, batch_periods=DEFAULT_BATCH_PERIODS):
+        self.num_streams = num_streams
+        self.batch_periods = max(2, batch_periods)  # The trailer can take two periods
+        self.period_bytes = PERIOD_STREAM_BYTES * num_streams
+        self._pool = _StripePool(num_streams, workers, self.batch_periods, decode=False)
+        self.workers = self._pool.workers
+
+    def _batches(self, src):
+        """Fills the input slots in turn; yields (slot, periods). The last batch ends with the trailer."""
+        slot, length, period_bytes = 0, 0, self.period_bytes
+        while True:
+            view = self._pool.inputs[slot].reshape(-1)
+            count = _read_full(src, memoryview(view))
+            length += count
+            whole = count // period_bytes
+            if count == len(view):
+                yield slot, whole
+                slot ^= 1
+                continue
+            tail = payload_tail(view[whole * period_bytes:count].copy(), length, period_bytes)
+            tail_periods = len(tail) // period_bytes
+            if whole + tail_periods > self.batch_periods:
+                yield slot, whole
+                slot ^= 1
+                view, whole = self._pool.inputs[slot].reshape(-1), 0
+            view[whole * period_bytes:whole * period_bytes + len(tail)] = tail
+            yield slot, whole + tail_periods
+            return
+
+    def encode_file(self, src, sink):
+        """
+        Encodes a binary file object to EOF. Calls sink(stream_id, first_cycle, wire) for every stream
+        of every batch, batches in order; `wire` is a view into shared memory, valid only during the call.
+        Returns the number of cycles produced.
+        """
+        pool = self._pool
+        cycle = 0
+
+        def emit(slot, periods):
+            for stream_id in range(self.num_streams):
+                sink(stream_id, cycle, pool.outputs[slot, stream_id, :periods])
+
+        batches = self._batches(src)
+        pending = next(batches)
+        pool.dispatch(*pending)
+        for batch in batches:  # Reading the next batch overlaps with the workers encoding this one
+            pool.wait()
+            pool.dispatch(*batch)
+            emit(*pending)
+            cycle += pending[1] * PERIOD_CYCLES
+            pending = batch
+        pool.wait()
+        emit(*pending)
+        return cycle + pending[1] * PERIOD_CYCLES
+
+    def close(self):
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StripedDecoder:
+    """Use as a context manager or call close()."""
+
+    def __init__(self, num_streams, workers=None, batch_periods=DEFAULT_BATCH_PERIODS):
+        self.num_streams = num_streams
+        self.batch_periods = batch_periods
+        self._pool = _StripePool(num_streams, workers, batch_periods, decode=True)
+        self.workers = self._pool.workers
+        self._payload = PayloadDecoder(num_streams)
+        self._early = [{} for _ in range(num_streams)]  # first period -> stripe, not yet contiguous
+        self._ready = [[] for _ in range(num_streams)]  # Contiguous stripes from next_period on
+        self._received = [0] * num_streams  # Periods received contiguously per stream
+        self.next_period = 0  # First period not yet decoded
+        self.buffered_bytes = 0
+
+    def add(self, stream_id, first_cycle, wire):
+        """Stores one stream's stripe (whole periods); returns the payload bytes that became complete, in order."""
+        if first_cycle % PERIOD_CYCLES:
+            raise ValueError(f"Stripes start on a period boundary (a multiple of {PERIOD_CYCLES} cycles).")
+        first_period = first_cycle // PERIOD_CYCLES
+        if first_period < self._received[stream_id]:
+            raise ValueError(f"Stream {stream_id}: periods from {first_period} were already received.")
+        stripe = np.array(wire, dtype=np.uint8).reshape(-1, PERIOD_WIRE_BYTES)  # Copy: the caller may reuse it
+        self._early[stream_id][first_period] = stripe
+        self.buffered_bytes += stripe.size
+        early, ready = self._early[stream_id], self._ready[stream_id]
+        while self._received[stream_id] in early:
+            stripe = early.pop(self._received[stream_id])
+            ready.append(stripe)
+            self._received[stream_id] += len(stripe)
+        return self._decode_ready()
+
+    def _take_rows(self, stream_id, count, out):
+        """Moves the next `count` periods of a stream's contiguous stripes into `out`."""
+        ready, filled = self._ready[stream_id], 0
+        while filled < count:
+            stripe = ready[0]
+            used = min(len(stripe), count - filled)
+            out[filled:filled + used] = stripe[:used]
+            filled += used
+            if used == len(stripe):
+                ready.pop(0)
+            else:
+                ready[0] = stripe[used:]
+        self.buffered_bytes -= count * PERIOD_WIRE_BYTES
+
+    def _decode_ready(self):
+        complete = min(self._received)
+        pool, out = self._pool, []
+        while self.next_period < complete:
+            count = min(self.batch_periods, complete - self.next_period)
+            for stream_id in range(self.num_streams):
+                self._take_rows(stream_id, count, pool.inputs[0, stream_id, :count])
+            pool.dispatch(0, count)
+            pool.wait()
+            out.append(self._payload.take(pool.outputs[0, :count].reshape(-1)))
+            self.next_period += count
+        return b''.join(out)
+
+    def finish(self):
+        """The rest of the payload once every stream has delivered its last stripe."""
+        if any(self._early) or any(self._ready):
+            raise ValueError("Stripes are still missing for some streams.")
+        return self._payload.finish()
+
+    def close(self):
+        self._pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --- Benchmark CLI ---
+
+def measure(num_streams, workers, payload, batch_periods=DEFAULT_BATCH_PERIODS, seed=13):
+    """
+    Encodes `payload`, then feeds the stripes to the decoder with the streams out of step (stream 0
+    several batches behind, the others shuffled). Returns (encode s, decode s, round trip ok, workers).
+    """
+    stripes = []
+    with StripedEncoder(num_streams, workers, batch_periods) as encoder:
+        started = time.perf_counter()
+        encoder.encode_file(io.BytesIO(payload),
+                            lambda stream_id, cycle, wire: stripes.append((stream_id, cycle, np.array(wire))))
+        encode_s = time.perf_counter() - started
+        used_workers = encoder.workers
+
+    rng = random.Random(seed)
+    lagging = [stripe for stripe in stripes if stripe[0] == 0]
+    others = [stripe for stripe in stripes if stripe[0] != 0]
+    lag = 3 * max(1, num_streams - 1)
+    order = []
+    for index in range(0, len(others), lag):
+        window = others[index:index + lag]
+        rng.shuffle(window)
+        order += window
+        if index >= 3 * lag and lagging:
+            order.append(lagging.pop(0))
+    order += lagging
+
+    with StripedDecoder(num_streams, workers, batch_periods) as decoder:
+        started = time.perf_counter()
+        parts = [decoder.add(*stripe) for stripe in order]
+        parts.append(decoder.finish())
+        decode_s = time.perf_counter() - started
+    return encode_s, decode_s, b''.join(parts) == payload, used_workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stripe a payload across streams on worker processes and "
+                                                 "reassemble it in order.")
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="Worker counts to measure.")
+    parser.add_argument('--size-mb', type=float, default=64.0)
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_PERIODS, help="Periods per worker dispatch.")
+    args = parser.parse_args(argv)
+
+    payload = os.urandom(int(args.size_mb * (1 << 20)))
+    mb = len(payload) / 1e6
+    print(f"[Striping] {mb:.1f} MB over {args.streams} streams, {os.cpu_count()} CPU(s) available")
+    baseline = None
+    for workers in args.workers:
+        encode_s, decode_s, ok, used = measure(args.streams, workers, payload, args.batch)
+        baseline = baseline or (encode_s, decode_s)
+        print(f"[Striping] workers {used:3d}: encode {mb / encode_s:8.1f} MB/s ({baseline[0] / encode_s:4.2f}x)  "
+              f"decode {mb / decode_s:8.1f} MB/s ({baseline[1] / decode_s:4.2f}x)  "
+              f"round trip {'OK' if ok else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
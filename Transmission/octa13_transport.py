@@ -0,0 +1,87 @@
+"""
+TCP fan-out for the Octa13 frame feed.
+
+The simulator and the headless tools (replayer, benchmarks) share this broadcaster so that
+every producer serves clients the same way: one listening socket, one accept thread and a
+lock-protected list of client sockets that each frame is written to.
+"""
+import socket
+import threading
+
+
+class TCPBroadcaster:
+    def __init__(self, verbose=True):
+        self.verbose = verbose  # Per-connection log lines; load tests with many clients turn them off
+        self.server_socket = None
+        self.client_sockets = []
+        self.accepted_count = 0  # Total connections accepted; lets stateful encoders notice new clients
+        self.lock = threading.Lock()
+
+    def start(self, host, port):
+        """Binds the listening socket and starts the accept thread. Returns False on failure."""
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.server_socket.bind((host, port))
+            self.server_socket.listen(socket.SOMAXCONN)  # Bursts of subscribers must not overflow the accept queue
+            print(f"[TCP Server] Listening for connections on {host}:{port}")
+            thread = threading.Thread(target=self.accept_clients, daemon=True)
+            thread.start()
+        except OSError as e:
+            print(f"[TCP Server] Error starting server: {e}")
+            self.server_socket.close()
+            self.server_socket = None
+            return False
+        return True
+
+    def accept_clients(self):
+        while True:
+            try:
+                client_socket, addr = self.server_socket.accept()
+                if self.verbose:
+                    print(f"[TCP Server] Accepted connection from {addr}")
+                with self.lock:
+                    self.client_sockets.append(client_socket)
+                    self.accepted_count += 1
+            except OSError:
+                break  # Socket was likely closed
+
+    @property
+    def client_count(self):
+        with self.lock:
+            return len(self.client_sockets)
+
+    def broadcast(self, message, on_locked=None):
+        """
+        Sends an already-framed message (bytes) to every connected client. on_locked(message), if
+        given, runs once the lock is held, just before the first send (e.g. octa13_latency.stamp_sent).
+        """
+        with self.lock:
+            if on_locked is not None:
+                on_locked(message)
+            dead_sockets = []
+            for client_socket in self.client_sockets:
+                try:
+                    client_socket.sendall(message)
+                except (socket.error, BrokenPipeError):
+                    dead_sockets.append(client_socket)
+
+            for dead in dead_sockets:
+                if self.verbose:
+                    print("[TCP Server] Client disconnected.")
+                self.client_sockets.remove(dead)
+                dead.close()
+
+    def shutdown(self):
+        if self.server_socket:
+            print("[TCP Server] Shutting down.")
+            with self.lock:
+                for client in self.client_sockets:
+                    client.close()
+                self.client_sockets = []
+            try:
+                self.server_socket.shutdown(socket.SHUT_RDWR)  # Wakes the accept thread
+            except OSError:
+                pass
+            self.server_socket.close()
+            self.server_socket = None
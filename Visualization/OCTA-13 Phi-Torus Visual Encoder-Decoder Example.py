@@ -1,18 +1,46 @@
+import argparse
 import tkinter as tk
+from functools import lru_cache
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
 from io import StringIO
-import hashlib
 from mpl_toolkits.mplot3d import Axes3D
+from octa13_keys import derive_13bit_key
 
 PHI = (1 + 5 ** 0.5) / 2
 NODES_PER_STREAM = 12
+NUM_STREAMS = 4
+TORUS_R, TORUS_r = 2, 0.8
+SURFACE_RESOLUTION = 30
+
+
+@lru_cache(maxsize=16)
+def phi_torus_tables(num_streams, nodes_per_stream, R, r):
+    """
+    Everything the torus animation needs for one configuration, computed once:
+    the surface mesh, the phi-vortex node schedule per stream (stream s starts at node 3s and
+    advances round(PHI * 9) nodes per step) and the (x, y, z) of every scheduled node.
+    """
+    theta, phi = np.meshgrid(np.linspace(0, 2 * np.pi, SURFACE_RESOLUTION),
+                             np.linspace(0, 2 * np.pi, SURFACE_RESOLUTION))
+    surface = ((R + r * np.cos(theta)) * np.cos(phi), (R + r * np.cos(theta)) * np.sin(phi), r * np.sin(theta))
+
+    streams = np.arange(num_streams)[:, None]
+    steps = np.arange(nodes_per_stream)[None, :]
+    schedule = (streams * 3 + steps * round(PHI * 9)) % nodes_per_stream  # (streams, nodes)
+
+    phi_vals = schedule * (2 * np.pi / nodes_per_stream)
+    theta_vals = (streams / num_streams) * 2 * np.pi
+    ring = R + r * np.cos(theta_vals)
+    nodes = np.stack([ring * np.cos(phi_vals), ring * np.sin(phi_vals),
+                      np.broadcast_to(r * np.sin(theta_vals), phi_vals.shape)], axis=-1)  # (streams, nodes, 3)
+    return surface, schedule, nodes
+
 
 class OCTA13GUI:
-    def __init__(self, root):
+    def __init__(self, root, num_streams=NUM_STREAMS, nodes_per_stream=NODES_PER_STREAM, R=TORUS_R, r=TORUS_r):
         self.root = root
         self.root.title("OCTA-13 Protocol GUI with Phi-Vortex Torus")
         self.root.geometry("1800x900")
@@ -21,8 +49,13 @@ class OCTA13GUI:
         self.frame = 0
         self.running = False
         self.torus_frame = 0
-        self.max_frames = NODES_PER_STREAM
+        self.num_streams = num_streams
+        self.nodes_per_stream = nodes_per_stream
+        self.torus_radii = (R, r)
+        self.max_frames = nodes_per_stream
         self.stream_colors = ['red', 'green', 'blue', 'orange']
+        if num_streams > len(self.stream_colors):
+            self.stream_colors = [plt.cm.hsv(s / num_streams) for s in range(num_streams)]
 
         self.nod_symbols = {
             0: "⬢", 1: "⬡", 2: "◉", 3: "⬣",
@@ -30,7 +63,7 @@ class OCTA13GUI:
         }
 
         self.setup_gui()
-        self.update_all()
+        self.root.after_idle(self.update_all)  # Fill the views once the window is up
 
     def generate_sierpinski_triangle(self):
         grid = np.zeros((self.grid_size, self.grid_size), dtype=int)
@@ -41,12 +74,7 @@ class OCTA13GUI:
         return grid
 
     def derive_13bit_key(self):
-        flat = self.grid_data.flatten()
-        data = ''.join(map(str, flat))
-        hashed = hashlib.sha256(data.encode()).hexdigest()
-        first_4_hex_digits = hashed[:4]
-        key_bin = bin(int(first_4_hex_digits, 16))[2:].zfill(16)[:13]
-        return key_bin
+        return derive_13bit_key(self.grid_data)
 
     def setup_gui(self):
         top_frame = tk.Frame(self.root)
@@ -91,6 +119,7 @@ class OCTA13GUI:
         self.torus_ax = self.torus_fig.add_subplot(111, projection='3d')
         self.torus_canvas = FigureCanvasTkAgg(self.torus_fig, master=top_frame)
         self.torus_canvas.get_tk_widget().pack(side=tk.RIGHT)
+        self.setup_torus_artists()
 
         self.ani = animation.FuncAnimation(self.torus_fig, self.animate_torus, interval=1000, blit=False)
 
@@ -116,6 +145,7 @@ class OCTA13GUI:
         self.canvas.draw()
 
     def update_text_output(self):
+        import pandas as pd  # Deferred: slow to import and only the text tables use it
         packet_records = []
         encoded_packets = []
         for i in range(8):
@@ -183,41 +213,36 @@ class OCTA13GUI:
             self.update_all()
             self.root.after(1000, self.auto_cycle)
 
-    def phi_vortex_indices(self, seed):
-        indices = [seed]
-        for _ in range(1, NODES_PER_STREAM):
-            next_index = (indices[-1] + round(PHI * 9)) % NODES_PER_STREAM
-            indices.append(next_index)
-        return indices
+    def setup_torus_artists(self):
+        """Draws the surface and stream lines once; animation ticks only move the head markers."""
+        surface, _, self.stream_nodes = phi_torus_tables(self.num_streams, self.nodes_per_stream, *self.torus_radii)
+        self.torus_ax.plot_surface(*surface, color='lightblue', alpha=0.3)
+        self.stream_heads = []
+        for s in range(self.num_streams):
+            x_line, y_line, z_line = self.stream_nodes[s].T
+            self.torus_ax.plot(x_line, y_line, z_line, color=self.stream_colors[s], linewidth=1.5)
+            head, = self.torus_ax.plot(x_line[:1], y_line[:1], z_line[:1], 'o', color=self.stream_colors[s],
+                                       markersize=9)
+            self.stream_heads.append(head)
+        self.torus_ax.set_axis_off()
 
     def animate_torus(self, i):
-        self.torus_ax.clear()
-        theta = np.linspace(0, 2 * np.pi, 30)
-        phi = np.linspace(0, 2 * np.pi, 30)
-        theta, phi = np.meshgrid(theta, phi)
-        R, r = 2, 0.8
-        X = (R + r * np.cos(theta)) * np.cos(phi)
-        Y = (R + r * np.cos(theta)) * np.sin(phi)
-        Z = r * np.sin(theta)
-        self.torus_ax.plot_surface(X, Y, Z, color='lightblue', alpha=0.3)
-
-        for s in range(4):
-            vortex_indices = self.phi_vortex_indices(seed=s * 3)
-            phi_vals = [(j * 2 * np.pi / NODES_PER_STREAM) for j in vortex_indices]
-            theta_val = (s / 4) * 2 * np.pi
-            x_line = [(R + r * np.cos(theta_val)) * np.cos(p) for p in phi_vals]
-            y_line = [(R + r * np.cos(theta_val)) * np.sin(p) for p in phi_vals]
-            z_line = [r * np.sin(theta_val)] * NODES_PER_STREAM
-
-            self.torus_ax.plot(x_line, y_line, z_line, color=self.stream_colors[s], linewidth=1.5)
+        idx = self.torus_frame % self.nodes_per_stream
+        for head, (x, y, z) in zip(self.stream_heads, self.stream_nodes[:, idx]):
+            head.set_data_3d([x], [y], [z])
+        self.torus_ax.view_init(elev=30, azim=(i * 30) % 360)
+        return self.stream_heads  # FuncAnimation redraws the canvas after each frame
 
-            idx = self.torus_frame % NODES_PER_STREAM
-            self.torus_ax.scatter(x_line[idx], y_line[idx], z_line[idx], color=self.stream_colors[s], s=80)
 
-        self.torus_ax.view_init(elev=30, azim=(i * 30) % 360)
-        self.torus_ax.set_axis_off()
-        self.torus_canvas.draw()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCTA-13 Phi-Torus visual encoder/decoder")
+    parser.add_argument('--streams', type=int, default=NUM_STREAMS, help="Number of phi-vortex streams.")
+    parser.add_argument('--nodes-per-stream', type=int, default=NODES_PER_STREAM, help="Nodes on each stream.")
+    parser.add_argument('--major-radius', type=float, default=TORUS_R, help="Torus major radius R.")
+    parser.add_argument('--minor-radius', type=float, default=TORUS_r, help="Torus minor radius r.")
+    args = parser.parse_args()
 
-root = tk.Tk()
-app = OCTA13GUI(root)
-root.mainloop()
+    root = tk.Tk()
+    app = OCTA13GUI(root, num_streams=args.streams, nodes_per_stream=args.nodes_per_stream,
+                    R=args.major_radius, r=args.minor_radius)
+    root.mainloop()
@@ -4,12 +4,10 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import matplotlib.colors as mcolors
-import pandas as pd
-import json
-import csv
-import hashlib
 from io import StringIO
 from tkinter import filedialog
+from octa13_keys import derive_13bit_key
+from octa13_glyphs import NOD_SYMBOLS, glyph_fields, pack_glyphs, glyph_bits, glyph_string, export_cube
 
 class OCTA13GUI:
     def __init__(self, root):
@@ -21,14 +19,11 @@ class OCTA13GUI:
         self.frame = 0
         self.running = False
 
-        self.nod_symbols = {
-            0: "⬢", 1: "⬡", 2: "◉", 3: "⬣",
-            4: "⬠", 5: "⬤", 6: "△", 7: "◯"
-        }
+        self.nod_symbols = dict(NOD_SYMBOLS)
         self.colors = list(mcolors.TABLEAU_COLORS.values())
 
         self.setup_gui()
-        self.update_all()
+        self.root.after_idle(self.update_all)  # Fill the views once the window is up
 
     def generate_sierpinski_triangle(self):
         grid = np.zeros((self.grid_size, self.grid_size), dtype=int)
@@ -39,12 +34,7 @@ class OCTA13GUI:
         return grid
 
     def derive_13bit_key(self):
-        flat = self.grid_data.flatten()
-        data = ''.join(map(str, flat))
-        hashed = hashlib.sha256(data.encode()).hexdigest()
-        first_4_hex_digits = hashed[:4]
-        key_bin = bin(int(first_4_hex_digits, 16))[2:].zfill(16)[:13]
-        return key_bin
+        return derive_13bit_key(self.grid_data)
 
     def setup_gui(self):
         top_frame = tk.Frame(self.root)
@@ -115,35 +105,33 @@ class OCTA13GUI:
         self.canvas.draw()
 
     def update_text_output(self):
+        import pandas as pd  # Deferred: slow to import and only the text tables use it
+        fields = glyph_fields(self.grid_data)
+        glyphs = pack_glyphs(self.grid_data)
         packet_records = []
-        encoded_packets = []
         for i in range(8):
             for j in range(8):
-                nod = self.grid_data[i, j]
-                octv = (i + j) % 8
-                pos = (i ^ j) % 8
-                chk = (octv ^ nod ^ pos) % 8
-                end = 1 if i == 0 or j == 0 or i == 7 or j == 7 or i == j else 0
-                packet = f'{octv:03b}{nod:03b}{pos:03b}{chk:03b}{end}'
-                encoded_packets.append(packet)
+                nod = int(fields['nod'][i, j])
                 packet_records.append({
-                    "Pixel": f"({j},{i})", "OCT": f'{octv:03b}', "NOD": f'{nod:03b}',
-                    "POS": f'{pos:03b}', "CHK": f'{chk:03b}', "END": str(end),
-                    "Binary": packet, "Symbol": self.nod_symbols[nod]
+                    "Pixel": f"({j},{i})", "OCT": f"{fields['oct'][i, j]:03b}", "NOD": f'{nod:03b}',
+                    "POS": f"{fields['pos'][i, j]:03b}", "CHK": f"{fields['chk'][i, j]:03b}",
+                    "END": str(fields['end'][i, j]), "Binary": glyph_string(glyphs[i, j]),
+                    "Symbol": self.nod_symbols[nod]
                 })
 
         packet_df = pd.DataFrame(packet_records)
         grid_df = pd.DataFrame(self.grid_data, columns=[f"X={i}" for i in range(8)])
         grid_df.index = [f"Y={i}" for i in range(8)]
 
-        full_stream = ''.join(encoded_packets)
+        full_stream = glyph_bits(glyphs)
+        encoded_count = glyphs.size
 
         buffer = StringIO()
         buffer.write("=== OCTA-13 Packet Table ===\n")
         buffer.write(packet_df.to_string(index=False))
         buffer.write("\n\n=== NOD Layer Grid Data ===\n")
         buffer.write(grid_df.to_string())
-        buffer.write(f"\n\n=== Full OCTA-13 Encoded Stream ({len(encoded_packets)} packets × 13 bits) ===\n")
+        buffer.write(f"\n\n=== Full OCTA-13 Encoded Stream ({encoded_count} packets × 13 bits) ===\n")
         buffer.write(full_stream)
         buffer.write(f"\nTotal Bits: {len(full_stream)}")
 
@@ -217,47 +205,7 @@ class OCTA13GUI:
         if not filepath:
             return
 
-        symbol_map = {str(k): v for k, v in self.nod_symbols.items()}
-        cube_data = []
-        bitstream = []
-
-        for x in range(8):
-            for y in range(8):
-                nod = self.grid_data[y][x]
-                symbol = self.nod_symbols[nod]
-                for z in range(8):
-                    octv = (x + y) % 8
-                    pos = (x ^ y) % 8
-                    chk = (octv ^ nod ^ pos) % 8
-                    end = 1 if x == 0 or y == 0 or x == 7 or y == 7 or x == y else 0
-                    packet = f'{octv:03b}{nod:03b}{pos:03b}{chk:03b}{end}'
-                    bitstream.append(packet)
-                    cube_data.append({
-                        "x": x, "y": y, "z": z, "symbol": symbol, "nod": nod,
-                        "oct": f'{octv:03b}', "pos": f'{pos:03b}',
-                        "chk": f'{chk:03b}', "end": str(end), "bitstream": packet
-                    })
-
-        # JSON
-        with open(filepath.replace(".octa13", ".json"), "w") as f_json:
-            json.dump({
-                "dimensions": [8, 8, 8],
-                "symbol_map": symbol_map,
-                "cube": cube_data,
-                "octa13_stream": ''.join(bitstream)
-            }, f_json, indent=2)
-
-        # CSV
-        with open(filepath.replace(".octa13", ".csv"), "w", newline='') as f_csv:
-            writer = csv.DictWriter(f_csv, fieldnames=cube_data[0].keys())
-            writer.writeheader()
-            writer.writerows(cube_data)
-
-        # Binary
-        with open(filepath.replace(".octa13", ".bin"), "wb") as f_bin:
-            bit_string = ''.join(bitstream)
-            f_bin.write(int(bit_string, 2).to_bytes((len(bit_string) + 7) // 8, byteorder='big'))
-
+        export_cube(self.grid_data, filepath, self.nod_symbols)
         print("Exported OCTA-13 Cube to JSON, CSV, and BIN.")
 
 root = tk.Tk()
@@ -0,0 +1,110 @@
+"""
+13-bit OCTA-13 glyphs of an 8x8 NOD grid and the cube export, shared by the visualizers.
+
+The cell at column x, row y with NOD value n becomes the glyph OCT|NOD|POS|CHK|END (3+3+3+3+1 bits):
+
+    OCT = (x + y) % 8     POS = x ^ y     CHK = OCT ^ NOD ^ POS     END = 1 on the border and the diagonal
+
+    glyph_fields(grids)            -> oct, nod, pos, chk, end arrays shaped like the grid(s)
+    pack_glyphs(grids)             -> uint16 glyph values; works on one (8, 8) grid or a batch (..., 8, 8)
+    glyph_bits(values)             -> the glyphs as one string of '0'/'1' characters, 13 per glyph
+    glyph_bytes(values)            -> the same bits as bytes (int(glyph_bits(values), 2) in big-endian)
+    cube_records(grid, nod_symbols)-> one dict per voxel of the 8x8x8 cube, in export order
+    export_cube(grid, path, nod_symbols) writes the .json, .csv and .bin files for `path`
+
+NOD_SYMBOLS is the visualizers' symbol for each NOD value.
+
+All of it is vectorized over cells; only cube_records builds per-voxel Python objects.
+"""
+import csv
+import json
+
+import numpy as np
+
+GLYPH_BITS = 13
+CUBE_DEPTH = 8
+NOD_SYMBOLS = {0: "⬢", 1: "⬡", 2: "◉", 3: "⬣", 4: "⬠", 5: "⬤", 6: "△", 7: "◯"}
+_BIT_SHIFTS = np.arange(GLYPH_BITS - 1, -1, -1, dtype=np.uint16)
+
+
+def glyph_fields(grids):
+    """The five glyph fields of every cell; the last two axes of `grids` are (y, x)."""
+    nod = np.asarray(grids).astype(np.uint16)
+    height, width = nod.shape[-2:]
+    y, x = np.indices((height, width), dtype=np.uint16)
+    octv = (x + y) % 8
+    pos = (x ^ y) % 8
+    chk = (octv ^ nod ^ pos) % 8
+    end = ((x == 0) | (y == 0) | (x == width - 1) | (y == height - 1) | (x == y)).astype(np.uint16)
+    shape = nod.shape
+    return {'oct': np.broadcast_to(octv, shape), 'nod': nod, 'pos': np.broadcast_to(pos, shape), 'chk': chk,
+            'end': np.broadcast_to(end, shape)}
+
+
+def pack_glyphs(grids):
+    f = glyph_fields(grids)
+    return (f['oct'] << 10) | (f['nod'] << 7) | (f['pos'] << 4) | (f['chk'] << 1) | f['end']
+
+
+def _bit_array(values):
+    values = np.asarray(values, dtype=np.uint16).ravel()
+    return ((values[:, None] >> _BIT_SHIFTS) & 1).astype(np.uint8).ravel()
+
+
+def glyph_bits(values):
+    return (_bit_array(values) + ord('0')).tobytes().decode('ascii')
+
+
+def glyph_bytes(values):
+    """Big-endian bytes of the bit string, zero-padded at the front to a whole byte."""
+    bits = _bit_array(values)
+    pad = -len(bits) % 8
+    if pad:
+        bits = np.concatenate([np.zeros(pad, dtype=np.uint8), bits])
+    return np.packbits(bits).tobytes()
+
+
+def glyph_string(value):
+    return format(int(value), f'0{GLYPH_BITS}b')
+
+
+def cube_records(grid, nod_symbols):
+    """Voxel dicts ordered x, then y, then z; every z layer of a column repeats the column's glyph."""
+    grid = np.asarray(grid)
+    fields = {name: values.T.ravel() for name, values in glyph_fields(grid).items()}  # x-major
+    packed = pack_glyphs(grid).T.ravel()
+    height = grid.shape[0]
+    records = []
+    for column in range(len(packed)):
+        x, y = divmod(column, height)
+        nod = int(fields['nod'][column])
+        column_fields = {"symbol": nod_symbols[nod], "nod": nod,
+                         "oct": f"{fields['oct'][column]:03b}", "pos": f"{fields['pos'][column]:03b}",
+                         "chk": f"{fields['chk'][column]:03b}", "end": str(fields['end'][column]),
+                         "bitstream": glyph_string(packed[column])}
+        for z in range(CUBE_DEPTH):
+            records.append({"x": x, "y": y, "z": z, **column_fields})
+    return records
+
+
+def export_cube(grid, filepath, nod_symbols):
+    """Writes <name>.json, <name>.csv and <name>.bin for a path ending in .octa13."""
+    grid = np.asarray(grid)
+    cube_data = cube_records(grid, nod_symbols)
+    cube_glyphs = np.repeat(pack_glyphs(grid).T.ravel(), CUBE_DEPTH)
+
+    with open(filepath.replace(".octa13", ".json"), "w") as f_json:
+        json.dump({
+            "dimensions": [int(grid.shape[1]), int(grid.shape[0]), CUBE_DEPTH],
+            "symbol_map": {str(k): v for k, v in nod_symbols.items()},
+            "cube": cube_data,
+            "octa13_stream": glyph_bits(cube_glyphs)
+        }, f_json, indent=2)
+
+    with open(filepath.replace(".octa13", ".csv"), "w", newline='') as f_csv:
+        writer = csv.DictWriter(f_csv, fieldnames=cube_data[0].keys())
+        writer.writeheader()
+        writer.writerows(cube_data)
+
+    with open(filepath.replace(".octa13", ".bin"), "wb") as f_bin:
+        f_bin.write(glyph_bytes(cube_glyphs))
@@ -0,0 +1,131 @@
+"""
+13-bit key derivation for OCTA-13 grid states, shared by the visualizers.
+
+The key is the top 13 bits of SHA-256 over the grid's cells written as decimal digits in row-major
+order (the historical definition, so existing keys are unchanged). Grid cells are NOD indices 0-7,
+so those digits are just the cell bytes plus ord('0'): the grid is hashed straight from its array
+buffer, without building a string or going through hex.
+
+    derive_13bit_key(grid)          -> '1011001110100' (memoized by grid content)
+    derive_13bit_keys(grids)        -> uint16 array of key values for an (N, 8, 8) batch
+    key_bits(value)                 -> the 13-character bit string of a key value
+
+A batch is deduplicated first (calibration sweeps revisit the same states constantly) and large
+batches are hashed in worker processes: SHA-256 over 64-byte inputs holds the GIL, so threads
+would not run in parallel.
+
+Usage:
+    python octa13_keys.py --grids 1000000 --workers 4     # throughput of the batch API
+"""
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+KEY_BITS = 13
+_DIGIT_ZERO = ord('0')
+_PARALLEL_MIN_GRIDS = 50000  # Below this, pool start-up costs more than it saves
+
+
+def _grid_digits(grid):
+    """The grid as ASCII digit bytes, exactly ''.join(map(str, grid.flatten())).encode()."""
+    grid = np.asarray(grid)
+    if grid.size and 0 <= grid.min() and grid.max() <= 9:
+        return (grid.astype(np.uint8) + _DIGIT_ZERO).tobytes()
+    return ''.join(map(str, grid.flatten())).encode()  # Out-of-range cells: hash their decimal text
+
+
+def _key_value(digits):
+    digest = hashlib.sha256(digits).digest()
+    return ((digest[0] << 8) | digest[1]) >> (16 - KEY_BITS)
+
+
+def key_bits(value):
+    return format(int(value), f'0{KEY_BITS}b')
+
+
+@lru_cache(maxsize=65536)
+def _cached_key(digits):
+    return key_bits(_key_value(digits))
+
+
+def derive_13bit_key(grid):
+    """The 13-bit key of one grid, as a bit string. Results are memoized by grid content."""
+    return _cached_key(_grid_digits(grid))
+
+
+def _hash_rows(rows):
+    """Key values for a block of equal-length digit rows (runs in worker processes for big batches)."""
+    width = rows.shape[1]
+    data = memoryview(rows.tobytes())
+    sha256 = hashlib.sha256
+    values = np.empty(len(rows), dtype=np.uint16)
+    for i in range(len(rows)):
+        digest = sha256(data[i * width:(i + 1) * width]).digest()
+        values[i] = ((digest[0] << 8) | digest[1]) >> (16 - KEY_BITS)
+    return values
+
+
+def derive_13bit_keys(grids, workers=None):
+    """
+    Key values (uint16, 0..8191) for a batch of grids shaped (N, H, W) with cells 0-9.
+    Duplicate grids are hashed once; workers=None uses every CPU once the batch is large enough.
+    """
+    grids = np.asarray(grids)
+    if grids.ndim != 3:
+        raise ValueError(f"Expected a batch of grids shaped (N, H, W), got {grids.shape}.")
+    if grids.size and not (0 <= grids.min() and grids.max() <= 9):
+        raise ValueError("Batch key derivation requires grid cells in 0-9.")
+    rows = np.ascontiguousarray(grids.reshape(len(grids), -1).astype(np.uint8) + _DIGIT_ZERO)
+    if len(rows) == 0:
+        return np.empty(0, dtype=np.uint16)
+
+    # Deduplicate whole rows by viewing each as one opaque value
+    row_view = rows.view(np.dtype((np.void, rows.shape[1]))).ravel()
+    unique_view, inverse = np.unique(row_view, return_inverse=True)
+    unique_rows = unique_view.view(np.uint8).reshape(len(unique_view), rows.shape[1])
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(unique_rows) >= _PARALLEL_MIN_GRIDS:
+        chunks = np.array_split(unique_rows, workers * 4)
+        with ProcessPoolExecutor(workers) as pool:
+            unique_values = np.concatenate(list(pool.map(_hash_rows, chunks)))
+    else:
+        unique_values = _hash_rows(unique_rows)
+    return unique_values[inverse.ravel()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCTA-13 13-bit key derivation.")
+    parser.add_argument('--grids', type=int, default=1000000, help="Grids per batch.")
+    parser.add_argument('--distinct', type=int, default=None,
+                        help="Draw the batch from this many distinct states (default: all random).")
+    parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(13)
+    pool_size = args.distinct or args.grids
+    states = rng.integers(0, 8, size=(pool_size, 8, 8), dtype=np.uint8)
+    grids = states[rng.integers(0, pool_size, size=args.grids)] if args.distinct else states
+
+    sample = min(len(grids), 20000)
+    start = time.perf_counter()
+    for grid in grids[:sample]:
+        hashlib.sha256(''.join(map(str, grid.flatten())).encode()).hexdigest()
+    string_rate = sample / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    values = derive_13bit_keys(grids, args.workers)
+    batch_rate = len(grids) / (time.perf_counter() - start)
+    if key_bits(values[0]) != derive_13bit_key(grids[0]):
+        raise RuntimeError("Batch and single-grid keys disagree.")
+    print(f"[Keys] string + hexdigest path: {string_rate:12.0f} grids/s")
+    print(f"[Keys] batch API:               {batch_rate:12.0f} grids/s  ({batch_rate / string_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
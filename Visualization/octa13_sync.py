@@ -0,0 +1,364 @@
+"""
+Glyph alignment for raw 13-bit OCTA-13 streams: find where glyphs start in a bitstream joined at
+an arbitrary bit, keep that alignment, and find it again after slips.
+
+A raw stream is glyphs back to back, most significant bit first (glyph_stream_bytes). A glyph is
+recognized two ways:
+
+    the SIER-13-INIT sigil 1010010010010 (OCT 101, NOD 001, POS 001, CHK 001, END 0); its CHK does
+    not match OCT ^ NOD ^ POS, so no data glyph can look like it
+    a data glyph, whose CHK == OCT ^ NOD ^ POS (1 in 8 random bit patterns pass)
+
+Hunting tests the 13-bit window at every bit position at once, 64 positions per operation: the
+bytes are read as big-endian uint64 words, so bit p of the stream is bit p of a packed bitstream,
+and every test is bitwise logic on copies of it shifted a few bits earlier. CHK == OCT ^ NOD ^ POS
+at p is "bits p + j, p + 3 + j, p + 6 + j and p + 9 + j XOR to 0 for j = 0, 1, 2"; the sigil at p
+is "10" at p and p + 11 with "100" at p + 2, p + 5 and p + 8; "the glyphs 13, 26, ... bits later
+are recognized too" is an AND with the result shifted by multiples of 13 (doubling, so log2 of the
+run length ANDs). About 20 shifted copies of the block in all, for every bit position. Alignment locks at
+the first sigil followed by SIGIL_CONFIRM_GLYPHS recognized glyphs, or, if there is no sigil in the
+window, at the first run of CHK_LOCK_GLYPHS recognized glyphs 13 bits apart. CHK-only locks let a
+receiver join between sigils; long runs of one repeated glyph can fool them, sigil locks cannot be
+fooled that way.
+
+Once locked, 8 glyphs fill exactly 13 bytes, so the stream is read as 13-byte rows: one word per
+glyph at a fixed byte of the row, shifted by a fixed amount, with no per-glyph indexing.
+LOSS_GLYPHS failing glyphs in a row drop the lock and hunting resumes at the first of them; an
+isolated failing glyph (a flipped bit) is passed on and counted, and octa13_verify.py tells which
+field is at fault. Every lock after the first is a resync.
+
+    sync = GlyphSync()
+    glyphs, events = sync.feed(chunk)   # data glyphs (uint16, sigils removed) and SyncEvents
+    sync.stats()                        # bits, glyphs, sigils, bad glyphs, locks, resyncs, bits skipped
+
+Usage:
+    python octa13_sync.py --grids 65536 --slips 50 --flips 200   # impaired stream: throughput and resyncs
+"""
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from octa13_glyphs import GLYPH_BITS, pack_glyphs
+
+SIGIL = 0b1010010010010  # SIER-13-INIT
+SIGIL_CONFIRM_GLYPHS = 8
+CHK_LOCK_GLYPHS = 12
+LOSS_GLYPHS = 3
+HUNT_BLOCK_BYTES = 1 << 16
+_HUNT_FIRST_BYTES = 256  # Hunting starts small (a relock is usually close) and doubles up to HUNT_BLOCK_BYTES
+_ROW_BYTES = GLYPH_BITS  # 8 glyphs = 104 bits = 13 bytes
+_WINDOW = (1 << GLYPH_BITS) - 1
+
+BAD, DATA, SIGIL_CLASS = 0, 1, 2
+
+
+def _class_table():
+    values = np.arange(1 << GLYPH_BITS, dtype=np.uint16)
+    chk = ((values >> 1) ^ (values >> 4) ^ (values >> 7) ^ (values >> 10)) & 7
+    table = np.where(chk == 0, DATA, BAD).astype(np.uint8)
+    table[SIGIL] = SIGIL_CLASS
+    return table
+
+
+_CLASS = _class_table()
+_ROW_SHIFTS = [np.array([32 - GLYPH_BITS - ((s0 + GLYPH_BITS * j) & 7) for j in range(8)], dtype=np.uint32)
+               for s0 in range(8)]  # Per starting bit of a 13-byte row: glyph j's shift in its 32-bit word
+_ROW_BYTES_AT = [np.array([(s0 + GLYPH_BITS * j) >> 3 for j in range(8)]) for s0 in range(8)]
+
+SyncEvent = namedtuple('SyncEvent', 'bit kind via')  # kind 'lock' (via 'sigil' or 'chk') or 'loss'
+
+
+def glyph_stream_bytes(values):
+    """Glyphs back to back, MSB first, zero-padded at the end to a whole byte (unlike glyph_bytes)."""
+    values = np.asarray(values, dtype=np.uint16).ravel()
+    bits = ((values[:, None] >> np.arange(GLYPH_BITS - 1, -1, -1, dtype=np.uint16)) & 1).astype(np.uint8)
+    return np.packbits(bits.ravel()).tobytes()
+
+
+def sigil_framed(grids):
+    """The glyphs of each 8x8 grid preceded by a sigil, as one uint16 array."""
+    glyphs = pack_glyphs(np.asarray(grids).reshape(-1, 8, 8)).reshape(-1, 64)
+    return np.concatenate([np.full((len(glyphs), 1), SIGIL, dtype=np.uint16), glyphs], axis=1).ravel()
+
+
+def _words(data, start, count, row_bytes=1, columns=1):
+    """Big-endian 32-bit words read at every byte offset start + row_bytes * r + c (unaligned, no copy)."""
+    return np.ndarray((count, columns), dtype='>u4', buffer=data, offset=start, strides=(row_bytes, 1))
+
+
+def _stream_bits(data):
+    """The bytes as a packed bitstream: uint64 words whose bit 63 - k is stream bit 64 * word + k."""
+    padded = np.zeros(-(-len(data) // 8) * 8, dtype=np.uint8)
+    padded[:len(data)] = data
+    return padded.view('>u8').astype(np.uint64)
+
+
+def _recognized(stream):
+    """Bitstreams of the positions where a data glyph, or the sigil, starts (windows past the end are junk)."""
+    # In place wherever possible: every temporary is another pass over the block
+    one_zero = _shifted(stream, 1)
+    np.invert(one_zero, out=one_zero)
+    one_zero &= stream  # "10" at p
+    one_zero_zero = _shifted(stream, 2)
+    np.invert(one_zero_zero, out=one_zero_zero)
+    one_zero_zero &= one_zero  # "100" at p
+    sigil = _shifted(one_zero_zero, 3)
+    sigil &= one_zero_zero
+    sigil &= _shifted(one_zero_zero, 6)
+    sigil = _shifted(sigil, 2)
+    sigil &= one_zero
+    sigil &= _shifted(one_zero, 11)  # SIGIL = 10 100 100 100 10
+
+    recognized = _shifted(stream, 3)
+    recognized ^= stream
+    recognized ^= _shifted(recognized, 6)  # Bit p: stream bits p, p + 3, p + 6 and p + 9 XORed
+    recognized |= _shifted(recognized, 1)
+    recognized |= _shifted(recognized, 1)  # Bit p: a field bit at p, p + 1 or p + 2 mismatched
+    np.invert(recognized, out=recognized)
+    recognized |= sigil
+    return recognized, sigil
+
+
+def _shifted(bits, count):
+    """The packed bitstream `bits` moved `count` positions earlier (bit p becomes bit p - count), zero-filled."""
+    words, offset = divmod(count, 64)
+    if words >= len(bits):
+        return np.zeros_like(bits)
+    out = np.empty_like(bits)
+    body = out[:len(bits) - words]
+    np.left_shift(bits[words:], np.uint64(offset), out=body)
+    if offset:
+        body[:-1] |= bits[words + 1:] >> np.uint64(64 - offset)
+    out[len(body):] = 0
+    return out
+
+
+def _bit_runs(bits, stride, length, spans):
+    """
+    _runs() over a packed bitstream: position q set if q, q + stride, ... (length terms) all are.
+    `spans` ({1: bits} to start) keeps the power-of-two runs for the next call on the same bits.
+    """
+    result, covered, span = None, 0, 1
+    while covered < length:
+        if span not in spans:
+            previous = spans[span // 2]
+            spans[span] = previous & _shifted(previous, stride * (span // 2)) if previous.any() else previous
+        if length & span:
+            run = spans[span] if result is None else _shifted(spans[span], stride * covered)
+            result = run if result is None else result & run
+            covered += span
+        span *= 2
+    return result
+
+
+def _first_set(bits, first, limit):
+    """First set position in [first, limit) of a packed bitstream, or None."""
+    head = int(bits[0]) & ((1 << (64 - first)) - 1) if len(bits) else 0
+    if head:
+        position = 64 - head.bit_length()
+    else:
+        words = np.flatnonzero(bits[1:])
+        if not len(words):
+            return None
+        position = 64 * (1 + int(words[0])) + 64 - int(bits[1 + words[0]]).bit_length()
+    return position if position < limit else None
+
+
+def _runs(good, stride, length):
+    """good[q] & good[q + stride] & ... (length terms) for every q that has all of them, by doubling."""
+    run, span = good, 1  # run[q]: the `span` terms from q all hold
+    result, covered = None, 0
+    while True:
+        if length & span:  # Append this power-of-two run after the terms already covered
+            offset = stride * covered
+            if result is None:
+                result = run
+            else:
+                count = min(len(result), len(run) - offset)
+                result = result[:max(count, 0)] & run[offset:offset + max(count, 0)]
+            covered += span
+        if covered == length:
+            return result.copy() if result is good else result
+        run = run[:len(run) - stride * span] & run[stride * span:]
+        span *= 2
+
+
+class GlyphSync:
+    def __init__(self, sigil_confirm=SIGIL_CONFIRM_GLYPHS, chk_lock=CHK_LOCK_GLYPHS, loss=LOSS_GLYPHS):
+        self.sigil_confirm = sigil_confirm
+        self.chk_lock = chk_lock
+        self.loss = loss
+        self.reset()
+
+    def reset(self):
+        self.locked = False
+        self.cursor = 0  # Absolute bit: next glyph when locked, next candidate position when hunting
+        self._base = 0  # Absolute bit of self._buffer[0]
+        self._buffer = np.zeros(0, dtype=np.uint8)
+        self.bits = self.glyphs = self.sigils = self.bad_glyphs = 0
+        self.locks = self.losses = self.skipped_bits = 0
+        self._hunt_bytes = _HUNT_FIRST_BYTES
+
+    @property
+    def resyncs(self):
+        return max(0, self.locks - 1)
+
+    def stats(self):
+        return {'bits': self.bits, 'glyphs': self.glyphs, 'sigils': self.sigils, 'bad_glyphs': self.bad_glyphs,
+                'locks': self.locks, 'losses': self.losses, 'resyncs': self.resyncs,
+                'skipped_bits': self.skipped_bits, 'locked': self.locked}
+
+    def feed(self, data):
+        """Returns (data glyphs completed by `data` as uint16, list of SyncEvents)."""
+        chunk = np.frombuffer(data, dtype=np.uint8)
+        self.bits += 8 * len(chunk)
+        self._buffer = np.concatenate([self._buffer, chunk]) if len(self._buffer) else chunk
+        out, events = [], []
+        while self._track(out, events) if self.locked else self._hunt(events):
+            pass
+        consumed = (self.cursor - self._base) >> 3
+        self._buffer = self._buffer[consumed:]
+        self._base += 8 * consumed
+        glyphs = np.concatenate(out) if out else np.zeros(0, dtype=np.uint16)
+        return glyphs, events
+
+    # --- Hunting ---
+
+    def _hunt(self, events):
+        offset = self.cursor - self._base
+        start, first = offset >> 3, offset & 7
+        lookahead = (GLYPH_BITS * max(self.chk_lock, self.sigil_confirm + 1) + 7) // 8 + 3
+        end = min(len(self._buffer), start + self._hunt_bytes + lookahead)
+        if end - start <= lookahead:
+            return False
+        good, sigil = _recognized(_stream_bits(self._buffer[start:end]))
+        spans = {1: good}  # Both rules test runs of recognized glyphs: they share the doubling steps
+        by_sigil = sigil & _shifted(_bit_runs(good, GLYPH_BITS, self.sigil_confirm, spans), GLYPH_BITS)
+        by_chk = _bit_runs(good, GLYPH_BITS, self.chk_lock, spans)
+        # Positions with the lookahead both rules need
+        examined = 8 * (end - start - 3) - GLYPH_BITS * max(self.sigil_confirm, self.chk_lock - 1)
+        for candidates, via in ((by_sigil, 'sigil'), (by_chk, 'chk')):
+            hit = _first_set(candidates, first, examined)
+            if hit is not None:
+                position = self._base + 8 * start + hit
+                self.skipped_bits += position - self.cursor
+                self.cursor = position
+                self.locked = True
+                self.locks += 1
+                self._hunt_bytes = _HUNT_FIRST_BYTES
+                events.append(SyncEvent(position, 'lock', via))
+                return True
+        position = self._base + 8 * start + examined
+        self.skipped_bits += position - self.cursor
+        self.cursor = position
+        self._hunt_bytes = min(2 * self._hunt_bytes, HUNT_BLOCK_BYTES)
+        return True
+
+    # --- Tracking ---
+
+    def _track(self, out, events):
+        offset = self.cursor - self._base
+        start, first = offset >> 3, offset & 7
+        rows = (len(self._buffer) - start - 3) // _ROW_BYTES  # The last word of a row reads up to its byte 15
+        if rows <= 0:
+            return False
+        words = _words(self._buffer, start, rows, _ROW_BYTES, _ROW_BYTES)[:, _ROW_BYTES_AT[first]].astype(np.uint32)
+        words >>= _ROW_SHIFTS[first]
+        words &= _WINDOW
+        values = words.astype(np.uint16).ravel()
+        classes = np.take(_CLASS, values)
+        bad = classes == BAD
+        lost = np.flatnonzero(_runs(bad, 1, self.loss)) if bad.any() else ()
+        if len(lost):
+            taken = int(lost[0])
+        elif bad[-1]:
+            taken = int(np.flatnonzero(~bad)[-1]) + 1 if not bad.all() else 0  # The end may start a failing run
+        else:
+            taken = len(bad)
+        if taken:
+            sigils = classes[:taken] == SIGIL_CLASS
+            count = int(sigils.sum())
+            out.append(values[:taken][~sigils] if count else values[:taken])
+            self.sigils += count
+            self.glyphs += taken - count
+            self.bad_glyphs += int(bad[:taken].sum())
+            self.cursor += GLYPH_BITS * taken
+        if len(lost):
+            self.locked = False
+            self.losses += 1
+            events.append(SyncEvent(self.cursor, 'loss', None))
+            return True
+        return taken > 0
+
+
+# --- Impaired-stream benchmark ---
+
+def impair(stream, slips, flips, rng):
+    """Deletes or inserts one bit at `slips` random positions and flips `flips` random bits."""
+    bits = np.unpackbits(np.frombuffer(stream, dtype=np.uint8))
+    for position in np.sort(rng.integers(0, len(bits), size=slips))[::-1]:
+        if rng.integers(2):
+            bits = np.delete(bits, position)
+        else:
+            bits = np.insert(bits, position, rng.integers(2))
+    flipped = rng.integers(0, len(bits), size=flips)
+    bits[flipped] ^= 1
+    return np.packbits(bits).tobytes()
+
+
+def run_sync(stream, chunk_bytes):
+    sync = GlyphSync()
+    glyphs, events = [], []
+    started = time.perf_counter()
+    for index in range(0, len(stream), chunk_bytes):
+        values, new_events = sync.feed(stream[index:index + chunk_bytes])
+        glyphs.append(values)
+        events += new_events
+    elapsed = time.perf_counter() - started
+    return sync, np.concatenate(glyphs), events, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Acquire and track glyph alignment in a raw OCTA-13 bitstream.")
+    parser.add_argument('--grids', type=int, default=65536, help="8x8 grids in the stream, each after a sigil.")
+    parser.add_argument('--chunk', type=int, default=1 << 16, help="Bytes per feed() call.")
+    parser.add_argument('--slips', type=int, default=50, help="Single-bit insertions/deletions to inject.")
+    parser.add_argument('--flips', type=int, default=200, help="Bit flips to inject.")
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    glyphs = sigil_framed(rng.integers(0, 8, size=(args.grids, 8, 8)))
+    clean = glyph_stream_bytes(glyphs)
+    join = int(rng.integers(1, 8 * 1000))  # Join mid-flight, at an arbitrary bit
+    clean_bits = np.unpackbits(np.frombuffer(clean, dtype=np.uint8))[join:]
+    joined = np.packbits(clean_bits).tobytes()
+    mb = len(joined) / 1e6
+
+    sync, values, events, elapsed = run_sync(joined, args.chunk)
+    first_lock = events[0].bit if events else None
+    print(f"[Sync] clean stream, joined at bit {join}: {mb / elapsed:8.1f} MB/s, locked after {first_lock} bits "
+          f"via {events[0].via if events else '-'}, {len(values)} data glyphs, {sync.bad_glyphs} bad, "
+          f"{sync.resyncs} resyncs")
+
+    impaired = impair(joined, args.slips, args.flips, rng)
+    sync, values, events, elapsed = run_sync(impaired, args.chunk)
+    lost = [event for event in events if event.kind == 'loss']
+    locks = [event for event in events if event.kind == 'lock']
+    gaps = [lock.bit - loss.bit for loss, lock in zip(lost, locks[1:])]
+    print(f"[Sync] {args.slips} slips, {args.flips} flips: {len(impaired) / 1e6 / elapsed:8.1f} MB/s, "
+          f"{sync.resyncs} resyncs ({sum(l.via == 'sigil' for l in locks[1:])} on a sigil), "
+          f"{sync.skipped_bits} bits skipped, {len(values)} data glyphs, {sync.bad_glyphs} bad")
+    if gaps:
+        print(f"[Sync] loss to relock: median {int(np.median(gaps))} bits, max {max(gaps)} bits")
+
+    noise = rng.integers(0, 256, size=len(joined), dtype=np.uint8).tobytes()
+    sync, values, events, elapsed = run_sync(noise, args.chunk)
+    print(f"[Sync] random bytes: {len(noise) / 1e6 / elapsed:8.1f} MB/s, {sync.locks} false locks, "
+          f"{sync.losses} losses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Integrity checks for batches of 13-bit OCTA-13 glyphs: which glyphs fail, which field is at fault,
+and repair where the grid structure allows it.
+
+Every field but NOD is determined by the glyph's cell (see octa13_glyphs.py):
+
+    OCT = (x + y) % 8     POS = x ^ y     CHK = OCT ^ NOD ^ POS     END = 1 on the border and the diagonal
+
+check_glyphs(glyphs) returns one uint8 of ERR_* flags per glyph. Glyphs shaped (..., 8, 8), as
+pack_glyphs returns them, are compared with their own cell's OCT, POS and END. Glyphs of unknown
+position (any other shape, e.g. a synchronized stream) are checked against what their fields imply:
+only 18 of the 64 (OCT, POS) pairs occur in a grid, and for 8 of those END is fixed. Both checks are
+table lookups over whole arrays, with no per-glyph Python.
+
+    flags = check_glyphs(glyphs)          # ERR_CHK | ERR_END | ERR_OCT | ERR_POS per glyph
+    failure_bitmap(flags)                 # packed bits, bit i (little-endian) set if glyph i failed
+    fixed, flags, corrected = correct_glyphs(grid_glyphs)
+
+correct_glyphs repairs single-field errors in OCT, POS or END from the cell and keeps a repair only
+if CHK then holds. A bad NOD and a bad CHK give the same syndrome, so those are reported, not fixed.
+
+Usage:
+    python octa13_verify.py --grids 100000 --error-rate 0.01   # Mglyphs/s, detection and repair rates
+"""
+import argparse
+import time
+
+import numpy as np
+
+from octa13_glyphs import GLYPH_BITS, glyph_fields, pack_glyphs
+
+ERR_CHK, ERR_END, ERR_OCT, ERR_POS = 1, 2, 4, 8
+STRUCTURE_MASK = (7 << 10) | (7 << 4) | 1  # OCT, POS and END: the fields fixed by the cell
+_FIELDS = (('oct', 10, 7, ERR_OCT), ('nod', 7, 7, 0), ('pos', 4, 7, ERR_POS), ('chk', 1, 7, ERR_CHK),
+           ('end', 0, 1, ERR_END))
+
+
+def _field(values, name):
+    shift, mask = next((shift, mask) for field, shift, mask, _ in _FIELDS if field == name)
+    return (values >> shift) & mask
+
+
+def _tables():
+    values = np.arange(1 << GLYPH_BITS, dtype=np.uint16)
+    octv, nod, pos, chk, end = (_field(values, name) for name, _, _, _ in _FIELDS)
+    chk_flags = np.where(chk == (octv ^ nod ^ pos), 0, ERR_CHK).astype(np.uint8)
+
+    # Which END each (OCT, POS) pair allows: bit 0 for END 0, bit 1 for END 1; 0 if no cell has the pair
+    fields = glyph_fields(np.zeros((8, 8), dtype=np.uint8))
+    allowed = np.zeros((8, 8), dtype=np.uint8)
+    np.bitwise_or.at(allowed, (fields['oct'].ravel(), fields['pos'].ravel()), 1 << fields['end'].ravel())
+    pair = allowed[octv, pos]
+    free_flags = chk_flags | np.where(pair == 0, ERR_OCT | ERR_POS, 0).astype(np.uint8)
+    free_flags |= np.where((pair != 0) & ((pair >> end) & 1 == 0), ERR_END, 0).astype(np.uint8)
+
+    # Flags for the XOR of a glyph's structure fields with its cell's (CHK and NOD bits are masked off)
+    diff_flags = np.zeros(1 << GLYPH_BITS, dtype=np.uint8)
+    for name, _, _, flag in _FIELDS:
+        if flag and name != 'chk':
+            diff_flags |= np.where(_field(values, name) != 0, flag, 0).astype(np.uint8)
+    return chk_flags, free_flags, diff_flags
+
+
+_CHK_FLAGS, _FREE_FLAGS, _DIFF_FLAGS = _tables()
+_CELL_STRUCTURE = (pack_glyphs(np.zeros((8, 8), dtype=np.uint8)) & STRUCTURE_MASK).astype(np.uint16)
+_SINGLE_FIELD = np.array([bin(flags & (ERR_OCT | ERR_POS | ERR_END)).count('1') == 1 for flags in range(16)])
+
+
+def _is_grid(glyphs):
+    return glyphs.ndim >= 2 and glyphs.shape[-2:] == (8, 8)
+
+
+def check_glyphs(glyphs):
+    """ERR_* flags per glyph (uint8, same shape); 0 means every check passed."""
+    glyphs = np.asarray(glyphs, dtype=np.uint16)
+    if not _is_grid(glyphs):
+        return np.take(_FREE_FLAGS, glyphs)
+    flags = np.take(_DIFF_FLAGS, (glyphs & STRUCTURE_MASK) ^ _CELL_STRUCTURE)
+    flags |= np.take(_CHK_FLAGS, glyphs)
+    return flags
+
+
+def failure_bitmap(flags):
+    """Bit i (little-endian within each byte) set when glyph i, in C order, failed any check."""
+    return np.packbits(np.asarray(flags).ravel() != 0, bitorder='little')
+
+
+def correct_glyphs(glyphs):
+    """
+    For glyphs shaped (..., 8, 8): returns (glyphs with single-field OCT/POS/END errors repaired,
+    the flags still failing, a mask of the repaired glyphs).
+    """
+    glyphs = np.asarray(glyphs, dtype=np.uint16)
+    if not _is_grid(glyphs):
+        raise ValueError(f"Correction needs each glyph's cell: expected shape (..., 8, 8), got {glyphs.shape}.")
+    flags = check_glyphs(glyphs)
+    repaired = (glyphs & ~np.uint16(STRUCTURE_MASK)) | _CELL_STRUCTURE
+    corrected = np.take(_SINGLE_FIELD, flags) & (np.take(_CHK_FLAGS, repaired) == 0)
+    fixed = np.where(corrected, repaired, glyphs)
+    flags[corrected] = 0
+    return fixed, flags, corrected
+
+
+# --- Benchmark CLI ---
+
+def _check_one(value, x, y):
+    """The per-glyph reference: field by field in Python."""
+    octv, nod, pos, chk, end = (value >> 10) & 7, (value >> 7) & 7, (value >> 4) & 7, (value >> 1) & 7, value & 1
+    flags = 0 if chk == (octv ^ nod ^ pos) % 8 else ERR_CHK
+    if octv != (x + y) % 8:
+        flags |= ERR_OCT
+    if pos != (x ^ y) % 8:
+        flags |= ERR_POS
+    if end != int(x == 0 or y == 0 or x == 7 or y == 7 or x == y):
+        flags |= ERR_END
+    return flags
+
+
+def corrupt(glyphs, rate, rng):
+    """Corrupts a `rate` fraction of glyphs: one field set to a different value, or one bit flipped."""
+    glyphs = glyphs.copy()
+    flat = glyphs.reshape(-1)
+    hit = rng.random(len(flat)) < rate
+    index = np.flatnonzero(hit)
+    kinds = rng.integers(0, len(_FIELDS) + 1, size=len(index))  # One of the fields, or a single-bit flip
+    for kind, (name, shift, mask, _) in enumerate(_FIELDS):
+        chosen = index[kinds == kind]
+        delta = rng.integers(1, mask + 1, size=len(chosen)).astype(np.uint16)  # Nonzero: the field changes
+        flat[chosen] ^= delta << shift
+    flips = index[kinds == len(_FIELDS)]
+    flat[flips] ^= (np.uint16(1) << rng.integers(0, GLYPH_BITS, size=len(flips)).astype(np.uint16))
+    return glyphs, hit, kinds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCTA-13 glyph verification and correction.")
+    parser.add_argument('--grids', type=int, default=100000, help="8x8 grids per batch.")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="Fraction of glyphs corrupted.")
+    parser.add_argument('--seed', type=int, default=13)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    clean = pack_glyphs(rng.integers(0, 8, size=(args.grids, 8, 8)))
+    glyphs, hit, kinds = corrupt(clean, args.error_rate, rng)
+    count = glyphs.size
+
+    sample = min(count, 20000)
+    cells = np.arange(sample) % 64
+    start = time.perf_counter()
+    reference = [_check_one(int(v), int(c) % 8, int(c) // 8) for v, c in zip(glyphs.reshape(-1)[:sample], cells)]
+    loop_rate = sample / (time.perf_counter() - start)
+
+    timings = {}
+    for name, call in (('check (cells known)', lambda: check_glyphs(glyphs)),
+                       ('check (stream)', lambda: check_glyphs(glyphs.reshape(-1))),
+                       ('bitmap', lambda: failure_bitmap(check_glyphs(glyphs))),
+                       ('correct', lambda: correct_glyphs(glyphs))):
+        call()
+        start = time.perf_counter()
+        call()
+        timings[name] = count / (time.perf_counter() - start)
+
+    flags = check_glyphs(glyphs)
+    if list(flags.reshape(-1)[:sample]) != reference:
+        raise RuntimeError("Vectorized and per-glyph checks disagree.")
+    fixed, remaining, corrected = correct_glyphs(glyphs)
+    failed = flags.reshape(-1) != 0
+    stream_failed = check_glyphs(glyphs.reshape(-1)) != 0
+
+    print(f"[Verify] {count} glyphs, {int(hit.sum())} corrupted")
+    print(f"[Verify] per-glyph Python loop:     {loop_rate / 1e6:10.2f} Mglyphs/s")
+    for name, rate in timings.items():
+        print(f"[Verify] {name + ':':32s} {rate / 1e6:10.2f} Mglyphs/s  ({rate / loop_rate:.0f}x)")
+    labels = [name.upper() for name, _, _, _ in _FIELDS] + ['bit flip']
+    index = np.flatnonzero(hit)
+    for kind, label in enumerate(labels):
+        chosen = index[kinds == kind]
+        if not len(chosen):
+            continue
+        restored = (fixed.reshape(-1)[chosen] == clean.reshape(-1)[chosen]).mean()
+        print(f"[Verify]   {label:8s} errors: {len(chosen):7d}  detected {failed[chosen].mean():6.1%} "
+              f"(stream {stream_failed[chosen].mean():6.1%})  repaired {restored:6.1%}")
+    false_alarms = int(failed[~hit].sum())
+    wrong_repairs = int((corrected.reshape(-1) & (fixed.reshape(-1) != clean.reshape(-1))).sum())
+    print(f"[Verify] false alarms {false_alarms}, wrong repairs {wrong_repairs}, "
+          f"still failing {int((remaining != 0).sum())}")
+
+
+if __name__ == "__main__":
+    main()